@@ -13,6 +13,8 @@ class Player(Bot):
     '''
     A simple poker bot that makes decisions based on hand EV calculation.
     '''
+    # nothing is kept between calls, so several tables can be played at once
+    multi_table = True
 
     def __init__(self):
         print("Player ABC initialized")
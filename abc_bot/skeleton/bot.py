@@ -8,6 +8,23 @@ class Bot():
     The base class for a pokerbot.
     '''
 
+    # set to True if your bot keeps no state of its own for the round in progress,
+    # so the engine can deal it several tables at once
+    multi_table = False
+
+    def handle_new_game(self):
+        '''
+        Called when the engine starts another game without restarting your bot.
+        Override it to reset anything you track across rounds.
+
+        Arguments:
+        Nothing.
+
+        Returns:
+        Nothing.
+        '''
+        pass
+
     def handle_new_round(self, game_state, round_state, active):
         '''
         Called when a new round starts. Called NUM_ROUNDS times.
@@ -58,4 +75,17 @@ class Bot():
         elif CheckAction in round_state.legal_actions():
             return CheckAction()
         else:
-            return FoldAction()
\ No newline at end of file
+            return FoldAction()
+
+    def get_actions(self, decisions):
+        '''
+        Called instead of get_action when the engine waits on your bot at several tables at once.
+        Override it to decide them together, e.g. with one vectorized equity computation.
+
+        Arguments:
+        decisions: a list of (game_state, round_state, active) arguments for get_action.
+
+        Returns:
+        Your actions, in the same order.
+        '''
+        return [self.get_action(*decision) for decision in decisions]
\ No newline at end of file
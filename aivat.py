@@ -0,0 +1,165 @@
+'''
+Estimates each player's win rate from finished game logs with most of the card luck taken out.
+
+Every chance node in a round (the deal, the flop, the turn and the river) moves the first player's
+equity, and with it the value of their share of the pot. Replaying the log, each node's luck is
+the pot times the change in equity it caused, and it has an expected value of zero because the
+cards are dealt uniformly. Subtracting the luck from the actual result leaves an unbiased estimate
+with a much smaller variance, as in AIVAT. The bots' strategies are unknown, so only chance nodes
+are corrected.
+'''
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import eval7
+import os
+
+from config import *
+from equity import equity
+from stats import RunningStats
+from test_engine import LOG_OPENERS, LOG_EXTENSIONS
+
+STREET_NAMES = ('Flop ', 'Turn ', 'River ')
+PESTIMATE = lambda name, sign, stats: ', {} ({:.2f} +/- {:.2f})'.format(name, sign * stats.mean,
+                                                                      stats.confidence_interval())
+
+
+def open_game_log(filename):
+    '''
+    Opens a game log for reading, decompressing it if its extension says it is compressed.
+    '''
+    for compression, extension in LOG_EXTENSIONS.items():
+        if compression is not None and filename.endswith(extension):
+            return LOG_OPENERS[compression](filename, 'rt')
+    return open(filename, 'rt')
+
+
+def parse_cards(text):
+    '''
+    Converts the cards between a line's brackets into eval7 cards.
+    '''
+    return [eval7.Card(card) for card in text[text.index('[') + 1:text.index(']')].split()]
+
+
+def read_rounds(log_file):
+    '''
+    Yields (seats, hands, streets, deltas) for every finished round in a game log, where streets lists
+    the (board, pot) of each street dealt and deltas maps names to results.
+    '''
+    seats, hands, streets, deltas = [], [], [], {}
+    for line in log_file:
+        line = line.rstrip('\n')
+        if line.startswith('Round #'):
+            seats, hands, streets, deltas = [], [], [], {}
+        elif ' posts the blind of ' in line:
+            seats.append(line[:line.index(' posts the blind of ')])
+        elif ' dealt [' in line:
+            hands.append(parse_cards(line))
+        elif line.startswith(STREET_NAMES):
+            contributions = [int(value.rsplit('(', 1)[1].rstrip(')')) for value in line.split('], ', 1)[1].split(', ')]
+            streets.append((parse_cards(line), sum(contributions)))
+        elif ' awarded ' in line:
+            name, delta = line.rsplit(' awarded ', 1)
+            deltas[name] = int(delta)
+            if len(deltas) == 2:
+                yield seats, hands, streets, deltas
+
+
+def luck(seats, hands, streets, name):
+    '''
+    Returns how much of a round's result for the named player came from the cards, the sum over
+    chance nodes of the pot times the change in their equity.
+    '''
+    seat = seats.index(name)
+    hands = hands if seat == 0 else hands[::-1]
+    previous_equity = 0.5  # before the deal, both players have the same chances
+    total = 0.
+    for board, pot in [([], SMALL_BLIND + BIG_BLIND)] + streets:
+        current_equity = equity(board, hands)
+        total += pot * (current_equity - previous_equity)
+        previous_equity = current_equity
+    return total
+
+
+def evaluate_log(filename):
+    '''
+    Replays one game log. Returns the players' names and the first player's raw and
+    luck-corrected results as RunningStats.
+    '''
+    raw = RunningStats()
+    corrected = RunningStats()
+    with open_game_log(filename) as log_file:
+        names = next(log_file).rstrip('\n').split(' - ', 1)[1].split(' vs ')
+        for seats, hands, streets, deltas in read_rounds(log_file):
+            delta = deltas[names[0]]
+            raw.push(delta)
+            corrected.push(delta - luck(seats, hands, streets, names[0]))
+    return names, raw, corrected
+
+
+def flipped(stats):
+    '''
+    Returns the RunningStats of the same results from the other player's side.
+    '''
+    other = RunningStats()
+    other.count = stats.count
+    other.mean = -stats.mean
+    other.m2 = stats.m2
+    return other
+
+
+def report(label, names, raw, corrected):
+    '''
+    Returns the raw and corrected win rates of both players as printable lines.
+    '''
+    reduction = corrected.variance() / raw.variance() if raw.variance() > 0 else 1.
+    return [
+        label,
+        '  Raw' + PESTIMATE(names[0], 1, raw) + PESTIMATE(names[1], -1, raw) + ', {} rounds'.format(raw.count),
+        '  AIVAT' + PESTIMATE(names[0], 1, corrected) + PESTIMATE(names[1], -1, corrected) +
+        ', {:.1%} of the raw variance'.format(reduction)
+    ]
+
+
+def run(filenames, num_workers=NUM_WORKERS):
+    '''
+    Evaluates the game logs across a process pool, printing each one's win rates, then those of
+    every log combined from the first log's players' side. Returns the combined raw and corrected RunningStats.
+    '''
+    num_workers = min(num_workers or os.cpu_count(), len(filenames))
+    names = None
+    raw = RunningStats()
+    corrected = RunningStats()
+    with ProcessPoolExecutor(num_workers) as executor:
+        futures = {executor.submit(evaluate_log, filename): filename for filename in filenames}
+        for future in as_completed(futures):
+            log_names, log_raw, log_corrected = future.result()
+            for line in report(futures[future], log_names, log_raw, log_corrected):
+                print(line)
+            if names is None:
+                names = log_names
+            if sorted(log_names) != sorted(names):
+                print('  Skipped in the total, as its players are not', ' and '.join(names))
+                continue
+            if log_names != names:
+                log_raw, log_corrected = flipped(log_raw), flipped(log_corrected)
+            raw.merge(log_raw)
+            corrected.merge(log_corrected)
+    if len(filenames) > 1:
+        for line in report('Total', names, raw, corrected):
+            print(line)
+    return raw, corrected
+
+
+def parse_args():
+    '''
+    Parses the game logs to evaluate and arguments that override settings in config.py.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 aivat.py')
+    parser.add_argument('logs', nargs='+', help='Game logs, plain or compressed')
+    parser.add_argument('--workers', type=int, default=NUM_WORKERS, help='Worker processes, defaults to every core')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    run(args.logs, args.workers)
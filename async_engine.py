@@ -0,0 +1,329 @@
+'''
+Hosts many independent matches in one process on a single asyncio event loop.
+
+The blocking engine gives every pokerbot an output thread and waits on one socket at a time, so
+each match needs a process of its own. Here every wait is a coroutine: pokerbots are launched as
+asyncio subprocesses, their output is drained by tasks, and each answer is awaited with
+asyncio.wait_for, so hundreds of matches share the engine's one thread and the machine's cores
+go to the pokerbots.
+'''
+from contextlib import redirect_stdout
+import asyncio
+import argparse
+import tempfile
+import random
+import socket
+import time
+import sys
+import os
+
+from config import *
+from test_engine import Game, Player, RoundState, TerminalState, CheckAction, FoldAction, match_dataset
+from protocol import UNACKED_ROUND_OVER, MULTI_TABLE, BINARY_FRAMES, ACTION_RECORD, decode_action
+from transports import LISTENERS, PipeListener, CHUNK_SIZE
+
+
+async def accept(listener):
+    '''
+    Waits for a pokerbot to connect to a listener from transports.py and returns asyncio streams for it.
+    '''
+    loop = asyncio.get_running_loop()
+    if isinstance(listener, PipeListener):
+        connection = listener.accept()
+        connection.selector.close()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(connection.read_fd, 'rb'))
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, connection.writer)
+        return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+    listener.server_socket.setblocking(False)
+    client_socket, _ = await asyncio.wait_for(loop.sock_accept(listener.server_socket), CONNECT_TIMEOUT)
+    if client_socket.family != socket.AF_UNIX:
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return await asyncio.open_connection(sock=client_socket)
+
+
+class AsyncPlayer(Player):
+    '''
+    Handles one player's pokerbot from the event loop, with coroutines in place of blocking calls.
+    '''
+
+    def __init__(self, name, path, log_filename=None, append_log=False):
+        super().__init__(name, path, log_filename, append_log)
+        self.reader = None
+        self.writer = None
+        self.output_task = None
+
+    async def start(self):
+        '''
+        Builds and runs the pokerbot.
+        '''
+        await self.build()
+        await self.run()
+
+    async def build(self):
+        '''
+        Loads the commands file and builds the pokerbot.
+        '''
+        self.load_commands()
+        if self.commands is not None and len(self.commands['build']) > 0:
+            proc = None
+            try:
+                proc = await asyncio.create_subprocess_exec(*self.commands['build'],
+                                                            stdout=asyncio.subprocess.PIPE,
+                                                            stderr=asyncio.subprocess.STDOUT, cwd=self.path)
+                stdout, _ = await asyncio.wait_for(proc.communicate(), BUILD_TIMEOUT)
+                self.output.write(stdout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                error_message = 'Timed out waiting for ' + self.name + ' to build'
+                print(error_message)
+                self.output.write(error_message.encode())
+            except (TypeError, ValueError):
+                print(self.name, 'build command misformatted')
+            except OSError:
+                print(self.name, 'build failed - check "build" in commands.json')
+
+    async def run(self):
+        '''
+        Runs the pokerbot and establishes the connection over the configured TRANSPORT.
+        '''
+        if self.commands is not None and len(self.commands['run']) > 0:
+            try:
+                with LISTENERS[TRANSPORT]() as listener:
+                    self.bot_subprocess = await asyncio.create_subprocess_exec(
+                        *self.commands['run'], *listener.args, stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.STDOUT, cwd=self.path, pass_fds=listener.pass_fds)
+                    self.output_task = asyncio.create_task(self.stream_output())
+                    self.reader, self.writer = await accept(listener)
+                    print(self.name, 'connected successfully')
+                await self.negotiate()
+            except KeyError:
+                print('Unknown TRANSPORT', TRANSPORT, '- use one of', ', '.join(LISTENERS))
+            except (TypeError, ValueError):
+                print(self.name, 'run command misformatted')
+            except asyncio.TimeoutError:
+                print('Timed out waiting for', self.name, 'to connect')
+                self.close_connection()
+            except OSError:
+                print(self.name, 'run failed - check "run" in commands.json')
+
+    async def stream_output(self):
+        '''
+        Copies the pokerbot's output into its log until it exits.
+        '''
+        # read in chunks, since a line longer than the stream's limit would raise and end the task
+        try:
+            while True:
+                output = await self.bot_subprocess.stdout.read(CHUNK_SIZE)
+                if not output:
+                    break
+                self.output.write(output)
+        except (OSError, ValueError) as error:
+            print('Stopped logging', self.name + "'s output:", error)
+
+    async def negotiate(self):
+        '''
+        Offers the protocol features chosen in config.py and keeps the ones the pokerbot accepts.
+        '''
+        offered = self.offered_features()
+        if offered == 0:
+            return
+        self.writer.write('V{}\n'.format(offered).encode())
+        response = (await asyncio.wait_for(self.reader.readline(), CONNECT_TIMEOUT)).decode().strip()
+        if response.startswith('V'):
+            self.features = int(response[1:]) & offered
+
+    def offered_features(self):
+        '''
+        Returns the protocol features to offer, leaving out several tables at once, which this engine does not deal.
+        '''
+        return super().offered_features() & ~MULTI_TABLE
+
+    async def stop(self):
+        '''
+        Closes the connection and stops the pokerbot.
+        '''
+        if self.writer is not None:
+            try:
+                self.writer.write(self.encode_message(['Q']))
+                self.close_connection()
+            except OSError:
+                print('Could not close socket connection with', self.name)
+        elif self.bot_subprocess is not None:
+            # it never connected or stopped answering, so do not wait on it
+            self.bot_subprocess.kill()
+        if self.bot_subprocess is not None:
+            try:
+                await asyncio.wait_for(self.bot_subprocess.wait(), CONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                print('Timed out waiting for', self.name, 'to quit')
+                self.bot_subprocess.kill()
+                await self.bot_subprocess.wait()
+        if self.output_task is not None:
+            await self.output_task  # the bot's stdout is closed, so this drains what is left
+        self.output.close()
+
+    def close_connection(self):
+        '''
+        Drops the connection, so the pokerbot is not queried again.
+        '''
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def connected(self):
+        '''
+        Returns whether the pokerbot can still be queried.
+        '''
+        return self.writer is not None
+
+    async def exchange(self, message, time_limit=CONNECT_TIMEOUT):
+        '''
+        Sends one message to the pokerbot and returns the clause it responds with and how long it took,
+        timed from the moment the message is sent. Raises socket.timeout after time_limit seconds.
+        '''
+        self.writer.write(message)
+        start_time = time.perf_counter()
+        try:
+            if self.features & BINARY_FRAMES:
+                clause = decode_action(await asyncio.wait_for(self.reader.readexactly(ACTION_RECORD.size), time_limit))
+            else:
+                clause = (await asyncio.wait_for(self.reader.readline(), time_limit)).decode().strip()
+        except asyncio.IncompleteReadError:
+            clause = ''
+        except asyncio.TimeoutError:
+            # a late answer would be read as the next one, so this connection is done
+            self.close_connection()
+            raise socket.timeout
+        return clause, time.perf_counter() - start_time
+
+    async def query(self, round_state, player_message, game_log):
+        '''
+        Requests one action from the pokerbot over the connection, like Player.query.
+        At the end of the round, we request a CheckAction from the pokerbot.
+        '''
+        legal_actions = round_state.legal_actions() if isinstance(round_state, RoundState) else {CheckAction}
+        self.answered = False
+        if self.connected() and self.game_clock > 0.:
+            clause = ''
+            try:
+                message = self.query_message(player_message)
+                if isinstance(round_state, TerminalState) and self.features & UNACKED_ROUND_OVER:
+                    self.writer.write(message)
+                    return CheckAction()
+                clause, think_time = await self.exchange(message, self.time_limit())
+                return self.play_answer(round_state, clause, think_time, game_log)
+            except (OSError, IndexError, KeyError, ValueError) as error:
+                self.log_query_error(error, clause, game_log)
+        return CheckAction() if CheckAction in legal_actions else FoldAction()
+
+class AsyncGame(Game):
+    '''
+    A Game whose rounds await the pokerbots, so many can run on one event loop.
+    '''
+
+    async def run_round(self, players, round_num):
+        '''
+        Runs one round of poker, awaiting each pokerbot's answer.
+        '''
+        queries = self.round_queries(players, round_num)
+        action = None
+        try:
+            while True:
+                player, round_state, player_message = queries.send(action)
+                action = await player.query(round_state, player_message, self.errors)
+        except StopIteration:
+            pass
+
+    async def play(self, players, resume=False):
+        '''
+        Plays one game of poker between running pokerbots and writes the game log.
+        With resume, the game continues from its last checkpoint if there is one.
+        '''
+        self.start_log(players, resume)
+        round_num = self.next_round - 1
+        for round_num in range(self.next_round, self.first_round + self.num_rounds):
+            seats = self.seating(players, round_num)
+            self.log_round_start(seats, round_num)
+            await self.run_round(seats, round_num)
+            if self.finish_round(players, round_num):
+                break
+        self.close_log(players, round_num)
+
+    async def run(self, players, resume=False):
+        '''
+        Starts the pokerbots, plays one game and stops them.
+        '''
+        await asyncio.gather(*[player.start() for player in players])
+        try:
+            await self.play(players, resume)
+        finally:
+            await asyncio.gather(*[player.stop() for player in players])
+
+
+async def run_matches(num_matches, num_rounds, seed, directory, max_concurrent):
+    '''
+    Plays num_matches seeded matches between the players from config.py, at most max_concurrent at once,
+    and yields (match, bankrolls) as each finishes.
+    '''
+    master = random.Random(seed)
+    seeds = [master.getrandbits(64) for _ in range(num_matches)]
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run_match(match):
+        async with semaphore:
+            players = [AsyncPlayer(name, path, os.path.join(directory, '{}.{}.txt'.format(match, name)))
+                       for name, path in [(PLAYER_1_NAME, PLAYER_1_PATH), (PLAYER_2_NAME, PLAYER_2_PATH)]]
+            game = AsyncGame(num_rounds, seeds[match], os.path.join(directory, 'gamelog.{}'.format(match)),
+                             telemetry_filename=os.path.join(directory, 'telemetry.{}'.format(match)),
+                             checkpoint_filename=None, dataset_directory=match_dataset(match))
+            await game.run(players)
+            return match, [player.bankroll for player in players]
+
+    for finished in asyncio.as_completed([run_match(match) for match in range(num_matches)]):
+        yield await finished
+
+
+async def run(num_matches, num_rounds=NUM_ROUNDS, seed=GAME_SEED, max_concurrent=MAX_CONCURRENT_MATCHES,
+              log_directory=None):
+    '''
+    Plays the matches in one event loop, printing each result as it arrives, and returns the totals.
+    '''
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    print('Playing', num_matches, 'matches of', num_rounds, 'rounds, up to', max_concurrent, 'at once, with seed', seed)
+    stdout = sys.stdout
+    totals = [0, 0]
+    start_time = time.perf_counter()
+    with tempfile.TemporaryDirectory() as temporary_directory, open(os.devnull, 'w') as devnull:
+        directory = log_directory or temporary_directory
+        os.makedirs(directory, exist_ok=True)
+        with redirect_stdout(devnull):  # the matches' own progress would interleave
+            finished = 0
+            async for match, bankrolls in run_matches(num_matches, num_rounds, seed, directory, max_concurrent):
+                finished += 1
+                totals = [total + bankroll for total, bankroll in zip(totals, bankrolls)]
+                print('[{}/{}] match {}, {} ({}), {} ({})'.format(finished, num_matches, match, PLAYER_1_NAME,
+                                                                bankrolls[0], PLAYER_2_NAME, bankrolls[1]), file=stdout)
+    print('Total, {} ({}), {} ({}), {} matches in {:.1f}s'.format(PLAYER_1_NAME, totals[0], PLAYER_2_NAME, totals[1],
+                                                               num_matches, time.perf_counter() - start_time))
+    return totals
+
+
+def parse_args():
+    '''
+    Parses arguments that override the async engine settings in config.py.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 async_engine.py')
+    parser.add_argument('--matches', type=int, default=1, help='Matches to play')
+    parser.add_argument('--rounds', type=int, default=NUM_ROUNDS, help='Rounds in each match')
+    parser.add_argument('--concurrent', type=int, default=MAX_CONCURRENT_MATCHES, help='Matches to play at once')
+    parser.add_argument('--seed', type=int, default=GAME_SEED, help='Seed for the match decks')
+    parser.add_argument('--logs', type=str, default=None, help='Directory to keep every match log in')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    asyncio.run(run(args.matches, args.rounds, args.seed, args.concurrent, args.logs))
@@ -0,0 +1,350 @@
+'''
+A struct-of-arrays engine that plays many independent rounds of poker at once.
+
+Every round is one row of a set of NumPy arrays, and all unfinished rounds move
+forward together. Pokerbots are replaced by batched policies that choose actions
+for a whole array of rounds in one call, so rule-based strategies can be evaluated
+over millions of hands. The rules mirror RoundState in test_engine.py exactly.
+'''
+import argparse
+import time
+import os
+
+import numpy as np
+
+from config import *
+from decks import DeckProvider
+from hand_ranks import hand_ranks
+from stats import RunningStats
+
+FOLD, CALL, CHECK, RAISE = 0, 1, 2, 3
+ACTION_NAMES = ['FoldAction', 'CallAction', 'CheckAction', 'RaiseAction']
+
+
+def evaluate_showdowns(hands, boards):
+    '''
+    Returns the eval7 score of each seat's best hand for every row, looked up in the hand-rank table.
+    '''
+    cards = np.concatenate([hands, np.repeat(boards[:, None, :], 2, axis=1)], axis=2)
+    return hand_ranks(cards.reshape(-1, 7)).reshape(-1, 2).astype(np.int64)
+
+
+class BatchState():
+    '''
+    Encodes many rounds of poker as parallel arrays indexed by row, then seat.
+    Rows that have reached a terminal state are marked in done, with payoffs in deltas.
+    '''
+
+    def __init__(self, cards):
+        num_rounds = len(cards)
+        self.button = np.zeros(num_rounds, np.int32)
+        self.street = np.zeros(num_rounds, np.int32)
+        self.pips = np.tile(np.array([SMALL_BLIND, BIG_BLIND], np.int32), (num_rounds, 1))
+        self.stacks = np.tile(np.array([STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND], np.int32),
+                              (num_rounds, 1))
+        self.hands = cards[:, :4].reshape(num_rounds, 2, 2)
+        self.board = cards[:, 4:9]
+        self.done = np.zeros(num_rounds, bool)
+        self.deltas = np.zeros((num_rounds, 2), np.int32)
+
+    def legal_actions(self, rows, active):
+        '''
+        Returns a boolean mask of the active player's legal moves, one column per action code.
+        '''
+        continue_cost = self.pips[rows, 1-active] - self.pips[rows, active]
+        my_stack = self.stacks[rows, active]
+        opp_stack = self.stacks[rows, 1-active]
+        free = continue_cost == 0
+        legal = np.empty((len(rows), 4), bool)
+        legal[:, FOLD] = ~free
+        legal[:, CALL] = ~free
+        legal[:, CHECK] = free
+        # we can only raise the stakes if both players can afford it
+        bets_forbidden = (my_stack == 0) | (opp_stack == 0)
+        raises_forbidden = (continue_cost == my_stack) | (opp_stack == 0)
+        legal[:, RAISE] = np.where(free, ~bets_forbidden, ~raises_forbidden)
+        return legal
+
+    def raise_bounds(self, rows, active):
+        '''
+        Returns arrays of the minimum and maximum legal raises.
+        '''
+        my_pip = self.pips[rows, active]
+        continue_cost = self.pips[rows, 1-active] - my_pip
+        max_contribution = np.minimum(self.stacks[rows, active], self.stacks[rows, 1-active] + continue_cost)
+        min_contribution = np.minimum(max_contribution, continue_cost + np.maximum(continue_cost, BIG_BLIND))
+        return my_pip + min_contribution, my_pip + max_contribution
+
+    def validate(self, rows, active, actions, amounts):
+        '''
+        Replaces illegal actions with a check, or a fold if checking is not allowed.
+        '''
+        legal = self.legal_actions(rows, active)
+        allowed = legal[np.arange(len(rows)), actions]
+        raises = allowed & (actions == RAISE)
+        if raises.any():
+            min_raise, max_raise = self.raise_bounds(rows[raises], active[raises])
+            allowed[raises] = (min_raise <= amounts[raises]) & (amounts[raises] <= max_raise)
+        return np.where(allowed, actions, np.where(legal[:, CHECK], CHECK, FOLD))
+
+    def showdown(self, rows):
+        '''
+        Compares the players' hands and computes payoffs.
+        '''
+        scores = evaluate_showdowns(self.hands[rows], self.board[rows])
+        stacks = self.stacks[rows]
+        delta = np.where(scores[:, 0] > scores[:, 1], STARTING_STACK - stacks[:, 1],
+                         np.where(scores[:, 0] < scores[:, 1], stacks[:, 0] - STARTING_STACK,
+                                  (stacks[:, 0] - stacks[:, 1]) // 2))
+        self.deltas[rows, 0] = delta
+        self.deltas[rows, 1] = -delta
+        self.done[rows] = True
+
+    def proceed_street(self, rows):
+        '''
+        Resets the players' pips and advances the rows to the next round of betting.
+        '''
+        river = self.street[rows] == 5
+        self.showdown(rows[river])
+        rows = rows[~river]
+        self.street[rows] = np.where(self.street[rows] == 0, 3, self.street[rows] + 1)
+        self.button[rows] = 1
+        self.pips[rows] = 0
+
+    def proceed(self, rows, active, actions, amounts):
+        '''
+        Advances each row by one action performed by its active player.
+        '''
+        button = self.button[rows]
+        street = self.street[rows]
+
+        fold = actions == FOLD
+        folded, seat = rows[fold], active[fold]
+        delta = np.where(seat == 0, self.stacks[folded, 0] - STARTING_STACK, STARTING_STACK - self.stacks[folded, 1])
+        self.deltas[folded, 0] = delta
+        self.deltas[folded, 1] = -delta
+        self.done[folded] = True
+
+        call = actions == CALL
+        limped = rows[call & (button == 0)]  # sb calls bb
+        self.button[limped] = 1
+        self.pips[limped] = BIG_BLIND
+        self.stacks[limped] = STARTING_STACK - BIG_BLIND
+        # both players acted
+        called, seat = rows[call & (button > 0)], active[call & (button > 0)]
+        contribution = self.pips[called, 1-seat] - self.pips[called, seat]
+        self.stacks[called, seat] -= contribution
+        self.pips[called, seat] += contribution
+
+        check = actions == CHECK
+        both_acted = check & (((street == 0) & (button > 0)) | (button > 1))
+        self.button[rows[check & ~both_acted]] += 1
+
+        raised = actions == RAISE
+        raiser, seat = rows[raised], active[raised]
+        self.stacks[raiser, seat] -= amounts[raised] - self.pips[raiser, seat]
+        self.pips[raiser, seat] = amounts[raised]
+        self.button[raiser] += 1
+
+        self.proceed_street(np.concatenate([called, rows[both_acted]]))
+
+
+class BatchPolicy():
+    '''
+    The base class for a batched pokerbot policy.
+    '''
+
+    def get_actions(self, state, rows, active):
+        '''
+        Chooses actions for many rounds at once.
+
+        Arguments:
+        state: the BatchState. Only the first street cards of each board row are public.
+        rows: the rows of state in which this policy is to act.
+        active: the policy's seat in each of those rows.
+
+        Returns:
+        An array of action codes and an array of raise amounts, one entry per row.
+        '''
+        raise NotImplementedError('get_actions')
+
+
+class CheckCallPolicy(BatchPolicy):
+    '''
+    Checks when it can and calls otherwise, like the skeleton Bot.
+    '''
+
+    def get_actions(self, state, rows, active):
+        legal = state.legal_actions(rows, active)
+        actions = np.where(legal[:, CALL], CALL, np.where(legal[:, CHECK], CHECK, FOLD))
+        return actions, np.zeros(len(rows), np.int32)
+
+
+class AllInPolicy(BatchPolicy):
+    '''
+    The strategy of all_in_bot: shove pairs and any ace, otherwise check or fold.
+    '''
+
+    def get_actions(self, state, rows, active):
+        hands = state.hands[rows, active] // 4
+        all_in_hole = (hands[:, 0] == hands[:, 1]) | (hands == 12).any(axis=1)
+        legal = state.legal_actions(rows, active)
+        actions = np.where(all_in_hole, RAISE, np.where(legal[:, CHECK], CHECK, FOLD))
+        return actions, state.stacks[rows, active]
+
+
+class ABCPolicy(BatchPolicy):
+    '''
+    The strategy of abc_bot: compare pot-weighted hand strength against the cost to continue.
+    '''
+
+    def preflop_hand_strength(self, hands):
+        '''
+        Vectorized abc_bot preflop_hand_strength for an array of hole cards.
+        '''
+        ranks = hands // 4 + 2
+        high_card = ranks.max(axis=1)
+        low_card = ranks.min(axis=1)
+        connectedness = 13 - (high_card - low_card)
+        suited = 0.2 + 0.3 * ((high_card - 2) / 12) + 0.2 * (connectedness / 13)
+        offsuit = 0.1 + 0.3 * ((high_card - 2) / 12) + 0.2 * (connectedness / 13)
+        return np.where(ranks[:, 0] == ranks[:, 1], 0.3 + 0.6 * ((high_card - 2) / 12),
+                        np.where(hands[:, 0] % 4 == hands[:, 1] % 4, np.minimum(suited, 0.7), np.minimum(offsuit, 0.6)))
+
+    def evaluate_hand_strength(self, cards):
+        '''
+        Vectorized abc_bot evaluate_hand_strength for rows of five or more cards.
+        '''
+        ranks = cards // 4 + 2
+        rank_counts = (ranks[:, :, None] == np.arange(15)).sum(axis=1)
+        suit_counts = (cards[:, :, None] % 4 == np.arange(4)).sum(axis=1)
+        has_flush = (suit_counts >= 5).any(axis=1)
+        numerical_ranks = -np.sort(-ranks, axis=1)
+        has_straight = ((numerical_ranks[:, :-4] - numerical_ranks[:, 4:]) == 4).any(axis=1)
+        has_straight |= (rank_counts[:, [14, 5, 4, 3, 2]] > 0).all(axis=1)
+        trips = (rank_counts == 3).any(axis=1)
+        pairs = (rank_counts == 2).sum(axis=1)
+        high_card = 0.2 + 0.8 * ((numerical_ranks[:, 0] - 2) / 12)
+        return np.select([has_flush & has_straight, (rank_counts == 4).any(axis=1), trips & (pairs > 0),
+                          has_flush, has_straight, trips, pairs >= 2, pairs > 0],
+                         [8, 7, 6, 5, 4, 3, 2, 1], high_card)
+
+    def get_actions(self, state, rows, active):
+        hands = state.hands[rows, active].astype(np.int64)
+        street = state.street[rows]
+        win_probability = np.empty(len(rows))
+        preflop = street == 0
+        win_probability[preflop] = self.preflop_hand_strength(hands[preflop])
+        for board_size in (3, 4, 5):
+            on_street = street == board_size
+            if on_street.any():
+                cards = np.concatenate([hands[on_street], state.board[rows[on_street], :board_size]], axis=1)
+                win_probability[on_street] = self.evaluate_hand_strength(cards) / 8.0
+
+        pot_size = state.pips[rows].sum(axis=1)
+        cost_to_call = state.pips[rows, 1-active] - state.pips[rows, active]
+        ev = win_probability * pot_size - cost_to_call
+        legal = state.legal_actions(rows, active)
+        min_raise, max_raise = state.raise_bounds(rows, active)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            amounts = (min_raise + (max_raise - min_raise) * np.minimum(ev / pot_size, 1.0))
+        amounts = np.where(ev > 0, amounts, 0).astype(np.int32)
+
+        check_or_fold = np.where(legal[:, CHECK], CHECK, FOLD)
+        positive = np.where(legal[:, RAISE], RAISE, np.where(legal[:, CALL], CALL, CHECK))
+        marginal = np.where(legal[:, CHECK], CHECK, np.where(legal[:, CALL], CALL, FOLD))
+        actions = np.where(ev > 0, positive, np.where(ev > -cost_to_call, marginal, check_or_fold))
+        return actions, amounts
+
+
+POLICIES = {
+    'abc_bot': ABCPolicy,
+    'all_in_bot': AllInPolicy,
+    'check_call': CheckCallPolicy
+}
+
+
+def play_batch(state, policies, first_round=1):
+    '''
+    Plays every row of state to the end and returns the first policy's delta in each round.
+    Seats alternate every round as in Game.run, so policies[0] sits in seat 0 of odd-numbered rounds.
+    '''
+    round_index = first_round - 1 + np.arange(len(state.done))
+    while True:
+        rows = np.flatnonzero(~state.done)
+        if len(rows) == 0:
+            break
+        active = state.button[rows] % 2
+        owner = (round_index[rows] + active) % 2
+        actions = np.empty(len(rows), np.int64)
+        amounts = np.zeros(len(rows), np.int64)
+        for player, policy in enumerate(policies):
+            mine = owner == player
+            if mine.any():
+                actions[mine], amounts[mine] = policy.get_actions(state, rows[mine], active[mine])
+        actions = state.validate(rows, active, actions, amounts)
+        state.proceed(rows, active, actions, amounts)
+    return state.deltas[np.arange(len(round_index)), round_index % 2]
+
+
+def array_stats(values):
+    '''
+    Summarizes an array of values as a RunningStats.
+    '''
+    stats = RunningStats()
+    if len(values):
+        stats.count = len(values)
+        stats.mean = float(values.mean())
+        stats.m2 = float(((values - stats.mean) ** 2).sum())
+    return stats
+
+
+def run(policies, num_rounds, batch_size=BATCH_SIZE, seed=GAME_SEED):
+    '''
+    Plays num_rounds rounds in batches and returns each policy's bankroll, along with
+    the first policy's duplicate pair statistics in DUPLICATE_MODE.
+    '''
+    decks = DeckProvider(seed)
+    bankroll = 0
+    pair_stats = RunningStats()
+    if DUPLICATE_MODE:
+        batch_size += batch_size % 2  # keep mirrored rounds in the same batch
+    for first_round in range(1, num_rounds + 1, batch_size):
+        size = min(batch_size, num_rounds + 1 - first_round)
+        deck_nums = np.arange(first_round, first_round + size)
+        if DUPLICATE_MODE:
+            # consecutive rows share a deck, and seats alternate between rows
+            deck_nums -= deck_nums % 2 == 0
+        cards = decks.codes(deck_nums)
+        deltas = play_batch(BatchState(cards), policies, first_round)
+        bankroll += int(deltas.sum())
+        if DUPLICATE_MODE:
+            pair_stats.merge(array_stats(deltas[:size - size % 2].reshape(-1, 2).sum(axis=1)))
+    return [bankroll, -bankroll], pair_stats
+
+
+def parse_args():
+    '''
+    Parses arguments selecting the policies and the number of rounds.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 batch_engine.py')
+    parser.add_argument('--players', nargs=2, default=[os.path.basename(PLAYER_1_PATH), os.path.basename(PLAYER_2_PATH)],
+                        choices=sorted(POLICIES), help='Batched policies to play, defaults to the bots in config.py')
+    parser.add_argument('--rounds', type=int, default=NUM_ROUNDS, help='Rounds to play')
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help='Rounds held in memory at once')
+    parser.add_argument('--seed', type=int, default=GAME_SEED, help='Seed for the decks')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    start_time = time.perf_counter()
+    bankrolls, pair_stats = run([POLICIES[name]() for name in args.players], args.rounds, args.batch, args.seed)
+    elapsed = time.perf_counter() - start_time
+    names = [PLAYER_1_NAME, PLAYER_2_NAME]
+    print('Final' + ''.join(', {} {} ({})'.format(name, policy, bankroll)
+                            for name, policy, bankroll in zip(names, args.players, bankrolls)))
+    if DUPLICATE_MODE:
+        print('Duplicate, {} ({:.2f} +/- {:.2f}), {} pairs'.format(
+            names[0], pair_stats.mean, pair_stats.confidence_interval(), pair_stats.count))
+    print('{} rounds in {:.2f}s ({:.0f} rounds/s)'.format(args.rounds, elapsed, args.rounds / elapsed))
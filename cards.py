@@ -0,0 +1,18 @@
+'''
+Integer card codes shared by the engine tools.
+A card's code is 4 * rank + suit, the same ordering eval7 uses.
+'''
+import eval7
+
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+CARD_STRINGS = [rank + suit for rank in RANKS for suit in SUITS]
+CARD_CODES = {card: code for code, card in enumerate(CARD_STRINGS)}
+EVAL7_CARDS = [eval7.Card(card) for card in CARD_STRINGS]
+
+
+def encode_cards(cards):
+    '''
+    Converts eval7 cards or card strings into a list of integer codes.
+    '''
+    return [CARD_CODES[str(card)] for card in cards]
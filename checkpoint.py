@@ -0,0 +1,38 @@
+'''
+Saves and loads the engine state of a long game, so a stopped game can resume where it left off.
+'''
+import pickle
+import os
+
+
+def write_checkpoint(state, filename):
+    '''
+    Pickles state to filename, syncing it to disk and replacing the old checkpoint in one step,
+    so a crash mid-write leaves the previous checkpoint intact.
+    '''
+    with open(filename + '.tmp', 'wb') as checkpoint_file:
+        pickle.dump(state, checkpoint_file, pickle.HIGHEST_PROTOCOL)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(filename + '.tmp', filename)
+
+
+def read_checkpoint(filename):
+    '''
+    Returns the state saved in filename, or None if there is no checkpoint.
+    '''
+    try:
+        with open(filename, 'rb') as checkpoint_file:
+            return pickle.load(checkpoint_file)
+    except FileNotFoundError:
+        return None
+
+
+def remove_checkpoint(filename):
+    '''
+    Deletes the checkpoint once its game is over, so it is not resumed again.
+    '''
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        pass
@@ -10,13 +10,88 @@ PLAYER_2_PATH = './abc_bot'
 
 # GAME PROGRESS IS RECORDED HERE
 GAME_LOG_FILENAME = 'gamelog'
+# NONE WRITES PLAIN TEXT, 'gzip' OR 'lzma' COMPRESS THE LOG AS IT IS WRITTEN
+GAME_LOG_COMPRESSION = None
+# THE LOG IS STREAMED TO DISK AND FLUSHED AT MOST THIS OFTEN, IN SECONDS
+GAME_LOG_FLUSH_INTERVAL = 1.
+# EVERY CHECKPOINT_INTERVAL ROUNDS, SAVE THE GAME'S STATE TO CHECKPOINT_FILENAME, NONE TO SKIP
+# A STOPPED GAME PICKS UP FROM ITS LAST CHECKPOINT WITH `python test_engine.py --resume`, RESTARTING THE BOTS
+CHECKPOINT_INTERVAL = 10000
+CHECKPOINT_FILENAME = 'checkpoint.pkl'
 # PLAYER_LOG_SIZE_LIMIT IS IN BYTES
 PLAYER_LOG_SIZE_LIMIT = 52428800
+# OUTPUT IS WRITTEN TO THE PLAYER LOG AS IT ARRIVES. ONCE A LOG REACHES THE LIMIT,
+# ROTATE IT INTO THIS MANY NUMBERED BACKUPS (A.txt.1, A.txt.2, ...) INSTEAD OF DROPPING OUTPUT
+PLAYER_LOG_BACKUP_COUNT = 0
+# WHEN OUTPUT IS DROPPED, KEEP ITS LAST PLAYER_LOG_TAIL_SIZE BYTES AND APPEND THEM AT THE END
+PLAYER_LOG_TAIL_SIZE = 0
 # STARTING_GAME_CLOCK AND TIMEOUTS ARE IN SECONDS
 ENFORCE_GAME_CLOCK = False
 STARTING_GAME_CLOCK = 500000.
 BUILD_TIMEOUT = 30.
 CONNECT_TIMEOUT = 30.
+# THE MOST A BOT MAY TAKE FOR ONE ACTION, NONE FOR NO LIMIT BEYOND ITS GAME CLOCK
+# A BOT THAT RUNS OVER IS TREATED AS OUT OF TIME
+ACTION_TIME_LIMIT = None
+# HOW THE ENGINE TALKS TO THE BOTS: 'tcp', 'unix' (UNIX DOMAIN SOCKETS) OR 'pipe' (INHERITED PIPES)
+# 'unix' AND 'pipe' HAVE LOWER LATENCY BUT NEED MACOS OR LINUX
+TRANSPORT = 'tcp'
+# 'binary' SENDS LENGTH-PREFIXED FRAMES WITH INTEGER CARD CODES TO BOTS THAT SUPPORT THEM, SEE PROTOCOL.PY
+# BOTS WITH AN OLDER SKELETON KEEP USING THE 'text' PROTOCOL
+PROTOCOL = 'text'
+# DO NOT WAIT FOR THE BOTS TO ACKNOWLEDGE THE END OF EACH ROUND, SAVING TWO ROUND TRIPS PER HAND
+# BOTS WITH AN OLDER SKELETON KEEP ACKNOWLEDGING, OFF BY DEFAULT SO EVERY BOT IS ASKED THE SAME WAY
+PIPELINE_ROUND_OVER = False
+# MULTITABLE_ENGINE.PY DEALS UP TO THIS MANY ROUNDS AT ONCE (AT MOST 256) TO BOTS THAT CAN PLAY SEVERAL TABLES
+# EACH BOT THEN ANSWERS ALL ITS WAITING TABLES IN ONE MESSAGE, 1 PLAYS ONE ROUND AT A TIME
+NUM_TABLES = 8
+# EVERY DECISION IS TIMED, AND AT THE END OF A GAME THE LATENCIES CAN BE WRITTEN TO
+# TELEMETRY_FILENAME.JSON AND TELEMETRY_FILENAME.PROM (PROMETHEUS TEXTFILE FORMAT), E.G. 'telemetry'
+# WITH --games EACH GAME WRITES TELEMETRY_FILENAME.N, NONE WRITES NO REPORTS
+TELEMETRY_FILENAME = None
+# ONCE A PLAYER IS ALL-IN, DEAL OUT THE BOARD WITHOUT ASKING THE BOTS FOR THEIR FORCED CHECKS
+FAST_FORWARD_ALL_IN = True
+# LOAD PYTHON BOTS INTO THE ENGINE PROCESS INSTEAD OF RUNNING THEM OVER SOCKETS
+# MUCH FASTER FOR SELF-PLAY, KEEP IT OFF FOR FINAL VALIDATION
+RUN_IN_PROCESS = False
+# PLAY THIS MANY GAMES BACK TO BACK WITHOUT RESTARTING THE BOTS, EACH WITH ITS OWN NUMBERED GAME LOG
+NUM_GAMES = 1
+# HEADLESS GAMES BUILD NO TEXT GAME LOG, FOR HIGH-VOLUME RUNS WHERE ONLY RESULTS AND OBSERVERS MATTER
+# `python test_engine.py --headless --text-log` STILL WRITES THE LOG, FORMATTED FROM THE GAME'S EVENTS
+HEADLESS = False
+# PRINT THE HANDS PLAYED, WITH HANDS AND DECISIONS PER SECOND, AT MOST THIS OFTEN IN SECONDS, NONE TO STAY QUIET
+PROGRESS_INTERVAL = 1.
+# PARALLEL_ENGINE.PY SPLITS NUM_ROUNDS INTO SEEDED SHARDS ACROSS WORKER PROCESSES
+# NONE USES ONE WORKER PER CORE, ONE SHARD PER WORKER AND A RANDOM SEED
+NUM_WORKERS = None
+NUM_SHARDS = None
+GAME_SEED = None
+# DECKS ARE SHUFFLED WITH NUMPY THIS MANY ROUNDS AT A TIME, EACH BLOCK FROM ITS OWN STREAM OF THE SEED
+# ROUND N GETS THE SAME DECK FOR THE SAME SEED IN EVERY ENGINE, SO ANY HAND CAN BE REPLAYED FROM (SEED, N)
+DECK_BLOCK_SIZE = 4096
+# ASYNC_ENGINE.PY PLAYS THIS MANY MATCHES AT ONCE ON ONE EVENT LOOP
+# EACH ONE RUNS TWO BOTS AND HOLDS A FEW FILE DESCRIPTORS, SO KEEP IT UNDER `ulimit -n` / 8
+MAX_CONCURRENT_MATCHES = 64
+# BATCH_ENGINE.PY PLAYS THIS MANY ROUNDS AT ONCE IN NUMPY ARRAYS
+BATCH_SIZE = 100000
+# SAVE EVERY DECISION OF A GAME TO DATASET_DIRECTORY AS NUMBERED .NPZ CHUNKS OF DATASET_CHUNK_SIZE ROWS, NONE TO SKIP
+# ONLY ONE CHUNK IS HELD IN MEMORY, ABOUT 60 BYTES PER ROW, SEE DATASET.PY FOR THE COLUMNS
+DATASET_DIRECTORY = None
+DATASET_CHUNK_SIZE = 1 << 18
+# PLAY EVERY DECK TWICE WITH THE SEATS SWAPPED AND REPORT THE PAIRED RESULTS
+# CANCELS OUT MOST CARD LUCK, KEEP NUM_ROUNDS EVEN
+DUPLICATE_MODE = False
+# WHEN AN ALL-IN IS CALLED BEFORE THE RIVER, ALSO CREDIT EACH PLAYER WITH THEIR EQUITY IN THE POT
+# THE EV-ADJUSTED BANKROLLS ARE LOGGED AND USED BY DUPLICATE_MODE AND THE SPRT, AS THEY VARY FAR LESS
+# EQUITY IS EXACT ON EVERY STREET, OVER ALL 1.7 MILLION RUNOUTS PREFLOP
+EV_ADJUST = False
+# STOP A GAME EARLY ONCE A SEQUENTIAL PROBABILITY RATIO TEST DECIDES BETWEEN TWO AVERAGE RESULTS FOR PLAYER 1
+# SPRT_BOUNDS = (0., 1.) TESTS "EVEN" AGAINST "WINS 1 CHIP PER ROUND", NONE ALWAYS PLAYS NUM_ROUNDS
+# SPRT_ALPHA AND SPRT_BETA ARE THE ERROR RATES, AND NO DECISION IS MADE BEFORE SPRT_MIN_COUNT ROUNDS (PAIRS IN DUPLICATE_MODE)
+SPRT_BOUNDS = None
+SPRT_ALPHA = 0.05
+SPRT_BETA = 0.05
+SPRT_MIN_COUNT = 100
 # THE GAME VARIANT FIXES THE PARAMETERS BELOW
 # CHANGE ONLY FOR TRAINING OR EXPERIMENTATION
 NUM_ROUNDS = 50
@@ -0,0 +1,191 @@
+'''
+Saves every decision of a game as a training dataset of NumPy arrays, written as the game is played.
+
+DatasetWriter observes a game and records one row per Action event, from the RoundState the
+action was taken in, so each row is the decision point exactly as the acting bot saw it. Rows
+fill preallocated columns, and every DATASET_CHUNK_SIZE rows they are saved to the next numbered
+.npz file in the directory, so memory stays bounded in runs of any length. The rows held at a
+checkpoint are saved as a shorter chunk, so a resumed game drops the chunks after it and replays
+their rounds, and the dataset holds every round once. A game writes one with
+DATASET_DIRECTORY in config.py or `python test_engine.py --dataset DIRECTORY`. Rows have these columns:
+
+    round         round number
+    street        0, 3, 4 or 5 cards on the board
+    button        RoundState.button, the acting seat is button % 2
+    player        index of the acting player in names, the two player names saved in every chunk
+    pips, stacks  chips in front of and behind each seat
+    hands         both seats' hole cards as card codes from cards.py
+    board         the board dealt so far as card codes, padded with -1
+    legal         legal actions as a mask in the order of ACTIONS
+    raise_bounds  minimum and maximum raise, zero when raising is not legal
+    action        index of the action played in ACTIONS
+    amount        the raise amount, zero for other actions
+    answered      whether the pokerbot chose the action, false for the forced checks of an all-in
+                  and the checks or folds the engine plays for late, illegal or misformatted answers
+    delta         the acting player's result for the round
+
+Every chunk also holds the deck seed, so each round can be dealt again with decks.py.
+'''
+import numpy as np
+import os
+
+from config import *
+from cards import encode_cards
+from events import Observer
+
+# actions are matched by class name, like the engine's ENCODE, so this module need not import the engine
+ACTIONS = ('FoldAction', 'CallAction', 'CheckAction', 'RaiseAction')
+# column name: (dtype, shape of one row)
+COLUMNS = {
+    'round': (np.int64, ()),
+    'street': (np.int8, ()),
+    'button': (np.int16, ()),
+    'player': (np.int8, ()),
+    'pips': (np.int32, (2,)),
+    'stacks': (np.int32, (2,)),
+    'hands': (np.int8, (2, 2)),
+    'board': (np.int8, (5,)),
+    'legal': (np.bool_, (len(ACTIONS),)),
+    'raise_bounds': (np.int32, (2,)),
+    'action': (np.int8, ()),
+    'amount': (np.int32, ()),
+    'answered': (np.bool_, ()),
+    'delta': (np.int32, ()),
+}
+# rows of room past a full chunk for the round still being played, grown if a round needs more
+ROUND_ROOM = 256
+CHUNK_FILENAME = 'chunk-{:06d}.npz'
+
+
+class DatasetWriter(Observer):
+    '''
+    Records the decision points of an observed game and saves them in numbered chunks.
+    A new game replaces the chunks already in the directory, and a resumed game keeps those up to its checkpoint.
+    '''
+
+    def __init__(self, directory, chunk_size=DATASET_CHUNK_SIZE):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+        self.chunk_num = 0
+        self.columns = {name: np.zeros((chunk_size + ROUND_ROOM,) + shape, dtype)
+                        for name, (dtype, shape) in COLUMNS.items()}
+        self.row = 0
+        self.round_row = 0
+        self.names = None
+        self.seed = None
+        self.players = None
+        self.round_num = None
+        self.hands = None
+        self.board = None
+
+    def game_start(self, event):
+        self.names = event.names
+        self.seed = event.seed
+        if event.resumed is not None:
+            self.chunk_num = event.resumed.get(('dataset', self.directory), 0)
+        self.remove_chunks()
+
+    def round_start(self, event):
+        self.round_num = event.round_num
+        self.players = [self.names.index(name) for name in event.names]
+
+    def deal(self, event):
+        self.hands = [encode_cards(hand) for hand in event.hands]
+        self.board = [-1] * 5
+
+    def street(self, event):
+        self.board[:len(event.board)] = encode_cards(event.board)
+
+    def action(self, event):
+        if self.row == len(self.columns['round']):
+            self.grow()
+        round_state = event.round_state
+        legal_actions = {action_type.__name__ for action_type in round_state.legal_actions()}
+        action_name = type(event.action).__name__
+        row = self.row
+        columns = self.columns
+        columns['round'][row] = self.round_num
+        columns['street'][row] = round_state.street
+        columns['button'][row] = round_state.button
+        columns['player'][row] = self.players[round_state.button % 2]
+        columns['pips'][row] = round_state.pips
+        columns['stacks'][row] = round_state.stacks
+        columns['hands'][row] = self.hands
+        columns['board'][row] = self.board
+        columns['legal'][row] = [name in legal_actions for name in ACTIONS]
+        columns['raise_bounds'][row] = round_state.raise_bounds() if 'RaiseAction' in legal_actions else (0, 0)
+        columns['action'][row] = ACTIONS.index(action_name)
+        columns['amount'][row] = event.action.amount if action_name == 'RaiseAction' else 0
+        columns['answered'][row] = event.answered
+        self.row += 1
+
+    def delta(self, event):
+        rounds = slice(self.round_row, self.row)
+        self.columns['delta'][rounds] = np.array(event.deltas)[self.columns['button'][rounds] % 2]
+        while self.row >= self.chunk_size:
+            self.write_chunk(self.chunk_size)
+        self.round_row = self.row
+
+    def game_end(self, event):
+        if self.row > 0:
+            self.write_chunk(self.row)
+        print('Writing', self.directory)
+
+    def checkpoint(self, event):
+        # checkpoints come between rounds, so every row held is complete
+        if self.row > 0:
+            self.write_chunk(self.row)
+            self.round_row = 0
+        event.saved['dataset', self.directory] = self.chunk_num
+
+    def remove_chunks(self):
+        '''
+        Deletes the chunks from chunk_num on, left by an earlier game or written after the checkpoint being resumed.
+        '''
+        chunk_num = self.chunk_num
+        while os.path.exists(os.path.join(self.directory, CHUNK_FILENAME.format(chunk_num))):
+            os.remove(os.path.join(self.directory, CHUNK_FILENAME.format(chunk_num)))
+            chunk_num += 1
+
+    def grow(self):
+        '''
+        Makes room for ROUND_ROOM more rows, for a round that outgrew the room past a full chunk.
+        '''
+        for name, column in self.columns.items():
+            self.columns[name] = np.concatenate([column, np.zeros_like(column[:ROUND_ROOM])])
+
+    def write_chunk(self, num_rows):
+        '''
+        Saves the first num_rows rows as the next chunk and moves any rows after them to the front.
+        '''
+        filename = os.path.join(self.directory, CHUNK_FILENAME.format(self.chunk_num))
+        temporary_filename = filename + '.tmp'
+        with open(temporary_filename, 'wb') as chunk_file:
+            np.savez(chunk_file, names=np.array(self.names), seed=np.array(str(self.seed)),
+                     **{name: column[:num_rows] for name, column in self.columns.items()})
+        os.replace(temporary_filename, filename)
+        self.chunk_num += 1
+        remaining = self.row - num_rows
+        for column in self.columns.values():
+            column[:remaining] = column[num_rows:self.row]
+        self.row = remaining
+
+
+def load_dataset(directory):
+    '''
+    Returns every chunk in a directory joined into one dict of arrays, with the player names and seed of the first chunk.
+    '''
+    chunks = []
+    chunk_num = 0
+    while os.path.exists(os.path.join(directory, CHUNK_FILENAME.format(chunk_num))):
+        with np.load(os.path.join(directory, CHUNK_FILENAME.format(chunk_num))) as chunk:
+            chunks.append({name: chunk[name] for name in chunk.files})
+        chunk_num += 1
+    if not chunks:
+        return {}
+    dataset = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in COLUMNS}
+    dataset['names'] = chunks[0]['names']
+    dataset['seed'] = int(chunks[0]['seed'])
+    return dataset
+
@@ -0,0 +1,59 @@
+'''
+Seeded decks for the engines, shuffled in blocks of NumPy permutations.
+
+The deck for round n depends only on the seed and n. Rounds are grouped into blocks of
+DECK_BLOCK_SIZE, and each block is shuffled by its own Generator, spawned from the seed's
+SeedSequence with the block number as its spawn key. Any round can be replayed without dealing
+the ones before it, and shards of a match deal exactly the decks the whole match would.
+'''
+import numpy as np
+
+from config import *
+from cards import EVAL7_CARDS
+
+# cards 0-1 go to seat 0, cards 2-3 to seat 1 and cards 4-8 are the board
+CARDS_PER_ROUND = 9
+
+
+class DeckProvider():
+    '''
+    Deals the numbered decks of one seed, keeping the last block it shuffled.
+    '''
+
+    def __init__(self, seed=None, block_size=DECK_BLOCK_SIZE):
+        # with no seed, fresh entropy is drawn and kept, so the decks can still be replayed
+        self.seed = np.random.SeedSequence(seed).entropy
+        self.block_size = block_size
+        self.block_num = None
+        self.cached_block = None
+
+    def block(self, block_num):
+        '''
+        Returns the top card codes of every deck in a block, one row per deck.
+        '''
+        if block_num != self.block_num:
+            rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(block_num,)))
+            decks = np.tile(np.arange(52, dtype=np.int8), (self.block_size, 1))
+            self.cached_block = rng.permuted(decks, axis=1)[:, :CARDS_PER_ROUND]
+            self.block_num = block_num
+        return self.cached_block
+
+    def codes(self, deck_nums):
+        '''
+        Returns the top card codes of each numbered deck as an array, one row per deck.
+        '''
+        deck_nums = np.asarray(deck_nums)
+        codes = np.empty((len(deck_nums), CARDS_PER_ROUND), np.int8)
+        block_nums, rows = np.divmod(deck_nums, self.block_size)
+        for block_num in np.unique(block_nums):
+            in_block = block_nums == block_num
+            codes[in_block] = self.block(int(block_num))[rows[in_block]]
+        return codes
+
+    def deal(self, deck_num):
+        '''
+        Returns the two hands and the five board cards of a numbered deck as eval7 cards.
+        '''
+        block_num, row = divmod(deck_num, self.block_size)
+        cards = [EVAL7_CARDS[code] for code in self.block(block_num)[row].tolist()]
+        return [cards[0:2], cards[2:4]], cards[4:]
@@ -0,0 +1,175 @@
+'''
+All-in equity for EV-adjusted results and luck-corrected win rates.
+
+Once a player is all-in and the betting is closed, the round's result depends only on the
+cards still to come. Flop and turn runouts are enumerated one by one. Preflop has 1.7 million
+runouts, which are also counted exactly but in groups: unless a board gives someone a flush,
+the result depends only on the board's ranks, so every board without a flush is scored once per
+multiset of five ranks, weighted by how many live boards share it. Only boards with three or more
+cards of a suit that someone can make a flush with are scored individually, by their flush suit
+ranks and other ranks. Each preflop equity is cached by suit-isomorphic matchup.
+'''
+from itertools import combinations, combinations_with_replacement
+from math import comb
+import numpy as np
+import eval7
+
+from config import *
+from cards import EVAL7_CARDS, CARD_CODES, encode_cards
+from hand_ranks import load_table, MULTISET_KEYS, NUM_MULTISETS, POSITIONS
+
+NUM_RUNOUTS = comb(48, 5)
+# COMBINATIONS[n, k] is C(n, k) for the n live cards of one rank
+COMBINATIONS = np.array([[comb(n, k) for k in range(6)] for n in range(5)], np.int64)
+
+preflop_cache = {}
+
+
+def rank_multisets(size):
+    '''
+    Returns every multiset of size ranks as rows of sorted ranks, in the order of their multiset index,
+    and the count of each rank in every row.
+    '''
+    multisets = list(combinations_with_replacement(range(13), size))
+    ranks = np.array(multisets, np.int32).reshape(len(multisets), size)
+    ranks = ranks[np.argsort(multiset_indices(ranks))]
+    return ranks, (ranks[:, :, None] == np.arange(13)).sum(axis=1)
+
+
+def multiset_indices(ranks):
+    '''
+    Returns the index of each row of ranks among the multisets of its size, as in hand_ranks.multiset_index.
+    '''
+    return MULTISET_KEYS[np.sort(ranks, axis=1) + 13 * POSITIONS[:ranks.shape[1]]].sum(axis=1)
+
+
+def rank_scores(ranks_table, board_ranks, hand_ranks):
+    '''
+    Returns the eval7 score of a hand without a flush on every row of board ranks.
+    '''
+    ranks = np.concatenate([board_ranks, np.broadcast_to(hand_ranks, (len(board_ranks), 2))], axis=1)
+    return ranks_table[multiset_indices(ranks)]
+
+
+# every board's ranks, and the ranks of the 0, 1 or 2 cards off the suit of a board with 5, 4 or 3 suited cards
+BOARD_RANKS, BOARD_COUNTS = rank_multisets(5)
+OFF_SUIT_RANKS = [rank_multisets(size) for size in range(3)]
+
+
+def showdown_delta(board, hands, contributions):
+    '''
+    Returns player 0's result at showdown, matching RoundState.showdown.
+    '''
+    score0 = eval7.evaluate(board + hands[0])
+    score1 = eval7.evaluate(board + hands[1])
+    if score0 > score1:
+        return contributions[1]
+    if score0 < score1:
+        return -contributions[0]
+    return (contributions[1] - contributions[0]) // 2
+
+
+def enumerate_ev(board, hands, contributions):
+    '''
+    Returns player 0's exact expected result over every runout of the board.
+    '''
+    dead = {CARD_CODES[str(card)] for card in board + hands[0] + hands[1]}
+    live = [card for code, card in enumerate(EVAL7_CARDS) if code not in dead]
+    total = 0
+    count = 0
+    for runout in combinations(live, 5 - len(board)):
+        total += showdown_delta(board + list(runout), hands, contributions)
+        count += 1
+    return total / count
+
+
+def canonical_matchup(hands):
+    '''
+    Returns a key shared by preflop matchups that differ only by a relabeling of suits.
+    '''
+    suits = {}
+    key = []
+    for hand in hands:
+        for card in sorted(hand, key=lambda card: (-card.rank, card.suit)):
+            key.append((card.rank, suits.setdefault(card.suit, len(suits))))
+    return tuple(key)
+
+
+def exact_preflop_equity(hands):
+    '''
+    Returns player 0's exact preflop equity, a win counting 1 and a split 1/2.
+    '''
+    ranks_table = load_table()
+    codes = np.array([encode_cards(hand) for hand in hands])
+    ranks = codes >> 2
+    suits = codes & 3
+    live = np.ones((13, 4), np.int64)
+    live[ranks.ravel(), suits.ravel()] = 0
+    # how many live boards have each multiset of ranks, less those with a flush, which are scored below
+    weights = COMBINATIONS[live.sum(axis=1), BOARD_COUNTS].prod(axis=1)
+    wins = 0
+    ties = 0
+    for suit in range(4):
+        suited = (suits == suit).sum(axis=1)
+        suited_masks = [sum(1 << int(rank) for rank in ranks[seat][suits[seat] == suit]) for seat in range(2)]
+        off_suit = live.sum(axis=1) - live[:, suit]
+        # only one suit can have three or more of the five board cards
+        for num_suited in range(5 - suited.max(), 6):
+            flush_ranks = np.array(list(combinations(np.flatnonzero(live[:, suit]), num_suited)), np.int32)
+            if len(flush_ranks) == 0:
+                continue
+            other_ranks, other_counts = OFF_SUIT_RANKS[5 - num_suited]
+            other_weights = COMBINATIONS[off_suit, other_counts].prod(axis=1)
+            other_ranks = other_ranks[other_weights > 0]
+            other_weights = other_weights[other_weights > 0]
+            board_ranks = np.concatenate([np.repeat(flush_ranks, len(other_ranks), axis=0),
+                                          np.tile(other_ranks, (len(flush_ranks), 1))], axis=1)
+            board_weights = np.tile(other_weights, len(flush_ranks))
+            weights -= np.bincount(multiset_indices(board_ranks), board_weights, len(weights)).astype(np.int64)
+            flush_masks = (1 << flush_ranks).sum(axis=1)
+            scores = []
+            for seat in range(2):
+                if num_suited + suited[seat] >= 5:
+                    flush_scores = ranks_table[NUM_MULTISETS + (flush_masks | suited_masks[seat])]
+                    scores.append(np.repeat(flush_scores, len(other_ranks)))
+                else:
+                    scores.append(rank_scores(ranks_table, board_ranks, ranks[seat]))
+            wins += board_weights[scores[0] > scores[1]].sum()
+            ties += board_weights[scores[0] == scores[1]].sum()
+    scores = [rank_scores(ranks_table, BOARD_RANKS, ranks[seat]) for seat in range(2)]
+    wins += weights[scores[0] > scores[1]].sum()
+    ties += weights[scores[0] == scores[1]].sum()
+    return float(wins + ties / 2) / NUM_RUNOUTS
+
+
+def preflop_equity(hands):
+    '''
+    Returns player 0's exact preflop equity, cached by suit-isomorphic matchup.
+    '''
+    key = canonical_matchup(hands)
+    equity = preflop_cache.get(key)
+    if equity is None:
+        equity = exact_preflop_equity(hands)
+        preflop_cache[key] = equity
+    return equity
+
+
+def equity(board, hands):
+    '''
+    Returns player 0's equity with the given board showing, a win counting 1 and a split 1/2.
+    '''
+    if len(board) == 0:
+        return preflop_equity(hands)
+    # with a pot of one chip from each player, the expected result is 2 * equity - 1
+    return (enumerate_ev(list(board), hands, [1, 1]) + 1) / 2
+
+
+def all_in_ev(board, hands, contributions):
+    '''
+    Returns player 0's expected result once the betting is closed with the given board showing.
+    '''
+    if len(board) == 0:
+        # contributions are equal whenever the betting closes, since both stacks start equal
+        equity = preflop_equity(hands)
+        return equity * contributions[1] - (1 - equity) * contributions[0]
+    return enumerate_ev(list(board), hands, contributions)
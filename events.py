@@ -0,0 +1,76 @@
+'''
+Events a Game passes to its observers as the match is played, in the order the game log is written.
+
+Each event is a small namedtuple. A game with no observers never builds one, so observing costs
+nothing unless it is used. Seats follow the last RoundStart: names[0] posts the small blind and
+hands, contributions and deltas are listed in seat order. An Action carries the RoundState it was
+taken in, and whether the pokerbot answered it or the engine played it instead: a forced check of
+an all-in, or the check or fold that replaces a late, illegal or misformatted answer. A BotError
+holds the log line explaining such a replacement, AllInEV the expected deltas of an all-in with
+EV_ADJUST, and GameEnd the summary lines logged after the final bankrolls.
+
+Observers that write files can resume with the game. When the game saves a checkpoint after a
+round, a Checkpoint event carries a dict that each such observer adds where it got to, under a key
+of its own, and the game saves the dict with the checkpoint. A resumed game's GameStart carries that
+dict back as resumed, which is None in a new game, so the observer can carry on from there.
+'''
+from collections import namedtuple
+
+GameStart = namedtuple('GameStart', ['names', 'seed', 'resumed'])
+RoundStart = namedtuple('RoundStart', ['round_num', 'names', 'bankrolls'])
+Deal = namedtuple('Deal', ['hands'])
+Action = namedtuple('Action', ['name', 'action', 'round_state', 'answered'])
+Street = namedtuple('Street', ['street', 'board', 'contributions'])
+Showdown = namedtuple('Showdown', ['hands'])
+Delta = namedtuple('Delta', ['deltas'])
+AllInEV = namedtuple('AllInEV', ['deltas'])
+BotError = namedtuple('BotError', ['message'])
+GameEnd = namedtuple('GameEnd', ['names', 'bankrolls', 'summary'])
+Checkpoint = namedtuple('Checkpoint', ['round_num', 'saved'])
+
+HANDLERS = {GameStart: 'game_start', RoundStart: 'round_start', Deal: 'deal', Action: 'action', Street: 'street',
+            Showdown: 'showdown', Delta: 'delta', AllInEV: 'all_in_ev', BotError: 'bot_error', GameEnd: 'game_end',
+            Checkpoint: 'checkpoint'}
+
+
+class Observer():
+    '''
+    A base for observers that handle each kind of event in a method of the same name, which does nothing by default.
+    Any callable that takes an event can observe a game, see Game.add_observer.
+    '''
+
+    def __call__(self, event):
+        getattr(self, HANDLERS[type(event)])(event)
+
+    def game_start(self, event):
+        pass
+
+    def round_start(self, event):
+        pass
+
+    def deal(self, event):
+        pass
+
+    def action(self, event):
+        pass
+
+    def street(self, event):
+        pass
+
+    def showdown(self, event):
+        pass
+
+    def delta(self, event):
+        pass
+
+    def all_in_ev(self, event):
+        pass
+
+    def bot_error(self, event):
+        pass
+
+    def game_end(self, event):
+        pass
+
+    def checkpoint(self, event):
+        pass
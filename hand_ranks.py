@@ -0,0 +1,98 @@
+'''
+A precomputed 7-card hand-rank table, memory-mapped read-only so every process shares one copy.
+
+A hand with five or more cards of one suit is best played as a flush, since its other two cards
+cannot make a full house or quads, so its rank depends only on which ranks that suit holds: one of
+8192 13-bit masks. Any other hand's rank depends only on its multiset of ranks, indexed by its
+position among the C(19, 7) = 50388 multisets of seven ranks. Both parts hold eval7.evaluate
+scores, so lookups compare exactly like eval7. The table is built with eval7 the first time it is
+needed and saved next to this file.
+'''
+from itertools import combinations_with_replacement
+from math import comb
+import numpy as np
+import eval7
+import os
+
+from cards import EVAL7_CARDS
+
+TABLE_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hand_ranks.npy')
+NUM_MULTISETS = comb(19, 7)
+# sorted ranks r_0 <= ... <= r_6 have index sum(C(r_i + i, i + 1)), and MULTISET_KEYS[13 * i + r] is C(r + i, i + 1)
+MULTISET_KEYS = np.array([comb(rank + position, position + 1) for position in range(7) for rank in range(13)], np.int32)
+POSITIONS = np.arange(7)
+KEYS = MULTISET_KEYS.tolist()
+
+table = None
+
+
+def multiset_index(ranks):
+    '''
+    Returns the index of seven sorted ranks among all multisets of seven ranks.
+    '''
+    return sum(KEYS[13 * position + rank] for position, rank in enumerate(ranks))
+
+
+def build_table():
+    '''
+    Scores every rank multiset without a flush and every flush mask with eval7.
+    '''
+    ranks_table = np.zeros(NUM_MULTISETS + (1 << 13), np.uint32)
+    for ranks in combinations_with_replacement(range(13), 7):
+        if max(ranks.count(rank) for rank in ranks) > 4:
+            continue
+        # repeated ranks are consecutive, so cycling through the suits never repeats a card or makes a flush
+        cards = [EVAL7_CARDS[4 * rank + position % 4] for position, rank in enumerate(ranks)]
+        ranks_table[multiset_index(ranks)] = eval7.evaluate(cards)
+    for mask in range(1 << 13):
+        if 5 <= mask.bit_count() <= 7:
+            cards = [EVAL7_CARDS[4 * rank + 3] for rank in range(13) if mask >> rank & 1]
+            ranks_table[NUM_MULTISETS + mask] = eval7.evaluate(cards)
+    return ranks_table
+
+
+def load_table(filename=TABLE_FILENAME):
+    '''
+    Memory-maps the table read-only, building and saving it first if the file does not exist yet.
+    '''
+    global table
+    if table is None:
+        if not os.path.exists(filename):
+            # several processes may build it at once, and each replaces the file in one step
+            temporary_filename = '{}.{}.tmp'.format(filename, os.getpid())
+            with open(temporary_filename, 'wb') as table_file:
+                np.save(table_file, build_table())
+            os.replace(temporary_filename, filename)
+        # a plain array over the mapped pages skips np.memmap's slower indexing
+        table = np.asarray(np.load(filename, mmap_mode='r'))
+    return table
+
+
+def hand_rank(codes):
+    '''
+    Returns the eval7 score of seven cards given as integer codes from cards.py.
+    '''
+    ranks_table = load_table()
+    masks = [0, 0, 0, 0]
+    for code in codes:
+        masks[code & 3] |= 1 << (code >> 2)
+    for mask in masks:
+        if mask.bit_count() >= 5:
+            return int(ranks_table[NUM_MULTISETS + mask])
+    return int(ranks_table[multiset_index(sorted(code >> 2 for code in codes))])
+
+
+def hand_ranks(codes):
+    '''
+    Returns the eval7 scores of an array of hands with one row of seven card codes each.
+    '''
+    ranks_table = load_table()
+    codes = np.asarray(codes, np.int32)
+    ranks = codes >> 2
+    suits = codes & 3
+    # one nibble counts each suit, and adding 3 carries a count of 5 to 7 into the nibble's top bit
+    flush_bits = ((1 << 4 * suits).sum(axis=1) + 0x3333) & 0x8888
+    flush_suit = (flush_bits >= 0x80).astype(np.int32) + (flush_bits >= 0x800) + (flush_bits >= 0x8000)
+    flush_mask = np.where(suits == flush_suit[:, None], 1 << ranks, 0).sum(axis=1)
+    index = MULTISET_KEYS[np.sort(ranks, axis=1) + 13 * POSITIONS].sum(axis=1)
+    return ranks_table[np.where(flush_bits != 0, NUM_MULTISETS + flush_mask, index)]
@@ -0,0 +1,239 @@
+'''
+Plays one match with several rounds dealt at once, each at its own table, over the bots' usual connections.
+
+Every pokerbot gets one message covering all the tables waiting on it and answers them together,
+so socket and interpreter overhead is paid per batch instead of per decision, and both pokerbots
+think at the same time. Rounds are dealt from the same seeded decks as test_engine.py and logged
+in order, so the game log reads like a sequential game's. Pokerbots that cannot play several
+tables, and in-process ones, play one round at a time.
+'''
+import argparse
+import socket
+import time
+
+from config import *
+import test_engine
+from test_engine import Game, TerminalState, CheckAction, FoldAction
+from protocol import MULTI_TABLE
+from transports import wait_readable
+
+
+class Table():
+    '''
+    One round in progress, with its own log lines and messages for the players in its seats.
+    '''
+
+    def __init__(self, table_id, round_num, seats, round_state):
+        self.id = table_id
+        self.round_num = round_num
+        self.seats = seats
+        self.round_state = round_state
+        self.lines = []
+        self.events = []
+        self.player_messages = [[], []]
+        self.ev_delta = None
+        self.over = False
+
+
+class MultiTableGame(Game):
+    '''
+    A Game that keeps up to num_tables rounds in progress at once.
+    '''
+
+    def __init__(self, num_rounds=NUM_ROUNDS, seed=GAME_SEED, log_filename=GAME_LOG_FILENAME, num_tables=NUM_TABLES,
+                 dataset_directory=DATASET_DIRECTORY):
+        super().__init__(num_rounds, seed, log_filename, dataset_directory=dataset_directory)
+        self.num_tables = num_tables
+        self.table_events = None
+
+    def play_rounds(self, players):
+        '''
+        Plays the rounds num_tables at a time, yielding each round number once it and every earlier round are logged.
+        '''
+        if self.num_tables < 2 or not all(player.features & MULTI_TABLE for player in players):
+            yield from super().play_rounds(players)
+            return
+        game_log = self.log
+        last_round = self.first_round + self.num_rounds - 1
+        next_deal = next_log = self.next_round
+        tables = {}
+        finished = {}
+        while next_log <= last_round:
+            for table_id in range(self.num_tables):
+                if table_id not in tables and next_deal <= last_round:
+                    tables[table_id] = Table(table_id, next_deal, self.seating(players, next_deal), self.deal(next_deal))
+                    next_deal += 1
+            for table in tables.values():
+                self.advance(table)
+            self.query_tables(players, sorted(tables.values(), key=lambda table: table.id))
+            for table in [table for table in tables.values() if table.over]:
+                finished[table.round_num] = tables.pop(table.id)
+            self.log = game_log
+            self.table_events = None
+            while next_log in finished:
+                table = finished.pop(next_log)
+                self.log_round_start(table.seats, next_log)
+                for line in table.lines:
+                    self.log.append(line)
+                for event in table.events:
+                    self.emit(event)
+                self.settle(table.seats, table.round_state, table.ev_delta)
+                yield next_log
+                next_log += 1
+
+    def use_table(self, table):
+        '''
+        Points the logging methods at a table's lines and messages.
+        '''
+        self.log = table.lines
+        self.table_events = table.events
+        self.player_messages = table.player_messages
+
+    def advance(self, table):
+        '''
+        Plays a table's forced checks until it waits on a pokerbot, or logs the end of its round.
+        '''
+        self.use_table(table)
+        round_state = table.round_state
+        while not isinstance(round_state, TerminalState):
+            forced = round_state.legal_actions() == {CheckAction}
+            if EV_ADJUST and forced and table.ev_delta is None:
+                table.ev_delta = self.log_all_in_ev(table.seats, round_state)
+            self.log_round_state(table.seats, round_state)
+            if not (FAST_FORWARD_ALL_IN and forced):
+                table.round_state = round_state
+                return
+            player = table.seats[round_state.button % 2]
+            self.log_action(player.name, round_state, CheckAction(), False)
+            round_state = round_state.proceed(CheckAction())
+        self.log_terminal_state(table.seats, round_state)
+        table.round_state = round_state
+        table.over = True
+
+    def emit(self, event):
+        '''
+        Holds a table's events until its round is logged, so observers see the rounds in order.
+        '''
+        if self.table_events is None:
+            super().emit(event)
+        else:
+            self.table_events.append(event)
+
+    def act(self, table, action, answered=False):
+        '''
+        Logs the active player's action at a table and moves its round on.
+        answered tells whether the pokerbot chose it, rather than the engine checking or folding for it.
+        '''
+        self.use_table(table)
+        round_state = table.round_state
+        player = table.seats[round_state.button % 2]
+        self.log_action(player.name, round_state, action, answered)
+        table.round_state = round_state.proceed(action)
+
+    def query_tables(self, players, tables):
+        '''
+        Sends each pokerbot one message with its turns and finished rounds at every table,
+        waits for both to answer their turns, and plays the answers.
+        '''
+        # every table's turn is settled before any answer is played
+        waiting = [[table for table in tables if not table.over and table.seats[table.round_state.button % 2] is player]
+                   for player in players]
+        sent = []
+        for player, turns in zip(players, waiting):
+            updates = [table for table in tables if table.over or table in turns]
+            if not (player.connected() and player.game_clock > 0.):
+                for table in turns:
+                    self.act(table, CheckAction() if CheckAction in table.round_state.legal_actions() else FoldAction())
+                continue
+            if not updates:
+                continue
+            clauses = ['T{:.3f}'.format(player.game_clock)]
+            for table in updates:
+                player_message = table.player_messages[table.seats.index(player)]
+                clauses.append('I' + str(table.id))
+                clauses.extend(player_message[1:])
+                del player_message[1:]
+            try:
+                player.send(player.encode_message(clauses))
+            except OSError:
+                self.drop(player, turns, ' disconnected')
+                continue
+            if turns:
+                sent.append((player, turns, time.perf_counter()))
+        # each answer is read as it arrives, so a slow pokerbot's wait is not charged to the other
+        results = {}
+        pending = list(sent)
+        while pending:
+            deadlines = [start_time + player.time_limit() for player, _, start_time in pending]
+            ready = wait_readable([player.socketfile for player, _, _ in pending], min(deadlines))
+            now = time.perf_counter()
+            for answer, deadline in zip(list(pending), deadlines):
+                if answer[0].socketfile in ready or now >= deadline:
+                    self.receive(*answer, results)
+                    pending.remove(answer)
+        for player, turns, _ in sent:
+            clauses, think_time = results[player]
+            if isinstance(clauses, socket.timeout):
+                self.drop(player, turns, ' ran out of time')
+                continue
+            if isinstance(clauses, OSError):
+                self.drop(player, turns, ' disconnected')
+                continue
+            if isinstance(clauses, ValueError):
+                clauses = {}  # every turn is logged as misformatted
+            if ENFORCE_GAME_CLOCK:
+                player.game_clock -= think_time
+            if player.game_clock <= 0.:
+                self.drop(player, turns, ' ran out of time')
+                continue
+            # one answer covers every waiting table, so each is charged its share and the total adds up
+            table_time = think_time / len(turns)
+            for table in turns:
+                clause = clauses.get(table.id, '')
+                player.record_latency(table.round_state, clause, table_time)
+                self.use_table(table)
+                self.act(table, player.parse_action(table.round_state, clause, self.errors), player.answered)
+
+    def receive(self, player, turns, start_time, results):
+        '''
+        Reads a pokerbot's answers into results with how long they took, or the error that stopped them.
+        '''
+        try:
+            clauses = player.receive_table_actions(len(turns), start_time + player.time_limit())
+        except (OSError, ValueError) as error:
+            clauses = error
+        results[player] = (clauses, time.perf_counter() - start_time)
+
+    def drop(self, player, turns, reason):
+        '''
+        Stops querying a pokerbot that ran out of time or disconnected, checking or folding its turns.
+        '''
+        error_message = player.name + reason
+        print(error_message)
+        player.game_clock = 0.
+        for table in turns:
+            self.use_table(table)
+            self.log_error(error_message)
+            self.act(table, CheckAction() if CheckAction in table.round_state.legal_actions() else FoldAction())
+
+
+def parse_args():
+    '''
+    Parses arguments that override the multi-table settings in config.py.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 multitable_engine.py')
+    parser.add_argument('--rounds', type=int, default=NUM_ROUNDS, help='Rounds in the whole match')
+    parser.add_argument('--tables', type=int, default=NUM_TABLES, help='Rounds to deal at once, at most 256')
+    parser.add_argument('--seed', type=int, default=GAME_SEED, help='Seed for the decks')
+    parser.add_argument('--resume', action='store_true', help='Continue the game saved in CHECKPOINT_FILENAME')
+    parser.add_argument('--dataset', type=str, default=DATASET_DIRECTORY, help='Directory to save every decision to')
+    args = parser.parse_args()
+    if not 1 <= args.tables <= 256:
+        parser.error('--tables must be between 1 and 256')
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    test_engine.NUM_TABLES = args.tables
+    MultiTableGame(args.rounds, args.seed, num_tables=args.tables, dataset_directory=args.dataset).run(resume=args.resume)
@@ -1,13 +1,65 @@
-'''
+"""
 The infrastructure for interacting with the engine.
-'''
+"""
 import argparse
+import struct
 import socket
 from .actions import FoldAction, CallAction, CheckAction, RaiseAction
 from .states import GameState, TerminalState, RoundState
 from .states import STARTING_STACK, BIG_BLIND, SMALL_BLIND
 from .bot import Bot
 
+# optional protocol features, which the engine offers in a 'V<mask>' handshake
+BINARY_FRAMES = 1
+UNACKED_ROUND_OVER = 2
+MULTI_TABLE = 4
+SUPPORTED_FEATURES = BINARY_FRAMES | UNACKED_ROUND_OVER | MULTI_TABLE
+
+# binary frames encode each card as 4 * rank + suit
+CARD_STRINGS = [rank + suit for rank in '23456789TJQKA' for suit in 'cdhs']
+FRAME_HEADER = struct.Struct('<H')
+CLOCK = struct.Struct('<cI')
+AMOUNT = struct.Struct('<ch')
+ACTION_RECORD = struct.Struct('<cH')
+
+def decode_frame(payload):
+    '''
+    Converts the records in one binary frame back into text clauses.
+    '''
+    packet = []
+    offset = 0
+    while offset < len(payload):
+        code = chr(payload[offset])
+        if code == 'T':
+            clock = CLOCK.unpack_from(payload, offset)[1]
+            packet.append('T{:.3f}'.format(clock / 1000))
+            offset += CLOCK.size
+        elif code == 'R' or code == 'D':
+            packet.append(code + str(AMOUNT.unpack_from(payload, offset)[1]))
+            offset += AMOUNT.size
+        elif code == 'P' or code == 'I':
+            packet.append(code + str(payload[offset + 1]))
+            offset += 2
+        elif code == 'H' or code == 'B' or code == 'O':
+            end = offset + 2 + payload[offset + 1]
+            packet.append(code + ','.join([CARD_STRINGS[card] for card in payload[offset + 2:end]]))
+            offset = end
+        else:
+            packet.append(code)
+            offset += 1
+    return packet
+
+def split_tables(packet):
+    '''
+    Splits a multi-table message into (table, clauses) pairs, the first for the clauses before any I<table>.
+    '''
+    tables = [(None, [])]
+    for clause in packet:
+        if clause[0] == 'I':
+            tables.append((int(clause[1:]), []))
+        else:
+            tables[-1][1].append(clause)
+    return tables
 
 class Runner():
     '''
@@ -17,20 +69,33 @@ class Runner():
     def __init__(self, pokerbot, socketfile):
         self.pokerbot = pokerbot
         self.socketfile = socketfile
+        self.game_state = GameState(0, 0., 1)
+        self.round_state = None
+        self.active = 0
+        self.round_flag = True
+        self.features = 0
+        self.table = None
+        self.tables = {}
 
     def receive(self):
         '''
         Generator for incoming messages from the engine.
         '''
         while True:
-            packet = self.socketfile.readline().strip().split(' ')
+            if self.features & BINARY_FRAMES:
+                header = self.socketfile.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    break
+                packet = decode_frame(self.socketfile.read(FRAME_HEADER.unpack(header)[0]))
+            else:
+                packet = self.socketfile.readline().decode().strip().split(' ')
             if not packet:
                 break
             yield packet
 
-    def send(self, action):
+    def encode_action(self, action):
         '''
-        Encodes an action and sends it to the engine.
+        Encodes an action as a clause, or as an action record with binary frames.
         '''
         if isinstance(action, FoldAction):
             code = 'F'
@@ -40,100 +105,272 @@ class Runner():
             code = 'K'
         else:  # isinstance(action, RaiseAction)
             code = 'R' + str(action.amount)
-        self.socketfile.write(code + '\n')
+        if self.features & BINARY_FRAMES:
+            amount = action.amount if code[0] == 'R' else 0
+            return ACTION_RECORD.pack(code[0].encode(), amount)
+        return code.encode()
+
+    def send(self, action):
+        '''
+        Encodes an action and sends it to the engine.
+        '''
+        if self.features & BINARY_FRAMES:
+            self.socketfile.write(self.encode_action(action))
+        else:
+            self.socketfile.write(self.encode_action(action) + b'\n')
+        self.socketfile.flush()
+
+    def send_answers(self, answers):
+        '''
+        Sends the actions for several tables to the engine as one message, each after its table.
+        '''
+        if self.features & BINARY_FRAMES:
+            self.socketfile.write(b''.join([bytes((ord('I'), table)) + self.encode_action(action)
+                                            for table, action in answers]))
+        else:
+            self.socketfile.write(b' '.join([b'I%d ' % table + self.encode_action(action)
+                                             for table, action in answers]) + b'\n')
+        self.socketfile.flush()
+
+    def negotiate(self, offered):
+        '''
+        Accepts the offered protocol features this runner supports and tells the engine which.
+        Several tables at once are only accepted if the pokerbot says it can play them.
+        '''
+        self.features = offered & SUPPORTED_FEATURES
+        if not self.pokerbot.multi_table:
+            self.features &= ~MULTI_TABLE
+        self.socketfile.write('V{}\n'.format(self.features).encode())
         self.socketfile.flush()
 
     def run(self):
         '''
         Reconstructs the game tree based on the action history received from the engine.
         '''
-        game_state = GameState(0, 0., 1)
-        round_state = None
-        active = 0
-        round_flag = True
         for packet in self.receive():
-            for clause in packet:
-                if clause[0] == 'T':
-                    game_state = GameState(game_state.bankroll, float(clause[1:]), game_state.round_num)
-                elif clause[0] == 'P':
-                    active = int(float(clause[1:]))
-                elif clause[0] == 'H':
-                    hands = [[], []]
-                    hands[active] = clause[1:].split(',')
-                    pips = [SMALL_BLIND, BIG_BLIND]
-                    stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
-                    round_state = RoundState(0, 0, pips, stacks, hands, [], None)
-                    if round_flag:
-                        self.pokerbot.handle_new_round(game_state, round_state, active)
-                        round_flag = False
-                elif clause[0] == 'F':
-                    # Check if round_state is a RoundState before proceeding
-                    if not isinstance(round_state, TerminalState):
-                        round_state = round_state.proceed(FoldAction())
-                elif clause[0] == 'C':
-                    # Check if round_state is a RoundState before proceeding
-                    if not isinstance(round_state, TerminalState):
-                        round_state = round_state.proceed(CallAction())
-                elif clause[0] == 'K':
-                    # Check if round_state is a RoundState before proceeding
-                    if not isinstance(round_state, TerminalState):
-                        round_state = round_state.proceed(CheckAction())
-                elif clause[0] == 'R':
-                    # Check if round_state is a RoundState before proceeding
-                    if not isinstance(round_state, TerminalState):
-                        round_state = round_state.proceed(RaiseAction(int(float(clause[1:]))))
-                elif clause[0] == 'B':
-                    # Check if round_state is a RoundState before proceeding
-                    if not isinstance(round_state, TerminalState):
-                        round_state = RoundState(round_state.button, round_state.street, round_state.pips, round_state.stacks,
-                                                 round_state.hands, clause[1:].split(','), round_state.previous_state)
-                elif clause[0] == 'O':
-                    # Safely extract previous_state to avoid attribute errors
-                    if isinstance(round_state, TerminalState):
-                        prev_state = round_state.previous_state
-                    else:
-                        prev_state = round_state
-                        
-                    if prev_state is not None:
-                        # Now rebuild history using prev_state
-                        revised_hands = list(prev_state.hands)
-                        revised_hands[1-active] = clause[1:].split(',')
-                        
-                        # Rebuild the round state
-                        round_state = RoundState(prev_state.button, prev_state.street, 
-                                              prev_state.pips, prev_state.stacks,
-                                              revised_hands, prev_state.deck, 
-                                              prev_state.previous_state)
-                        
-                        # Create the terminal state
-                        round_state = TerminalState([0, 0], round_state)
-                elif clause[0] == 'D':
-                    if isinstance(round_state, TerminalState):
-                        delta = int(float(clause[1:]))
-                        deltas = [-delta, -delta]
-                        deltas[active] = delta
-                        round_state = TerminalState(deltas, round_state.previous_state)
-                        game_state = GameState(game_state.bankroll + delta, game_state.game_clock, game_state.round_num)
-                        self.pokerbot.handle_round_over(game_state, round_state, active)
-                        game_state = GameState(game_state.bankroll, game_state.game_clock, game_state.round_num + 1)
-                        round_flag = True
-                elif clause[0] == 'Q':
+            if packet[0].startswith('V'):
+                self.negotiate(int(packet[0][1:]))
+                continue
+            if self.features & MULTI_TABLE and any(clause[0] == 'I' for clause in packet):
+                answers = self.handle_tables(packet)
+                if answers is None:
                     return
-            if round_flag:  # ack the engine
-                self.send(CheckAction())
-            else:
-                # Only get action if round_state is a RoundState
-                if not isinstance(round_state, TerminalState):
-                    try:
-                        active_player = round_state.button % 2
-                        if active == active_player:
-                            action = self.pokerbot.get_action(game_state, round_state, active)
-                            self.send(action)
-                    except Exception as e:
-                        print(f"Error getting action: {e}")
-                        # Default to Check action on error
-                        self.send(CheckAction())
+                if answers:
+                    self.send_answers(answers)
+                continue
+            action = self.handle_packet(packet)
+            if action is None:
+                return
+            if self.round_flag and self.features & UNACKED_ROUND_OVER:
+                # no round is in progress, so the engine is not waiting for an answer
+                continue
+            self.send(action)
+
+    def handle_packet(self, packet):
+        '''
+        Applies one message from the engine to the game tree.
+        Returns the action to send back, or None once the engine says quit.
+        '''
+        if not self.apply_clauses(packet):
+            return None
+        if not self.awaiting_action():
+            # If no round is in progress, we acknowledge the engine
+            return CheckAction()
+        # Ask bot for action
+        return self.pokerbot.get_action(self.game_state, self.round_state, self.active)
+
+    def handle_tables(self, packet):
+        '''
+        Applies one multi-table message, in which each I<table> clause switches to that table's game tree.
+        Returns (table, action) for every table waiting on the pokerbot, decided in one batch,
+        or None once the engine says quit. The ends of rounds are never acknowledged.
+        '''
+        waiting = []
+        for table, clauses in split_tables(packet):
+            if table is not None:
+                self.switch_table(table)
+            if not self.apply_clauses(clauses):
+                return None
+            if table is not None and self.awaiting_action():
+                waiting.append((table, (self.game_state, self.round_state, self.active)))
+        if not waiting:
+            return []
+        actions = self.pokerbot.get_actions([decision for _, decision in waiting])
+        return [(table, action) for (table, _), action in zip(waiting, actions)]
 
+    def switch_table(self, table):
+        '''
+        Puts away the current table's round and brings out another's. The GameState is shared by every table.
+        '''
+        self.tables[self.table] = (self.round_state, self.active, self.round_flag)
+        self.table = table
+        self.round_state, self.active, self.round_flag = self.tables.pop(table, (None, 0, True))
+
+    def apply_clauses(self, packet):
+        '''
+        Applies the clauses of one message to the game tree.
+        Returns False once the engine says quit.
+        '''
+        for clause in packet:
+            if clause[0] == 'T':
+                # T<time> => Update game clock
+                self.game_state = GameState(
+                    bankroll=self.game_state.bankroll,
+                    game_clock=float(clause[1:]),
+                    round_num=self.game_state.round_num
+                )
+
+            elif clause[0] == 'P':
+                # P<seat> => Which player is active?
+                self.active = int(clause[1:])
+
+            elif clause[0] == 'H':
+                # H<cards> => A new round, we get hole cards
+                hands = [[], []]
+                hands[self.active] = clause[1:].split(',')
+                pips = [SMALL_BLIND, BIG_BLIND]
+                stacks = [
+                    STARTING_STACK - SMALL_BLIND,
+                    STARTING_STACK - BIG_BLIND
+                ]
+                # For each new hand, set button=0 (or use another formula if you prefer)
+                self.round_state = RoundState(
+                    button=0,
+                    street=0,
+                    pips=pips,
+                    stacks=stacks,
+                    hands=hands,
+                    deck=[],
+                    previous_state=None
+                )
+
+                if self.round_flag:
+                    self.pokerbot.handle_new_round(self.game_state, self.round_state, self.active)
+                    self.round_flag = False
+
+            elif clause[0] == 'F':
+                # F => Fold
+                if not isinstance(self.round_state, TerminalState):
+                    self.round_state = self.round_state.proceed(FoldAction())
+
+            elif clause[0] == 'C':
+                # C => Call
+                if not isinstance(self.round_state, TerminalState):
+                    self.round_state = self.round_state.proceed(CallAction())
+
+            elif clause[0] == 'K':
+                # K => Check
+                if not isinstance(self.round_state, TerminalState):
+                    self.round_state = self.round_state.proceed(CheckAction())
+
+            elif clause[0] == 'R':
+                # R<amount> => Raise
+                if not isinstance(self.round_state, TerminalState):
+                    amount = int(clause[1:])
+                    self.round_state = self.round_state.proceed(RaiseAction(amount))
+
+            elif clause[0] == 'B':
+                # B<boardcards> => Update board
+                round_state = self.round_state
+                if isinstance(round_state, TerminalState):
+                    round_state = round_state.previous_state
+                self.round_state = RoundState(
+                    round_state.button,
+                    round_state.street,
+                    round_state.pips,
+                    round_state.stacks,
+                    round_state.hands,
+                    clause[1:].split(','),  # new deck / board
+                    round_state.previous_state
+                )
+
+            elif clause[0] == 'O':
+                # O<opponent_cards> => Opponent's revealed cards, backtrack then rebuild
+                round_state = self.round_state
+                if isinstance(round_state, TerminalState):
+                    round_state = round_state.previous_state
+                round_state = round_state.previous_state  # backtrack one step
+                revised_hands = list(round_state.hands)
+                revised_hands[1 - self.active] = clause[1:].split(',')
+                round_state = RoundState(
+                    round_state.button,
+                    round_state.street,
+                    round_state.pips,
+                    round_state.stacks,
+                    revised_hands,
+                    round_state.deck,
+                    round_state.previous_state
+                )
+                self.round_state = TerminalState([0, 0], round_state)
+
+            elif clause[0] == 'D':
+                # D<delta> => Round ended, final delta for the active seat
+                assert isinstance(self.round_state, TerminalState)
+                delta = int(clause[1:])
+                deltas = [-delta, -delta]
+                deltas[self.active] = delta
+                self.round_state = TerminalState(deltas, self.round_state.previous_state)
+                self.game_state = GameState(
+                    bankroll=self.game_state.bankroll + delta,
+                    game_clock=self.game_state.game_clock,
+                    round_num=self.game_state.round_num
+                )
+                self.pokerbot.handle_round_over(self.game_state, self.round_state, self.active)
+                self.game_state = GameState(
+                    bankroll=self.game_state.bankroll,
+                    game_clock=self.game_state.game_clock,
+                    round_num=self.game_state.round_num + 1
+                )
+                self.round_flag = True
+
+            elif clause[0] == 'N':
+                # N => A new game against the same opponent, start over
+                self.game_state = GameState(0, 0., 1)
+                self.round_state = None
+                self.round_flag = True
+                self.tables = {}
+                self.pokerbot.handle_new_game()
+
+            elif clause[0] == 'Q':
+                # Q => Engine says quit
+                return False
+        return True
+
+    def awaiting_action(self):
+        '''
+        Returns whether the engine is waiting on an action in the current round.
+        '''
+        if isinstance(self.round_state, TerminalState):
+            # Round is terminal. Send a dummy action to avoid timeout.
+            self.round_flag = True
+        return not self.round_flag
+
+class PipeFile():
+    '''
+    Joins the read and write pipes inherited from the engine into one binary file.
+    '''
+
+    def __init__(self, read_fd, write_fd):
+        self.reader = open(read_fd, 'rb')
+        self.writer = open(write_fd, 'wb')
+
+    def write(self, data):
+        return self.writer.write(data)
+
+    def flush(self):
+        self.writer.flush()
+
+    def read(self, size):
+        return self.reader.read(size)
+
+    def readline(self):
+        return self.reader.readline()
+
+    def close(self):
+        try:
+            self.writer.close()
+        finally:
+            self.reader.close()
 
 def parse_args():
     '''
@@ -141,8 +378,32 @@ def parse_args():
     '''
     parser = argparse.ArgumentParser(prog='python3 player.py')
     parser.add_argument('--host', type=str, default='localhost', help='Host to connect to, defaults to localhost')
-    parser.add_argument('port', type=int, help='Port on host to connect to')
-    return parser.parse_args()
+    parser.add_argument('port', type=int, nargs='?', help='Port on host to connect to')
+    parser.add_argument('--unix', type=str, metavar='PATH', help='Unix domain socket to connect to instead of a port')
+    parser.add_argument('--pipe', type=int, nargs=2, metavar=('READ_FD', 'WRITE_FD'),
+                        help='Inherited pipe file descriptors to use instead of a socket')
+    args = parser.parse_args()
+    if args.port is None and args.unix is None and args.pipe is None:
+        parser.error('one of port, --unix or --pipe is required')
+    return args
+
+def connect(args):
+    '''
+    Connects to the engine, returning the socket (None for pipes) and a file to talk over.
+    '''
+    if args.pipe is not None:
+        return None, PipeFile(*args.pipe)
+    if args.unix is not None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(args.unix)
+        except OSError:
+            sock.close()
+            raise
+    else:
+        sock = socket.create_connection((args.host, args.port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock, sock.makefile('rwb')
 
 def run_bot(pokerbot, args):
     '''
@@ -150,16 +411,12 @@ def run_bot(pokerbot, args):
     '''
     assert isinstance(pokerbot, Bot)
     try:
-        sock = socket.create_connection((args.host, args.port))
+        sock, socketfile = connect(args)
     except OSError:
-        print('Could not connect to {}:{}'.format(args.host, args.port))
+        print('Could not connect to {}'.format(args.unix or args.pipe or '{}:{}'.format(args.host, args.port)))
         return
-    socketfile = sock.makefile('rw')
     runner = Runner(pokerbot, socketfile)
-    try:
-        runner.run()
-    except Exception as e:
-        print(f"Error in runner: {e}")
-    finally:
-        socketfile.close()
-        sock.close()
\ No newline at end of file
+    runner.run()
+    socketfile.close()
+    if sock is not None:
+        sock.close()
@@ -174,8 +174,28 @@ class Player(Bot):
 
     def get_action(self, game_state, round_state, active):
         """
-        Where the magic happens - your code should implement this function.
         Called any time the engine needs an action from your bot.
+        If deciding fails, for example on an API error, the bot checks, or folds
+        when it cannot check, instead of crashing for the rest of the match.
+
+        Arguments:
+        game_state: the GameState object.
+        round_state: the RoundState object.
+        active: your player's index.
+
+        Returns:
+        Your action.
+        """
+        try:
+            return self.decide_action(game_state, round_state, active)
+        except Exception as e:
+            print(f"Error getting action: {e}")
+            return CheckAction() if CheckAction in round_state.legal_actions() else FoldAction()
+
+    def decide_action(self, game_state, round_state, active):
+        """
+        Where the magic happens - your code should implement this function.
+        Called by get_action any time the engine needs an action from your bot.
 
         Arguments:
         game_state: the GameState object.
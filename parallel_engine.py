@@ -0,0 +1,184 @@
+'''
+Plays one match as shards across a process pool and merges the results.
+Every shard deals its rounds' decks from the match seed, so the shards together deal exactly the match's decks.
+'''
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import tempfile
+import random
+import re
+import os
+
+from config import *
+from test_engine import Game, GameLog, make_player, match_dataset, PAIRED, PSEED, LOG_OPENERS, LOG_EXTENSIONS
+from stats import RunningStats
+from telemetry import write_reports
+
+
+def split_rounds(num_rounds, num_shards):
+    '''
+    Returns (first_round, num_rounds) for each shard, covering rounds 1 to num_rounds in order.
+    In DUPLICATE_MODE, shards never split a pair of mirrored rounds.
+    '''
+    unit = 2 if DUPLICATE_MODE else 1
+    num_units = -(-num_rounds // unit)
+    num_shards = max(1, min(num_shards, num_units))
+    shards = []
+    first_round = 1
+    for shard in range(num_shards):
+        size = unit * (num_units // num_shards + (shard < num_units % num_shards))
+        size = min(size, num_rounds + 1 - first_round)
+        shards.append((first_round, size))
+        first_round += size
+    return shards
+
+
+def run_shard(shard, first_round, num_rounds, seed, directory):
+    '''
+    Plays one shard with its own pair of pokerbots.
+    Returns each player's bankroll, latency histograms and EV-adjusted bankroll, the shard's duplicate pair statistics,
+    and the name of its game log, None if the shard was headless.
+    '''
+    players = [
+        make_player(PLAYER_1_NAME, PLAYER_1_PATH, os.path.join(directory, '{}.{}.txt'.format(PLAYER_1_NAME, shard))),
+        make_player(PLAYER_2_NAME, PLAYER_2_PATH, os.path.join(directory, '{}.{}.txt'.format(PLAYER_2_NAME, shard)))
+    ]
+    # every shard must play all its rounds, so early stopping is off
+    game = Game(num_rounds, seed, os.path.join(directory, 'gamelog.{}'.format(shard)), first_round, None,
+                telemetry_filename=None, checkpoint_filename=None, dataset_directory=match_dataset(shard))
+    game.run(players)
+    return ({player.name: player.bankroll for player in players}, game.pair_stats,
+            {player.name: player.latency for player in players}, {player.name: player.ev_bankroll for player in players},
+            game.log.name)
+
+
+def match_totals(bankrolls, ev_bankrolls, num_rounds):
+    '''
+    Adds up the shards' results. Returns each player's bankroll and the final and EV-adjusted status lines.
+    '''
+    names = [PLAYER_1_NAME, PLAYER_2_NAME]
+    totals = {name: sum(shard_bankrolls[name] for shard_bankrolls in bankrolls) for name in names}
+    # seats alternate every round, so the final status follows the last seating
+    final_names = names if num_rounds % 2 == 0 else names[::-1]
+    final_status = 'Final' + ''.join(', {} ({})'.format(name, totals[name]) for name in final_names)
+    ev_status = 'EV-adjusted' + ''.join(', {} ({:.1f})'.format(name, sum(shard_bankrolls[name] for shard_bankrolls in ev_bankrolls))
+                                        for name in final_names)
+    return totals, final_status, ev_status
+
+
+def merge_game_logs(directory, num_shards, bankrolls, pair_stats, num_rounds, ev_bankrolls, seed):
+    '''
+    Streams the shard game logs into one, shifting every status line by the earlier shards' bankrolls.
+    Returns each player's bankroll and the EV-adjusted status line.
+    '''
+    names = [PLAYER_1_NAME, PLAYER_2_NAME]
+    offsets = dict.fromkeys(names, 0)
+    patterns = {name: re.compile(', ' + re.escape(name) + r' \((-?\d+)\)') for name in names}
+    log = GameLog(GAME_LOG_FILENAME)
+    log.append('FIU Pokerbots - ' + PLAYER_1_NAME + ' vs ' + PLAYER_2_NAME)
+    log.append(PSEED(seed))
+    for shard in range(num_shards):
+        shard_name = os.path.join(directory, 'gamelog.{}'.format(shard)) + LOG_EXTENSIONS[GAME_LOG_COMPRESSION]
+        with LOG_OPENERS[GAME_LOG_COMPRESSION](shard_name, 'rt') as shard_file:
+            next(shard_file)  # the shard's own header and deck seed, the match's seed
+            next(shard_file)
+            for line in shard_file:
+                line = line.rstrip('\n')
+                if line.startswith('Final'):  # the shard's own final status
+                    break
+                if line.startswith('Round #'):
+                    for player_name, pattern in patterns.items():
+                        offset = offsets[player_name]
+                        line = pattern.sub(lambda match: ', {} ({})'.format(player_name, int(match.group(1)) + offset), line)
+                    log.append('')
+                if line:
+                    log.append(line)
+            log.flush()
+        for player_name in names:
+            offsets[player_name] += bankrolls[shard][player_name]
+    totals, final_status, ev_status = match_totals(bankrolls, ev_bankrolls, num_rounds)
+    log.append('')
+    log.append(final_status)
+    if EV_ADJUST:
+        log.append(ev_status)
+    if DUPLICATE_MODE:
+        log.append(PAIRED(names, pair_stats))
+    print('Writing', log.name)
+    log.close()
+    return totals, ev_status
+
+
+def merge_player_logs(directory, num_shards):
+    '''
+    Concatenates the shard player logs, stopping at PLAYER_LOG_SIZE_LIMIT.
+    '''
+    for name in [PLAYER_1_NAME, PLAYER_2_NAME]:
+        with open(name + '.txt', 'wb') as log_file:
+            bytes_written = 0
+            for shard in range(num_shards):
+                if bytes_written >= PLAYER_LOG_SIZE_LIMIT:
+                    break
+                bytes_written += log_file.write('--- shard {} ---\n'.format(shard).encode())
+                with open(os.path.join(directory, '{}.{}.txt'.format(name, shard)), 'rb') as shard_file:
+                    output = shard_file.read(max(0, PLAYER_LOG_SIZE_LIMIT - bytes_written))
+                bytes_written += log_file.write(output)
+
+
+def run(num_rounds=NUM_ROUNDS, num_workers=NUM_WORKERS, num_shards=NUM_SHARDS, seed=GAME_SEED):
+    '''
+    Runs one match split into shards and writes the merged game and player logs.
+    '''
+    num_workers = num_workers or os.cpu_count()
+    num_shards = num_shards or num_workers
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    print('Running', num_rounds, 'rounds on', num_workers, 'workers with seed', seed)
+    shards = split_rounds(num_rounds, num_shards)
+    with tempfile.TemporaryDirectory() as directory:
+        with ProcessPoolExecutor(num_workers) as executor:
+            futures = [executor.submit(run_shard, shard, first_round, size, seed, directory)
+                       for shard, (first_round, size) in enumerate(shards)]
+            results = [future.result() for future in futures]
+        bankrolls = [shard_bankrolls for shard_bankrolls, _, _, _, _ in results]
+        ev_bankrolls = [shard_ev_bankrolls for _, _, _, shard_ev_bankrolls, _ in results]
+        pair_stats = RunningStats()
+        latencies = {PLAYER_1_NAME: {}, PLAYER_2_NAME: {}}
+        for _, shard_stats, shard_latencies, _, _ in results:
+            pair_stats.merge(shard_stats)
+            for name, histograms in shard_latencies.items():
+                for key, histogram in histograms.items():
+                    if key in latencies[name]:
+                        latencies[name][key].merge(histogram)
+                    else:
+                        latencies[name][key] = histogram
+        if any(log_name is None for _, _, _, _, log_name in results):
+            # headless shards keep no text game log, so there is none to merge
+            totals, _, ev_status = match_totals(bankrolls, ev_bankrolls, num_rounds)
+        else:
+            totals, ev_status = merge_game_logs(directory, len(shards), bankrolls, pair_stats, num_rounds, ev_bankrolls, seed)
+        merge_player_logs(directory, len(shards))
+    if TELEMETRY_FILENAME is not None:
+        write_reports(latencies, TELEMETRY_FILENAME)
+    print('Final' + ''.join(', {} ({})'.format(name, bankroll) for name, bankroll in totals.items()))
+    if EV_ADJUST:
+        print(ev_status)
+    if DUPLICATE_MODE:
+        print(PAIRED([PLAYER_1_NAME, PLAYER_2_NAME], pair_stats))
+    return totals
+
+
+def parse_args():
+    '''
+    Parses arguments that override the parallel settings in config.py.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 parallel_engine.py')
+    parser.add_argument('--rounds', type=int, default=NUM_ROUNDS, help='Rounds in the whole match')
+    parser.add_argument('--workers', type=int, default=NUM_WORKERS, help='Worker processes, defaults to every core')
+    parser.add_argument('--shards', type=int, default=NUM_SHARDS, help='Shards to split the match into')
+    parser.add_argument('--seed', type=int, default=GAME_SEED, help='Seed for the shard decks')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    run(args.rounds, args.workers, args.shards, args.seed)
@@ -0,0 +1,93 @@
+'''
+The binary framed protocol, an opt-in alternative to the space-separated text clauses.
+
+After connecting, the engine offers optional protocol features as one text line 'V<mask>',
+and the pokerbot answers 'V<mask>' with the features it accepts. Skeletons without the
+handshake answer with a plain K, so they keep the text protocol.
+
+With UNACKED_ROUND_OVER on, the pokerbot does not answer messages that leave no round in
+progress, those ending a round with D or starting a new game with N, and the engine moves
+on without waiting for them.
+
+With MULTI_TABLE on, multitable_engine.py plays several rounds at once. Each I<table>
+clause says the clauses after it are for that table, and the pokerbot answers every
+table waiting on it at once, as 'I<table> <action>' pairs on one line or as 5-byte
+records, 'I', the uint8 table and the action record. Round ends are never answered.
+
+With BINARY_FRAMES on, each engine message is a little-endian uint16 length followed by
+one record per clause, a one-byte clause letter then its fields:
+
+T uint32 game clock in milliseconds
+P uint8 the player's index
+I uint8 the table the following clauses are for
+H, B, O uint8 card count, then one uint8 card code per card (see cards.py)
+R, D int16 raise amount or bankroll delta
+F, C, K, N, Q no fields
+
+The pokerbot answers with a fixed 3-byte action record: the action letter and a uint16
+raise amount, which is 0 for other actions.
+'''
+from functools import lru_cache
+import struct
+
+from cards import CARD_CODES
+
+# feature bits offered in the handshake
+BINARY_FRAMES = 1
+UNACKED_ROUND_OVER = 2
+MULTI_TABLE = 4
+
+FRAME_HEADER = struct.Struct('<H')
+CLOCK = struct.Struct('<cI')
+AMOUNT = struct.Struct('<ch')
+ACTION_RECORD = struct.Struct('<cH')
+TABLE_ACTION_RECORD = struct.Struct('<cBcH')
+
+
+@lru_cache(maxsize=65536)
+def encode_clause(clause):
+    '''
+    Converts one text clause other than the game clock into its binary record.
+    Actions, seats, hands and deltas repeat all game long, so records are cached.
+    '''
+    code = clause[0]
+    if code == 'R' or code == 'D':
+        return AMOUNT.pack(code.encode(), int(clause[1:]))
+    if code == 'P' or code == 'I':
+        return bytes((ord(code), int(clause[1:])))
+    if code == 'H' or code == 'B' or code == 'O':
+        cards = clause[1:].split(',')
+        return bytes([ord(code), len(cards)] + [CARD_CODES[card] for card in cards])
+    return code.encode()
+
+
+def encode_frame(clauses):
+    '''
+    Packs a message's clauses into one length-prefixed frame.
+    '''
+    payload = b''.join([CLOCK.pack(b'T', round(float(clause[1:]) * 1000)) if clause[0] == 'T'
+                        else encode_clause(clause) for clause in clauses])
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def decode_action(record):
+    '''
+    Converts the pokerbot's action record back into a text clause, or '' if it was cut short.
+    '''
+    if len(record) < ACTION_RECORD.size:
+        return ''
+    code, amount = ACTION_RECORD.unpack(record)
+    code = code.decode()
+    return code + str(amount) if code == 'R' else code
+
+
+def decode_table_actions(records):
+    '''
+    Converts the pokerbot's answer to a multi-table message into {table: clause}, ignoring a cut short record.
+    '''
+    actions = {}
+    for offset in range(0, len(records) - TABLE_ACTION_RECORD.size + 1, TABLE_ACTION_RECORD.size):
+        _, table, code, amount = TABLE_ACTION_RECORD.unpack_from(records, offset)
+        code = code.decode()
+        actions[table] = code + str(amount) if code == 'R' else code
+    return actions
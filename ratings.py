@@ -0,0 +1,69 @@
+'''
+Bradley-Terry ratings for tournaments, reported on the Elo scale.
+'''
+import numpy as np
+
+# Elo points per unit of log strength, so a 400 point gap means 10 to 1 odds
+ELO_SCALE = 400 / np.log(10)
+# standard deviation of the Gaussian prior on log strengths, keeps unbeaten bots finite
+PRIOR_SD = 2.
+
+
+class BradleyTerry():
+    '''
+    Fits Bradley-Terry strengths to match scores by Newton's method, refitting as results stream in.
+    '''
+
+    def __init__(self, names, prior_sd=PRIOR_SD):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        size = len(self.names)
+        self.prior = np.eye(size) / prior_sd ** 2
+        self.scores = np.zeros((size, size))  # points the row player took from the column player
+        self.games = np.zeros((size, size))
+        self.strengths = np.zeros(size)
+        self.covariance = np.linalg.inv(self.prior)
+
+    def add(self, name, opponent, score):
+        '''
+        Records one match, scored 1 for a win, 0.5 for a draw and 0 for a loss, and refits.
+        '''
+        i, j = self.index[name], self.index[opponent]
+        self.scores[i, j] += score
+        self.scores[j, i] += 1 - score
+        self.games[i, j] += 1
+        self.games[j, i] += 1
+        self.fit()
+
+    def fit(self, max_iterations=50, tolerance=1e-9):
+        '''
+        Maximizes the penalized likelihood, starting from the previous fit.
+        '''
+        for _ in range(max_iterations):
+            probabilities = 1 / (1 + np.exp(self.strengths[None, :] - self.strengths[:, None]))
+            gradient = (self.scores - self.games * probabilities).sum(axis=1) - self.prior @ self.strengths
+            weights = self.games * probabilities * (1 - probabilities)
+            information = np.diag(weights.sum(axis=1)) - weights + self.prior
+            step = np.linalg.solve(information, gradient)
+            self.strengths += step
+            if np.abs(step).max() < tolerance:
+                break
+        self.covariance = np.linalg.inv(information)
+
+    def rating(self, name, z=1.96):
+        '''
+        Returns a player's Elo rating, centred on the field's average, and the half width of its confidence interval.
+        '''
+        i = self.index[name]
+        size = len(self.names)
+        # rating relative to the mean strength, whose variance includes the covariance with the rest
+        contrast = -np.full(size, 1 / size)
+        contrast[i] += 1
+        variance = contrast @ self.covariance @ contrast
+        return ELO_SCALE * (contrast @ self.strengths), z * ELO_SCALE * np.sqrt(variance)
+
+    def standings(self):
+        '''
+        Returns (name, rating, interval) for every player, best first.
+        '''
+        return sorted([(name,) + self.rating(name) for name in self.names], key=lambda row: -row[1])
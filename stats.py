@@ -0,0 +1,98 @@
+'''
+Running statistics for match results.
+'''
+import math
+
+
+class RunningStats():
+    '''
+    Accumulates the mean and variance of a stream of values without storing them.
+    '''
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.
+        self.m2 = 0.
+
+    def push(self, value):
+        '''
+        Adds one value (Welford's update).
+        '''
+        self.count += 1
+        difference = value - self.mean
+        self.mean += difference / self.count
+        self.m2 += difference * (value - self.mean)
+
+    def merge(self, other):
+        '''
+        Adds every value accumulated by another RunningStats.
+        '''
+        count = self.count + other.count
+        if count == 0:
+            return
+        difference = other.mean - self.mean
+        self.m2 += other.m2 + difference * difference * self.count * other.count / count
+        self.mean += difference * other.count / count
+        self.count = count
+
+    def variance(self):
+        '''
+        Returns the sample variance.
+        '''
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.
+
+    def std_error(self):
+        '''
+        Returns the standard error of the mean.
+        '''
+        return math.sqrt(self.variance() / self.count) if self.count > 0 else 0.
+
+    def confidence_interval(self, z=1.96):
+        '''
+        Returns the half width of the normal confidence interval for the mean, 95% by default.
+        '''
+        return z * self.std_error()
+
+
+class SPRT():
+    '''
+    Wald's sequential probability ratio test of whether a stream of values has mean mean0 or mean1,
+    using a normal approximation with the sample variance.
+    '''
+
+    def __init__(self, mean0, mean1, alpha=0.05, beta=0.05, min_count=100):
+        self.mean0 = mean0
+        self.mean1 = mean1
+        self.min_count = min_count
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.stats = RunningStats()
+
+    def push(self, value):
+        '''
+        Adds one value.
+        '''
+        self.stats.push(value)
+
+    def llr(self):
+        '''
+        Returns the log likelihood ratio of mean1 against mean0.
+        '''
+        variance = self.stats.variance()
+        if variance == 0.:
+            return 0.
+        midpoint = (self.mean0 + self.mean1) / 2
+        return self.stats.count * (self.stats.mean - midpoint) * (self.mean1 - self.mean0) / variance
+
+    def decision(self):
+        '''
+        Returns 1 once mean1 is accepted, 0 once mean0 is accepted, or None while undecided.
+        '''
+        if self.stats.count < self.min_count:
+            return None
+        llr = self.llr()
+        if llr >= self.upper:
+            return 1
+        if llr <= self.lower:
+            return 0
+        return None
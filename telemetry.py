@@ -0,0 +1,146 @@
+'''
+Latency histograms for pokerbot decisions, exported as JSON and as a Prometheus textfile.
+'''
+import json
+import os
+
+# values below 2 ** SUB_BUCKET_BITS microseconds are exact, larger ones keep that many significant bits
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS >> 1
+QUANTILES = [0.5, 0.9, 0.99]
+STREETS = {0: 'Preflop', 3: 'Flop', 4: 'Turn', 5: 'River'}
+
+
+def bucket_index(value):
+    '''
+    Returns the bucket of a non-negative integer, log-linear like an HDR histogram.
+    '''
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + (value >> shift) - HALF_BUCKETS
+
+
+def bucket_limit(index):
+    '''
+    Returns the largest value that falls in a bucket.
+    '''
+    if index < SUB_BUCKETS:
+        return index
+    shift = (index - SUB_BUCKETS) // HALF_BUCKETS + 1
+    mantissa = (index - SUB_BUCKETS) % HALF_BUCKETS + HALF_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram():
+    '''
+    Counts durations in microsecond buckets with under 2% relative error, keeping the exact total and max.
+    '''
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+
+    def record(self, seconds):
+        '''
+        Adds one duration.
+        '''
+        index = bucket_index(int(seconds * 1e6))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        '''
+        Adds every duration recorded by another LatencyHistogram.
+        '''
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, quantile):
+        '''
+        Returns the duration in seconds that the given fraction of recorded durations do not exceed.
+        '''
+        if self.count == 0:
+            return 0.
+        rank = quantile * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(bucket_limit(index) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        '''
+        Returns the count, total, percentiles and max as a dict, in seconds.
+        '''
+        summary = {'count': self.count, 'total': self.total}
+        summary.update({'p{:g}'.format(100 * quantile): self.percentile(quantile) for quantile in QUANTILES})
+        summary['max'] = self.max
+        return summary
+
+
+def combine(histograms):
+    '''
+    Merges histograms into a new one.
+    '''
+    combined = LatencyHistogram()
+    for histogram in histograms:
+        combined.merge(histogram)
+    return combined
+
+
+def report(latencies):
+    '''
+    Summarizes {player: {(street, action): LatencyHistogram}} as nested dicts, with a total for each player.
+    '''
+    players = {}
+    for name, histograms in latencies.items():
+        streets = {}
+        for (street, action), histogram in sorted(histograms.items()):
+            streets.setdefault(street, {})[action] = histogram.summary()
+        players[name] = {'all': combine(histograms.values()).summary(), 'streets': streets}
+    return players
+
+
+def prometheus_lines(latencies):
+    '''
+    Yields the histograms as Prometheus summary metrics in the textfile format.
+    '''
+    yield '# HELP pokerbots_decision_seconds Time each pokerbot took to answer the engine.'
+    yield '# TYPE pokerbots_decision_seconds summary'
+    maxima = []
+    for name, histograms in sorted(latencies.items()):
+        for (street, action), histogram in sorted(histograms.items()):
+            labels = 'player="{}",street="{}",action="{}"'.format(name, street, action)
+            for quantile in QUANTILES:
+                yield 'pokerbots_decision_seconds{{{},quantile="{}"}} {:.9f}'.format(
+                    labels, quantile, histogram.percentile(quantile))
+            yield 'pokerbots_decision_seconds_sum{{{}}} {:.9f}'.format(labels, histogram.total)
+            yield 'pokerbots_decision_seconds_count{{{}}} {}'.format(labels, histogram.count)
+            maxima.append('pokerbots_decision_max_seconds{{{}}} {:.9f}'.format(labels, histogram.max))
+    yield '# HELP pokerbots_decision_max_seconds Slowest answer from each pokerbot.'
+    yield '# TYPE pokerbots_decision_max_seconds gauge'
+    yield from maxima
+
+
+def write_reports(latencies, filename):
+    '''
+    Writes filename.json and filename.prom, replacing each in one step so scrapers never see half a file.
+    '''
+    with open(filename + '.json.tmp', 'w') as json_file:
+        json.dump(report(latencies), json_file, indent=2)
+    os.replace(filename + '.json.tmp', filename + '.json')
+    with open(filename + '.prom.tmp', 'w') as prom_file:
+        for line in prometheus_lines(latencies):
+            prom_file.write(line + '\n')
+    os.replace(filename + '.prom.tmp', filename + '.prom')
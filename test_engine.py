@@ -1,9 +1,15 @@
-from collections import namedtuple
-from threading import Thread
-from queue import Queue
+from collections import namedtuple, deque
+from contextlib import redirect_stdout
+from threading import Thread, Lock
+import importlib.util
+import traceback
+import gzip
+import lzma
+import random
 import time
 import json
 import subprocess
+import argparse
 import socket
 import eval7
 import sys
@@ -11,6 +17,17 @@ import os
 
 sys.path.append(os.getcwd())
 from config import *
+from stats import RunningStats, SPRT
+from telemetry import LatencyHistogram, STREETS, combine, write_reports
+from equity import all_in_ev
+from decks import DeckProvider
+from dataset import DatasetWriter
+from events import (Observer, GameStart, RoundStart, Deal, Action, Street, Showdown, Delta, AllInEV, BotError, GameEnd,
+                    Checkpoint)
+from checkpoint import write_checkpoint, read_checkpoint, remove_checkpoint
+from transports import LISTENERS
+from protocol import BINARY_FRAMES, UNACKED_ROUND_OVER, MULTI_TABLE, ACTION_RECORD, TABLE_ACTION_RECORD
+from protocol import encode_frame, decode_action, decode_table_actions
 
 FoldAction = namedtuple('FoldAction', [])
 CallAction = namedtuple('CallAction', [])
@@ -21,10 +38,36 @@ TerminalState = namedtuple('TerminalState', ['deltas', 'previous_state'])
 
 STREET_NAMES = ['Flop', 'Turn', 'River']
 DECODE = {'F': FoldAction, 'C': CallAction, 'K': CheckAction, 'R': RaiseAction}
+ENCODE = {'FoldAction': 'F', 'CallAction': 'C', 'CheckAction': 'K', 'RaiseAction': 'R'}
+ACTION_NAMES = {'F': 'Fold', 'C': 'Call', 'K': 'Check', 'R': 'Raise'}
 CCARDS = lambda cards: ','.join(map(str, cards))
 PCARDS = lambda cards: '[{}]'.format(' '.join(map(str, cards)))
 PVALUE = lambda name, value: ', {} ({})'.format(name, value)
 STATUS = lambda players: ''.join([PVALUE(p.name, p.bankroll) for p in players])
+PSEED = lambda seed: 'Deck seed {}'.format(seed)
+PBLIND = lambda name, amount: '{} posts the blind of {}'.format(name, amount)
+PDEALT = lambda name, hand: '{} dealt {}'.format(name, PCARDS(hand))
+PSTREET = lambda street, board, names, contributions: '{} {}{}{}'.format(
+    STREET_NAMES[street - 3] if street < 6 else 'Run', PCARDS(board),
+    PVALUE(names[0], contributions[0]), PVALUE(names[1], contributions[1]))
+PHRASES = {'FoldAction': ' folds', 'CallAction': ' calls', 'CheckAction': ' checks'}
+PACTION = lambda name, action, bet_override: name + (
+    PHRASES[type(action).__name__] if not isinstance(action, RaiseAction) else
+    (' bets ' if bet_override else ' raises to ') + str(action.amount))
+PSHOWS = lambda name, hand: '{} shows {}'.format(name, PCARDS(hand))
+PAWARDED = lambda name, delta: '{} awarded {}'.format(name, delta)
+PPROGRESS = lambda hands, hand_rate, decision_rate: '{} hands have been played, {:.0f} hands/s, {:.0f} decisions/s'.format(
+    hands, hand_rate, decision_rate)
+PEV = lambda name, value: ', {} ({:+.1f})'.format(name, value)
+PALL_IN_EV = lambda name0, name1, ev_delta: 'All-in EV' + PEV(name0, ev_delta) + PEV(name1, -ev_delta)
+EV_STATUS = lambda players: ''.join([', {} ({:.1f})'.format(p.name, p.ev_bankroll) for p in players])
+PAIRED = lambda names, stats: 'Duplicate{}, {} pairs'.format(
+    ''.join([', {} ({:.2f} +/- {:.2f})'.format(name, sign * stats.mean, stats.confidence_interval())
+             for name, sign in zip(names, [1, -1])]), stats.count)
+PLATENCY = lambda name, stats: '{} took {:.3f}s over {} decisions, p50 {:.0f}us, p99 {:.0f}us, max {:.0f}us'.format(
+    name, stats['total'], stats['count'], 1e6 * stats['p50'], 1e6 * stats['p99'], 1e6 * stats['max'])
+SPRT_RESULT = lambda name, mean, num_rounds, llr: 'SPRT, {} ({:+} per round) accepted after {} rounds, LLR {:.2f}'.format(
+    name, mean, num_rounds, llr)
 
 # Socket encoding scheme:
 #
@@ -38,6 +81,7 @@ STATUS = lambda players: ''.join([PVALUE(p.name, p.bankroll) for p in players])
 # B**,**,**,**,** the board cards in common format
 # O**,** the opponent's hand in common format
 # D### the player's bankroll delta from the round
+# N a new game against the same opponent, in a session of NUM_GAMES games
 # Q game over
 #
 # Clauses are separated by spaces
@@ -45,9 +89,10 @@ STATUS = lambda players: ''.join([PVALUE(p.name, p.bankroll) for p in players])
 # The engine expects a response of K at the end of the round as an ack,
 # otherwise a response which encodes the player's action
 # Action history is sent once, including the player's actions
+# With PROTOCOL = 'binary', the same clauses are sent as frames, see protocol.py
 
 
-class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks', 'hands', 'deck', 'previous_state'])):
+class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks', 'hands', 'board', 'previous_state'])):
     '''
     Encodes the game tree for one round of poker.
     '''
@@ -56,8 +101,8 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         '''
         Compares the players' hands and computes payoffs.
         '''
-        score0 = eval7.evaluate(self.deck.peek(5) + self.hands[0])
-        score1 = eval7.evaluate(self.deck.peek(5) + self.hands[1])
+        score0 = eval7.evaluate(self.board + self.hands[0])
+        score1 = eval7.evaluate(self.board + self.hands[1])
         if score0 > score1:
             delta = STARTING_STACK - self.stacks[1]
         elif score0 < score1:
@@ -98,7 +143,7 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
         if self.street == 5:
             return self.showdown()
         new_street = 3 if self.street == 0 else self.street + 1
-        return RoundState(1, new_street, [0, 0], self.stacks, self.hands, self.deck, self)
+        return RoundState(1, new_street, [0, 0], self.stacks, self.hands, self.board, self)
 
     def proceed(self, action):
         '''
@@ -110,48 +155,162 @@ class RoundState(namedtuple('_RoundState', ['button', 'street', 'pips', 'stacks'
             return TerminalState([delta, -delta], self)
         if isinstance(action, CallAction):
             if self.button == 0:  # sb calls bb
-                return RoundState(1, 0, [BIG_BLIND] * 2, [STARTING_STACK - BIG_BLIND] * 2, self.hands, self.deck, self)
+                return RoundState(1, 0, [BIG_BLIND] * 2, [STARTING_STACK - BIG_BLIND] * 2, self.hands, self.board, self)
             # both players acted
             new_pips = list(self.pips)
             new_stacks = list(self.stacks)
             contribution = new_pips[1-active] - new_pips[active]
             new_stacks[active] -= contribution
             new_pips[active] += contribution
-            state = RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self)
+            state = RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.board, self)
             return state.proceed_street()
         if isinstance(action, CheckAction):
             if (self.street == 0 and self.button > 0) or self.button > 1:  # both players acted
                 return self.proceed_street()
             # let opponent act
-            return RoundState(self.button + 1, self.street, self.pips, self.stacks, self.hands, self.deck, self)
+            return RoundState(self.button + 1, self.street, self.pips, self.stacks, self.hands, self.board, self)
         # isinstance(action, RaiseAction)
         new_pips = list(self.pips)
         new_stacks = list(self.stacks)
         contribution = action.amount - new_pips[active]
         new_stacks[active] -= contribution
         new_pips[active] += contribution
-        return RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.deck, self)
+        return RoundState(self.button + 1, self.street, new_pips, new_stacks, self.hands, self.board, self)
+
+
+class PlayerLog():
+    '''
+    Streams a pokerbot's output to its log file as it arrives, enforcing PLAYER_LOG_SIZE_LIMIT live.
+    Output past the limit is rotated into numbered backups, or dropped except for an optional tail.
+    With append, output is added to an existing log, as when a game resumes, and counts toward the limit.
+    '''
+
+    def __init__(self, filename, size_limit=PLAYER_LOG_SIZE_LIMIT, backup_count=PLAYER_LOG_BACKUP_COUNT,
+                 tail_size=PLAYER_LOG_TAIL_SIZE, append=False):
+        self.filename = filename
+        self.size_limit = size_limit
+        self.backup_count = backup_count
+        self.tail_size = tail_size
+        self.file = open(filename, 'ab' if append else 'wb')
+        self.bytes_written = self.file.tell()
+        self.bytes_dropped = 0
+        self.tail = deque()
+        self.tail_bytes = 0
+        self.lock = Lock()
+
+    def write(self, output):
+        '''
+        Appends bytes or text to the log. Also serves as a text stream for redirect_stdout.
+        '''
+        if not output:
+            return 0
+        size = len(output)
+        if isinstance(output, str):
+            output = output.encode()
+        with self.lock:
+            while output:
+                room = self.size_limit - self.bytes_written
+                if room > 0:
+                    self.bytes_written += self.file.write(output[:room])
+                    output = output[room:]
+                elif self.backup_count > 0:
+                    self.rotate()
+                else:
+                    self.drop(output)
+                    break
+        return size
+
+    def rotate(self):
+        '''
+        Moves the full log to a numbered backup and starts a new one.
+        '''
+        self.file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists('{}.{}'.format(self.filename, index)):
+                os.replace('{}.{}'.format(self.filename, index), '{}.{}'.format(self.filename, index + 1))
+        os.replace(self.filename, self.filename + '.1')
+        self.file = open(self.filename, 'wb')
+        self.bytes_written = 0
+
+    def drop(self, output):
+        '''
+        Discards output past the size limit, remembering the last PLAYER_LOG_TAIL_SIZE bytes of it.
+        '''
+        self.bytes_dropped += len(output)
+        if self.tail_size > 0:
+            self.tail.append(output)
+            self.tail_bytes += len(output)
+            while self.tail_bytes - len(self.tail[0]) >= self.tail_size:
+                self.tail_bytes -= len(self.tail.popleft())
+
+    def flush(self):
+        '''
+        Pushes buffered output to the OS.
+        '''
+        with self.lock:
+            self.file.flush()
+
+    def close(self):
+        '''
+        Writes the remembered tail, if any, and closes the log.
+        '''
+        with self.lock:
+            if self.bytes_dropped > 0 and self.tail:
+                tail = b''.join(self.tail)[-self.tail_size:]
+                self.file.write('\n... {} bytes dropped, last {} follow ...\n'.format(
+                    self.bytes_dropped - len(tail), len(tail)).encode())
+                self.file.write(tail)
+            self.file.close()
 
 
 class Player():
     '''
     Handles subprocess and socket interactions with one player's pokerbot.
+    With append_log, the pokerbot's log is added to rather than started over.
     '''
 
-    def __init__(self, name, path):
+    def __init__(self, name, path, log_filename=None, append_log=False):
         self.name = name
         self.path = path
+        self.log_filename = name + '.txt' if log_filename is None else log_filename
         self.game_clock = STARTING_GAME_CLOCK
         self.bankroll = 0
+        self.ev_bankroll = 0
         self.commands = None
         self.bot_subprocess = None
+        self.output_thread = None
         self.socketfile = None
-        self.bytes_queue = Queue()
+        self.features = 0
+        self.latency = {}
+        # whether the last action came from the pokerbot's answer, rather than the engine checking or folding for it
+        self.answered = False
+        self.output = PlayerLog(self.log_filename, append=append_log)
 
     def build(self):
         '''
         Loads the commands file and builds the pokerbot.
         '''
+        self.load_commands()
+        if self.commands is not None and len(self.commands['build']) > 0:
+            try:
+                proc = subprocess.run(self.commands['build'],
+                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                      cwd=self.path, timeout=BUILD_TIMEOUT, check=False)
+                self.output.write(proc.stdout)
+            except subprocess.TimeoutExpired as timeout_expired:
+                error_message = 'Timed out waiting for ' + self.name + ' to build'
+                print(error_message)
+                self.output.write(timeout_expired.stdout)
+                self.output.write(error_message.encode())
+            except (TypeError, ValueError):
+                print(self.name, 'build command misformatted')
+            except OSError:
+                print(self.name, 'build failed - check "build" in commands.json')
+
+    def load_commands(self):
+        '''
+        Loads the build and run commands from the pokerbot's commands.json.
+        '''
         try:
             with open(self.path + '/commands.json', 'r') as json_file:
                 commands = json.load(json_file)
@@ -165,60 +324,86 @@ class Player():
             print(self.name, 'commands.json not found - check PLAYER_PATH')
         except json.decoder.JSONDecodeError:
             print(self.name, 'commands.json misformatted')
-        if self.commands is not None and len(self.commands['build']) > 0:
-            try:
-                proc = subprocess.run(self.commands['build'],
-                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                      cwd=self.path, timeout=BUILD_TIMEOUT, check=False)
-                self.bytes_queue.put(proc.stdout)
-            except subprocess.TimeoutExpired as timeout_expired:
-                error_message = 'Timed out waiting for ' + self.name + ' to build'
-                print(error_message)
-                self.bytes_queue.put(timeout_expired.stdout)
-                self.bytes_queue.put(error_message.encode())
-            except (TypeError, ValueError):
-                print(self.name, 'build command misformatted')
-            except OSError:
-                print(self.name, 'build failed - check "build" in commands.json')
+
+    def start(self):
+        '''
+        Builds and runs the pokerbot.
+        '''
+        self.build()
+        self.run()
 
     def run(self):
         '''
-        Runs the pokerbot and establishes the socket connection.
+        Runs the pokerbot and establishes the connection over the configured TRANSPORT.
         '''
         if self.commands is not None and len(self.commands['run']) > 0:
             try:
-                server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                with server_socket:
-                    server_socket.bind(('', 0))
-                    server_socket.settimeout(CONNECT_TIMEOUT)
-                    server_socket.listen()
-                    port = server_socket.getsockname()[1]
-                    proc = subprocess.Popen(self.commands['run'] + [str(port)],
+                with LISTENERS[TRANSPORT]() as listener:
+                    proc = subprocess.Popen(self.commands['run'] + listener.args,
                                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                            cwd=self.path)
+                                            cwd=self.path, pass_fds=listener.pass_fds)
                     self.bot_subprocess = proc
                     # function for bot listening
-                    def enqueue_output(out, queue):
+                    def stream_output(out, player_log):
                         try:
                             for line in out:
-                                queue.put(line)
+                                player_log.write(line)
                         except ValueError:
                             pass
                     # start a separate bot listening thread which dies with the program
-                    Thread(target=enqueue_output, args=(proc.stdout, self.bytes_queue), daemon=True).start()
+                    self.output_thread = Thread(target=stream_output, args=(proc.stdout, self.output), daemon=True)
+                    self.output_thread.start()
                     # block until we timeout or the player connects
-                    client_socket, _ = server_socket.accept()
-                    with client_socket:
-                        client_socket.settimeout(CONNECT_TIMEOUT)
-                        sock = client_socket.makefile('rw')
-                        self.socketfile = sock
-                        print(self.name, 'connected successfully')
+                    self.socketfile = listener.accept()
+                    print(self.name, 'connected successfully')
+                self.negotiate()
+            except KeyError:
+                print('Unknown TRANSPORT', TRANSPORT, '- use one of', ', '.join(LISTENERS))
             except (TypeError, ValueError):
                 print(self.name, 'run command misformatted')
-            except OSError:
-                print(self.name, 'run failed - check "run" in commands.json')
             except socket.timeout:
                 print('Timed out waiting for', self.name, 'to connect')
+            except OSError:
+                print(self.name, 'run failed - check "run" in commands.json')
+
+    def negotiate(self):
+        '''
+        Offers the protocol features chosen in config.py and keeps the ones the pokerbot accepts.
+        Older skeletons answer the offer with a K, which leaves every feature off.
+        '''
+        offered = self.offered_features()
+        if offered == 0:
+            return
+        self.socketfile.write('V{}\n'.format(offered).encode())
+        self.socketfile.flush()
+        response = self.socketfile.readline(time.perf_counter() + CONNECT_TIMEOUT).decode().strip()
+        if response.startswith('V'):
+            self.features = int(response[1:]) & offered
+
+    def offered_features(self):
+        '''
+        Returns the protocol features to offer the pokerbot, as chosen in config.py.
+        '''
+        offered = (BINARY_FRAMES if PROTOCOL == 'binary' else 0) | (UNACKED_ROUND_OVER if PIPELINE_ROUND_OVER else 0)
+        return offered | (MULTI_TABLE if NUM_TABLES > 1 else 0)
+
+    def new_game(self):
+        '''
+        Resets the bankroll and game clock and tells the still running pokerbot that another game starts.
+        '''
+        self.bankroll = 0
+        self.ev_bankroll = 0
+        self.game_clock = STARTING_GAME_CLOCK
+        self.latency = {}
+        if self.connected():
+            try:
+                if self.features & UNACKED_ROUND_OVER:
+                    self.send(self.encode_message(['N']))
+                else:
+                    self.exchange(self.encode_message(['N']))
+            except OSError:
+                print(self.name, 'disconnected')
+                self.game_clock = 0.
 
     def stop(self):
         '''
@@ -226,30 +411,90 @@ class Player():
         '''
         if self.socketfile is not None:
             try:
-                self.socketfile.write('Q\n')
+                self.socketfile.write(self.encode_message(['Q']))
                 self.socketfile.close()
             except socket.timeout:
                 print('Timed out waiting for', self.name, 'to disconnect')
             except OSError:
                 print('Could not close socket connection with', self.name)
+        elif self.bot_subprocess is not None:
+            # it never connected or stopped answering, so do not wait on it
+            self.bot_subprocess.kill()
         if self.bot_subprocess is not None:
             try:
-                outs, _ = self.bot_subprocess.communicate(timeout=CONNECT_TIMEOUT)
-                self.bytes_queue.put(outs)
+                self.bot_subprocess.wait(timeout=CONNECT_TIMEOUT)
             except subprocess.TimeoutExpired:
                 print('Timed out waiting for', self.name, 'to quit')
                 self.bot_subprocess.kill()
-                outs, _ = self.bot_subprocess.communicate()
-                self.bytes_queue.put(outs)
-        with open(self.name + '.txt', 'wb') as log_file:
-            bytes_written = 0
-            for output in self.bytes_queue.queue:
-                try:
-                    bytes_written += log_file.write(output)
-                    if bytes_written >= PLAYER_LOG_SIZE_LIMIT:
-                        break
-                except TypeError:
-                    pass
+                self.bot_subprocess.wait()
+        if self.output_thread is not None:
+            self.output_thread.join()  # the bot's stdout is closed, so this drains what is left
+        self.output.close()
+
+    def connected(self):
+        '''
+        Returns whether the pokerbot can still be queried.
+        '''
+        return self.socketfile is not None
+
+    def encode_message(self, player_message):
+        '''
+        Encodes the player's pending clauses as one socket message, a binary frame if negotiated.
+        '''
+        if self.features & BINARY_FRAMES:
+            return encode_frame(player_message)
+        return (' '.join(player_message) + '\n').encode()
+
+    def send(self, message):
+        '''
+        Sends one message to the pokerbot without waiting for an answer.
+        '''
+        self.socketfile.write(message)
+        self.socketfile.flush()
+
+    def exchange(self, message, time_limit=CONNECT_TIMEOUT):
+        '''
+        Sends one message to the pokerbot and returns the clause it responds with and how long it took,
+        timed from the moment the message is sent. Raises socket.timeout after time_limit seconds.
+        '''
+        self.send(message)
+        start_time = time.perf_counter()
+        deadline = start_time + time_limit
+        try:
+            if self.features & BINARY_FRAMES:
+                clause = decode_action(self.socketfile.read(ACTION_RECORD.size, deadline))
+            else:
+                clause = self.socketfile.readline(deadline).decode().strip()
+        except socket.timeout:
+            # a late answer would be read as the next one, so this connection is done
+            self.socketfile.close()
+            self.socketfile = None
+            raise
+        return clause, time.perf_counter() - start_time
+
+    def receive_table_actions(self, num_actions, deadline):
+        '''
+        Reads the pokerbot's answer to a multi-table message as {table: clause}.
+        Raises socket.timeout after the deadline, closing the connection like exchange.
+        '''
+        try:
+            if self.features & BINARY_FRAMES:
+                return decode_table_actions(self.socketfile.read(num_actions * TABLE_ACTION_RECORD.size, deadline))
+            clauses = self.socketfile.readline(deadline).decode().split()
+        except socket.timeout:
+            self.socketfile.close()
+            self.socketfile = None
+            raise
+        return {int(table[1:]): clause for table, clause in zip(clauses[::2], clauses[1::2])}
+
+    def time_limit(self):
+        '''
+        Returns how long the pokerbot may take for its next answer, its remaining clock and the cap on one action.
+        '''
+        time_limit = self.game_clock if ENFORCE_GAME_CLOCK else CONNECT_TIMEOUT
+        if ACTION_TIME_LIMIT is not None:
+            time_limit = min(time_limit, ACTION_TIME_LIMIT)
+        return time_limit
 
     def query(self, round_state, player_message, game_log):
         '''
@@ -257,96 +502,425 @@ class Player():
         At the end of the round, we request a CheckAction from the pokerbot.
         '''
         legal_actions = round_state.legal_actions() if isinstance(round_state, RoundState) else {CheckAction}
-        if self.socketfile is not None and self.game_clock > 0.:
+        self.answered = False
+        if self.connected() and self.game_clock > 0.:
             clause = ''
             try:
-                player_message[0] = 'T{:.3f}'.format(self.game_clock)
-                message = ' '.join(player_message) + '\n'
-                del player_message[1:]  # do not send redundant action history
-                start_time = time.perf_counter()
-                self.socketfile.write(message)
-                self.socketfile.flush()
-                clause = self.socketfile.readline().strip()
-                end_time = time.perf_counter()
-                if ENFORCE_GAME_CLOCK:
-                    self.game_clock -= end_time - start_time
-                if self.game_clock <= 0.:
-                    raise socket.timeout
-                action = DECODE[clause[0]]
-                if action in legal_actions:
-                    if clause[0] == 'R':
-                        amount = int(clause[1:])
-                        min_raise, max_raise = round_state.raise_bounds()
-                        if min_raise <= amount <= max_raise:
-                            return action(amount)
-                    else:
-                        return action()
-                game_log.append(self.name + ' attempted illegal ' + action.__name__)
-            except socket.timeout:
-                error_message = self.name + ' ran out of time'
-                game_log.append(error_message)
-                print(error_message)
-                self.game_clock = 0.
-            except OSError:
-                error_message = self.name + ' disconnected'
-                game_log.append(error_message)
-                print(error_message)
-                self.game_clock = 0.
-            except (IndexError, KeyError, ValueError):
-                game_log.append(self.name + ' response misformatted: ' + str(clause))
+                message = self.query_message(player_message)
+                if isinstance(round_state, TerminalState) and self.features & UNACKED_ROUND_OVER:
+                    # the pokerbot handles the result while the engine moves on, and the time
+                    # it takes is charged to its next answer
+                    self.send(message)
+                    return CheckAction()
+                clause, think_time = self.exchange(message, self.time_limit())
+                return self.play_answer(round_state, clause, think_time, game_log)
+            except (OSError, IndexError, KeyError, ValueError) as error:
+                self.log_query_error(error, clause, game_log)
+        return CheckAction() if CheckAction in legal_actions else FoldAction()
+
+    def query_message(self, player_message):
+        '''
+        Encodes the pending clauses for the pokerbot behind its current clock, and clears them once sent.
+        '''
+        player_message[0] = 'T{:.3f}'.format(self.game_clock)
+        message = self.encode_message(player_message)
+        del player_message[1:]  # do not send redundant action history
+        return message
+
+    def play_answer(self, round_state, clause, think_time, game_log):
+        '''
+        Times the pokerbot's answer against its clock and returns the action it played.
+        Raises socket.timeout if the answer used up the clock.
+        '''
+        self.record_latency(round_state, clause, think_time)
+        if ENFORCE_GAME_CLOCK:
+            self.game_clock -= think_time
+        if self.game_clock <= 0.:
+            raise socket.timeout
+        return self.parse_action(round_state, clause, game_log)
+
+    def log_query_error(self, error, clause, game_log):
+        '''
+        Logs why a query failed. A pokerbot that ran out of time or disconnected is not queried again.
+        '''
+        if isinstance(error, OSError):
+            error_message = self.name + (' ran out of time' if isinstance(error, socket.timeout) else ' disconnected')
+            game_log.append(error_message)
+            print(error_message)
+            self.game_clock = 0.
+        else:
+            game_log.append(self.name + ' response misformatted: ' + str(clause))
+
+    def parse_action(self, round_state, clause, game_log):
+        '''
+        Converts the pokerbot's answer into its action, or logs why it cannot be played and checks or folds instead.
+        '''
+        legal_actions = round_state.legal_actions() if isinstance(round_state, RoundState) else {CheckAction}
+        self.answered = False
+        try:
+            action = DECODE[clause[0]]
+            if action in legal_actions:
+                if clause[0] == 'R':
+                    amount = int(clause[1:])
+                    min_raise, max_raise = round_state.raise_bounds()
+                    if min_raise <= amount <= max_raise:
+                        self.answered = True
+                        return action(amount)
+                else:
+                    self.answered = True
+                    return action()
+            game_log.append(self.name + ' attempted illegal ' + action.__name__)
+        except (IndexError, KeyError, ValueError):
+            game_log.append(self.name + ' response misformatted: ' + str(clause))
         return CheckAction() if CheckAction in legal_actions else FoldAction()
 
+    def record_latency(self, round_state, clause, seconds):
+        '''
+        Adds one round trip to the histogram for its street and the kind of answer.
+        '''
+        street = STREETS[round_state.street] if isinstance(round_state, RoundState) else 'End'
+        key = (street, ACTION_NAMES.get(clause[:1], 'Invalid'))
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = LatencyHistogram()
+        histogram.record(seconds)
+
+
+class InProcessPlayer(Player):
+    '''
+    Loads one player's pokerbot into the engine process and drives its skeleton Runner directly.
+    '''
+
+    # imports change sys.modules and the working directory, so pokerbots are loaded one at a time
+    start_lock = Lock()
+
+    def __init__(self, name, path, log_filename=None, append_log=False):
+        super().__init__(name, path, log_filename, append_log)
+        self.module = None
+        self.runner_class = None
+        self.runner = None
+
+    def start(self):
+        '''
+        Loads and runs the pokerbot once no other in-process pokerbot is loading.
+        '''
+        with InProcessPlayer.start_lock:
+            super().start()
+
+    def build(self):
+        '''
+        Imports the pokerbot's player.py together with its own copy of the skeleton.
+        '''
+        bot_path = os.path.abspath(self.path)
+        # every bot ships its own skeleton package, so keep theirs out of each other's way
+        saved_modules = {name: sys.modules.pop(name) for name in list(sys.modules)
+                         if name == 'skeleton' or name.startswith('skeleton.')}
+        cwd = os.getcwd()
+        sys.path.insert(0, bot_path)
+        try:
+            spec = importlib.util.spec_from_file_location('player_' + self.name, os.path.join(bot_path, 'player.py'))
+            module = importlib.util.module_from_spec(spec)
+            os.chdir(bot_path)
+            with redirect_stdout(self.output):
+                spec.loader.exec_module(module)
+            self.module = module
+            self.runner_class = sys.modules['skeleton.runner'].Runner
+        except FileNotFoundError:
+            print(self.name, 'player.py not found - check PLAYER_PATH')
+        except Exception:
+            self.output.write(traceback.format_exc())
+            print(self.name, 'import failed - check', self.log_filename)
+        finally:
+            os.chdir(cwd)
+            sys.path.remove(bot_path)
+            for name in [name for name in sys.modules if name == 'skeleton' or name.startswith('skeleton.')]:
+                del sys.modules[name]
+            sys.modules.update(saved_modules)
+
+    def run(self):
+        '''
+        Instantiates the pokerbot and wraps it in its skeleton Runner.
+        '''
+        if self.module is not None:
+            cwd = os.getcwd()
+            try:
+                os.chdir(os.path.abspath(self.path))
+                with redirect_stdout(self.output):
+                    self.runner = self.runner_class(self.module.Player(), None)
+                print(self.name, 'loaded successfully')
+            except Exception:
+                self.output.write(traceback.format_exc())
+                print(self.name, 'failed to start - check', self.log_filename)
+            finally:
+                os.chdir(cwd)
+
+    def stop(self):
+        '''
+        Tells the pokerbot the game is over and writes its captured output.
+        '''
+        if self.runner is not None:
+            try:
+                self.exchange(['Q'])
+            except OSError:
+                pass
+        super().stop()
+
+    def connected(self):
+        '''
+        Returns whether the pokerbot can still be queried.
+        '''
+        return self.runner is not None
+
+    def encode_message(self, player_message):
+        '''
+        Copies the player's pending clauses into a packet for the skeleton Runner.
+        '''
+        return list(player_message)
+
+    def exchange(self, message, time_limit=CONNECT_TIMEOUT):
+        '''
+        Hands one packet to the skeleton Runner and returns its action as a clause and how long it took.
+        A pokerbot that raises is treated like one that disconnected. It cannot be interrupted,
+        so going over time_limit only raises socket.timeout once it returns.
+        '''
+        start_time = time.perf_counter()
+        try:
+            with redirect_stdout(self.output):
+                action = self.runner.handle_packet(message)
+        except Exception:
+            self.output.write(traceback.format_exc())
+            self.runner = None
+            raise OSError
+        think_time = time.perf_counter() - start_time
+        if think_time > time_limit:
+            raise socket.timeout
+        if action is None:
+            return '', think_time
+        code = ENCODE[type(action).__name__]
+        return (code + str(action.amount) if code == 'R' else code), think_time
+
+
+def make_player(name, path, log_filename=None, append_log=False):
+    '''
+    Creates the Player for one pokerbot, loaded in-process if RUN_IN_PROCESS is set.
+    '''
+    player_class = InProcessPlayer if RUN_IN_PROCESS else Player
+    return player_class(name, path, log_filename, append_log)
+
+
+LOG_OPENERS = {None: open, 'gzip': gzip.open, 'lzma': lzma.open}
+LOG_EXTENSIONS = {None: '.txt', 'gzip': '.txt.gz', 'lzma': '.txt.xz'}
+
+
+class GameLog():
+    '''
+    Streams game log lines to disk as they are produced, so memory use does not grow with the game.
+    '''
+
+    def __init__(self, filename, compression=GAME_LOG_COMPRESSION, flush_interval=GAME_LOG_FLUSH_INTERVAL,
+                 offset=None):
+        self.name = filename + LOG_EXTENSIONS[compression]
+        self.compression = compression
+        self.flush_interval = flush_interval
+        self.last_flush = time.perf_counter()
+        if offset is None:
+            self.file = LOG_OPENERS[compression](self.name, 'wt')
+            self.separator = ''
+        else:
+            # drop whatever was written after the checkpoint and carry on from there
+            with open(self.name, 'r+b') as raw_file:
+                raw_file.truncate(offset)
+            self.file = LOG_OPENERS[compression](self.name, 'at')
+            self.separator = '\n'
+
+    def append(self, line):
+        '''
+        Writes one line through the buffered file.
+        '''
+        self.file.write(self.separator + line)
+        self.separator = '\n'
+
+    def flush(self):
+        '''
+        Pushes buffered lines to the OS if GAME_LOG_FLUSH_INTERVAL seconds have passed since the last flush.
+        '''
+        now = time.perf_counter()
+        if now - self.last_flush >= self.flush_interval:
+            self.file.flush()
+            self.last_flush = now
+
+    def checkpoint(self):
+        '''
+        Writes everything so far to disk and returns its size, where a resumed game continues the log.
+        A compressed log is closed and reopened, which ends its gzip member or xz stream there.
+        '''
+        if self.compression is None:
+            self.file.flush()
+            offset = os.path.getsize(self.name)
+        else:
+            self.file.close()
+            offset = os.path.getsize(self.name)
+            self.file = LOG_OPENERS[self.compression](self.name, 'at')
+        os.fsync(self.file.fileno())
+        return offset
+
+    def close(self):
+        '''
+        Writes out everything that is left and closes the file.
+        '''
+        self.file.close()
+
+
+class NullLog():
+    '''
+    Stands in for the GameLog of a headless game, which keeps no text log.
+    '''
+    name = None
+    compression = None
+
+    def append(self, line):
+        pass
+
+    def flush(self):
+        pass
+
+    def checkpoint(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+class ErrorLog():
+    '''
+    Stands in for the game log when pokerbots log their errors, so the game's observers hear of them too.
+    '''
+
+    def __init__(self, game):
+        self.game = game
+
+    def append(self, line):
+        self.game.log_error(line)
+
+
+class Progress():
+    '''
+    Prints how many hands have been played, with the hands and decisions per second since the last report,
+    at most once every interval seconds.
+    '''
+
+    def __init__(self, interval=PROGRESS_INTERVAL):
+        self.interval = interval
+        self.last_time = time.perf_counter()
+        self.last_hands = 0
+        self.last_decisions = 0
+
+    def update(self, hands, players):
+        '''
+        Reports the hands played so far if interval seconds have passed since the last report.
+        '''
+        if self.interval is None:
+            return
+        now = time.perf_counter()
+        elapsed = now - self.last_time
+        if elapsed < self.interval:
+            return
+        # only real queries for actions count, not the acknowledgements of finished rounds
+        decisions = sum(histogram.count for player in players
+                        for (street, _), histogram in player.latency.items() if street != 'End')
+        print(PPROGRESS(hands, (hands - self.last_hands) / elapsed, (decisions - self.last_decisions) / elapsed))
+        self.last_time = now
+        self.last_hands = hands
+        self.last_decisions = decisions
+
 
 class Game():
     '''
     Manages logging and the high-level game procedure.
     '''
 
-    def __init__(self):
-        self.log = ['FIU Pokerbots - ' + PLAYER_1_NAME + ' vs ' + PLAYER_2_NAME]
+    def __init__(self, num_rounds=NUM_ROUNDS, seed=GAME_SEED, log_filename=GAME_LOG_FILENAME, first_round=1,
+                 sprt_bounds=SPRT_BOUNDS, telemetry_filename=TELEMETRY_FILENAME, checkpoint_filename=CHECKPOINT_FILENAME,
+                 dataset_directory=DATASET_DIRECTORY):
+        self.num_rounds = num_rounds
+        self.log_filename = log_filename
+        self.telemetry_filename = telemetry_filename
+        self.checkpoint_filename = checkpoint_filename
+        self.first_round = first_round
+        self.next_round = first_round
+        self.decks = DeckProvider(seed)
+        self.pair_stats = RunningStats()
+        self.sprt_bounds = sprt_bounds
+        self.sprt = None
+        if sprt_bounds is not None:
+            # in DUPLICATE_MODE the test runs on pairs of rounds
+            scale = 2 if DUPLICATE_MODE else 1
+            self.sprt = SPRT(scale * sprt_bounds[0], scale * sprt_bounds[1], SPRT_ALPHA, SPRT_BETA, SPRT_MIN_COUNT)
+        self.log = None
         self.player_messages = [[], []]
         self.hand_counter = 0
+        self.unit_start = 0
+        self.decision = None
+        self.observers = []
+        self.errors = ErrorLog(self)
+        if dataset_directory is not None:
+            self.add_observer(DatasetWriter(dataset_directory))
+        # a headless game skips building the text log, see GameLogWriter to write it from events instead
+        self.headless = HEADLESS
+        self.progress = Progress()
+
+    def add_observer(self, observer):
+        '''
+        Registers a callable that is passed every event of the game, see events.py.
+        '''
+        self.observers.append(observer)
+
+    def emit(self, event):
+        '''
+        Passes an event to every observer. Callers check self.observers first, so no event is built for nobody.
+        '''
+        for observer in self.observers:
+            observer(event)
 
     def log_round_state(self, players, round_state):
         '''
         Incorporates RoundState information into the game log and player messages.
         '''
         if round_state.street == 0 and round_state.button == 0:
-            self.log.append('{} posts the blind of {}'.format(players[0].name, SMALL_BLIND))
-            self.log.append('{} posts the blind of {}'.format(players[1].name, BIG_BLIND))
-            self.log.append('{} dealt {}'.format(players[0].name, PCARDS(round_state.hands[0])))
-            self.log.append('{} dealt {}'.format(players[1].name, PCARDS(round_state.hands[1])))
+            if not self.headless:
+                self.log.append(PBLIND(players[0].name, SMALL_BLIND))
+                self.log.append(PBLIND(players[1].name, BIG_BLIND))
+                self.log.append(PDEALT(players[0].name, round_state.hands[0]))
+                self.log.append(PDEALT(players[1].name, round_state.hands[1]))
             self.player_messages[0] = ['T0.', 'P0', 'H' + CCARDS(round_state.hands[0])]
             self.player_messages[1] = ['T0.', 'P1', 'H' + CCARDS(round_state.hands[1])]
+            if self.observers:
+                self.emit(Deal(round_state.hands))
         elif round_state.street > 0 and round_state.button == 1:
-            board = round_state.deck.peek(round_state.street)
-            street_name = STREET_NAMES[round_state.street - 3] if round_state.street < 6 else 'Run'
-            self.log.append(street_name + ' ' + PCARDS(board) +
-                            PVALUE(players[0].name, STARTING_STACK-round_state.stacks[0]) +
-                            PVALUE(players[1].name, STARTING_STACK-round_state.stacks[1]))
+            board = round_state.board[:round_state.street]
+            contributions = (STARTING_STACK - round_state.stacks[0], STARTING_STACK - round_state.stacks[1])
+            if not self.headless:
+                self.log.append(PSTREET(round_state.street, board, [players[0].name, players[1].name], contributions))
             compressed_board = 'B' + CCARDS(board)
             self.player_messages[0].append(compressed_board)
             self.player_messages[1].append(compressed_board)
+            if self.observers:
+                self.emit(Street(round_state.street, board, contributions))
 
-    def log_action(self, name, action, bet_override):
+    def log_action(self, name, round_state, action, answered):
         '''
-        Incorporates action information into the game log and player messages.
+        Incorporates an action taken in round_state into the game log and player messages.
+        answered tells whether the pokerbot chose it, rather than the engine checking or folding for it.
         '''
-        if isinstance(action, FoldAction):
-            phrasing = ' folds'
-            code = 'F'
-        elif isinstance(action, CallAction):
-            phrasing = ' calls'
-            code = 'C'
-        elif isinstance(action, CheckAction):
-            phrasing = ' checks'
-            code = 'K'
-        else:  # isinstance(action, RaiseAction)
-            phrasing = (' bets ' if bet_override else ' raises to ') + str(action.amount)
-            code = 'R' + str(action.amount)
-        self.log.append(name + phrasing)
+        code = ENCODE[type(action).__name__]
+        if code == 'R':
+            code += str(action.amount)
+        if not self.headless:
+            self.log.append(PACTION(name, action, round_state.pips == [0, 0]))
         self.player_messages[0].append(code)
         self.player_messages[1].append(code)
+        if self.observers:
+            self.emit(Action(name, action, round_state, answered))
 
     def log_terminal_state(self, players, round_state):
         '''
@@ -354,47 +928,119 @@ class Game():
         '''
         previous_state = round_state.previous_state
         if FoldAction not in previous_state.legal_actions():
-            self.log.append('{} shows {}'.format(players[0].name, PCARDS(previous_state.hands[0])))
-            self.log.append('{} shows {}'.format(players[1].name, PCARDS(previous_state.hands[1])))
+            if not self.headless:
+                self.log.append(PSHOWS(players[0].name, previous_state.hands[0]))
+                self.log.append(PSHOWS(players[1].name, previous_state.hands[1]))
             self.player_messages[0].append('O' + CCARDS(previous_state.hands[1]))
             self.player_messages[1].append('O' + CCARDS(previous_state.hands[0]))
-        self.log.append('{} awarded {}'.format(players[0].name, round_state.deltas[0]))
-        self.log.append('{} awarded {}'.format(players[1].name, round_state.deltas[1]))
+            if self.observers:
+                self.emit(Showdown(previous_state.hands))
+        if not self.headless:
+            self.log.append(PAWARDED(players[0].name, round_state.deltas[0]))
+            self.log.append(PAWARDED(players[1].name, round_state.deltas[1]))
         self.player_messages[0].append('D' + str(round_state.deltas[0]))
         self.player_messages[1].append('D' + str(round_state.deltas[1]))
+        if self.observers:
+            self.emit(Delta(tuple(round_state.deltas)))
 
-    def run_round(self, players):
+    def log_all_in_ev(self, players, round_state):
         '''
-        Runs one round of poker.
+        Logs and returns the first player's expected result once a player is all-in before the river.
+        round_state is the first street nobody can bet on, so the betting closed on the board before it.
         '''
-        deck = eval7.Deck()
-        deck.shuffle()
-        hands = [deck.deal(2), deck.deal(2)]
+        board = round_state.board[:round_state.previous_state.street]
+        contributions = [STARTING_STACK - stack for stack in round_state.stacks]
+        ev_delta = all_in_ev(board, round_state.hands, contributions)
+        if not self.headless:
+            self.log.append(PALL_IN_EV(players[0].name, players[1].name, ev_delta))
+        if self.observers:
+            self.emit(AllInEV((ev_delta, -ev_delta)))
+        return ev_delta
+
+    def log_error(self, line):
+        '''
+        Logs why a pokerbot's answer was replaced, see ErrorLog.
+        '''
+        self.log.append(line)
+        if self.observers:
+            self.emit(BotError(line))
+
+    def deal(self, round_num):
+        '''
+        Deals a round from its seeded deck and returns its starting RoundState. In DUPLICATE_MODE,
+        each even-numbered round replays the previous round's deck, and since the seats have swapped,
+        each player is dealt exactly what their opponent was dealt.
+        '''
+        deck_num = round_num - 1 if DUPLICATE_MODE and round_num % 2 == 0 else round_num
+        hands, board = self.decks.deal(deck_num)
 
         pips = [SMALL_BLIND, BIG_BLIND]
         stacks = [STARTING_STACK - SMALL_BLIND, STARTING_STACK - BIG_BLIND]
-        round_state = RoundState(0, 0, pips, stacks, hands, deck, None)
+        return RoundState(0, 0, pips, stacks, hands, board, None)
+
+    def seating(self, players, round_num):
+        '''
+        Returns the players in their seats for a round, as seats alternate every round.
+        '''
+        return players if round_num % 2 == 1 else players[::-1]
+
+    def round_queries(self, players, round_num):
+        '''
+        Plays and logs one round of poker, yielding (player, round_state, player_message) whenever a pokerbot
+        must be queried and taking the action it answers, so any engine can query its pokerbots its own way.
+        '''
+        round_state = self.deal(round_num)
+        ev_delta = None
         while not isinstance(round_state, TerminalState):
+            forced = round_state.legal_actions() == {CheckAction}
+            if EV_ADJUST and forced and ev_delta is None:
+                ev_delta = self.log_all_in_ev(players, round_state)
             self.log_round_state(players, round_state)
             active = round_state.button % 2
             player = players[active]
-            action = player.query(round_state, self.player_messages[active], self.log)
-            bet_override = (round_state.pips == [0, 0])
-            self.log_action(player.name, action, bet_override)
+            if FAST_FORWARD_ALL_IN and forced:
+                # a player is all-in, so the check is forced and the pokerbot hears about it with the next query
+                action = CheckAction()
+                answered = False
+            else:
+                action = yield player, round_state, self.player_messages[active]
+                answered = player.answered
+            self.log_action(player.name, round_state, action, answered)
             round_state = round_state.proceed(action)
         self.log_terminal_state(players, round_state)
-        for player, player_message, delta in zip(players, self.player_messages, round_state.deltas):
-            player.query(round_state, player_message, self.log)
-            player.bankroll += delta
+        for player, player_message in zip(players, self.player_messages):
+            yield player, round_state, player_message
+        self.settle(players, round_state, ev_delta)
 
-        # Print hands every X hands played
+    def run_round(self, players, round_num):
+        '''
+        Runs one round of poker.
+        '''
+        queries = self.round_queries(players, round_num)
+        action = None
+        try:
+            while True:
+                player, round_state, player_message = queries.send(action)
+                action = player.query(round_state, player_message, self.errors)
+        except StopIteration:
+            pass
+
+    def settle(self, players, terminal_state, ev_delta):
+        '''
+        Pays out a finished round, crediting the first player with ev_delta in the EV-adjusted bankrolls if it is not None.
+        '''
+        ev_deltas = terminal_state.deltas if ev_delta is None else [ev_delta, -ev_delta]
+        for player, delta, ev in zip(players, terminal_state.deltas, ev_deltas):
+            player.bankroll += delta
+            player.ev_bankroll += ev
         self.hand_counter += 1
-        if self.hand_counter % 1 == 0:
-            print(f"{self.hand_counter} hands have been played.")
+        self.progress.update(self.hand_counter, players)
 
-    def run(self):
+    def start(self, players=None, append_logs=False):
         '''
-        Runs one game of poker.
+        Builds and runs the pokerbots concurrently, the players from config.py unless others are given.
+        With append_logs, the players from config.py add to their logs instead of starting them over.
+        Returns the players.
         '''
         print('   _________ _____  ___       __           __        __    ')
         print('  / ____/  _/ / / / / _ \\___  / /_____ ____/ /  ___  / /____')
@@ -402,27 +1048,360 @@ class Game():
         print('/_/   /___/_/_/ /_/   \\___/_/\\_\\\\__/_/ /_.__/\\___/\\__/___/')
         print()
         print('Starting the Pokerbots engine...')
-        players = [
-            Player(PLAYER_1_NAME, PLAYER_1_PATH),
-            Player(PLAYER_2_NAME, PLAYER_2_PATH)
-        ]
-        for player in players:
-            player.build()
-            player.run()
-        for round_num in range(1, NUM_ROUNDS + 1):
+        if players is None:
+            players = [
+                make_player(PLAYER_1_NAME, PLAYER_1_PATH, append_log=append_logs),
+                make_player(PLAYER_2_NAME, PLAYER_2_PATH, append_log=append_logs)
+            ]
+        threads = [Thread(target=player.start) for player in players]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return players
+
+    def play(self, players, resume=False):
+        '''
+        Plays one game of poker between running pokerbots and writes the game log.
+        With resume, the game continues from its last checkpoint if there is one.
+        '''
+        self.start_log(players, resume)
+        round_num = self.next_round - 1
+        for round_num in self.play_rounds(players):
+            if self.finish_round(players, round_num):
+                break
+        self.close_log(players, round_num)
+
+    def start_log(self, players, resume=False):
+        '''
+        Opens the game log, or with resume reopens it where the last checkpoint left it if there is one.
+        '''
+        if not (resume and self.resume_log(players)):
+            self.open_log(players)
+        self.progress = Progress()
+
+    def log_round_start(self, seats, round_num):
+        '''
+        Logs the start of a round with the seated players' bankrolls.
+        '''
+        if not self.headless:
             self.log.append('')
-            self.log.append('Round #' + str(round_num) + STATUS(players))
-            self.run_round(players)
-            players = players[::-1]
+            self.log.append('Round #' + str(round_num) + STATUS(seats))
+        if self.observers:
+            self.emit(RoundStart(round_num, (seats[0].name, seats[1].name), (seats[0].bankroll, seats[1].bankroll)))
+
+    def finish_round(self, players, round_num):
+        '''
+        Records the result of round_num and saves a checkpoint when one is due.
+        Returns whether the SPRT has decided, which ends the game early.
+        '''
+        if self.record_result(players[0], round_num):
+            return True
+        self.save_checkpoint(players, round_num)
+        return False
+
+    def open_log(self, players):
+        '''
+        Starts the game log and the first player's running results.
+        '''
+        self.log = NullLog() if self.headless else GameLog(self.log_filename)
+        self.log.append('FIU Pokerbots - ' + players[0].name + ' vs ' + players[1].name)
+        # any round of the log can be dealt again from this seed and its round number
+        self.log.append(PSEED(self.decks.seed))
+        if self.observers:
+            self.emit(GameStart((players[0].name, players[1].name), self.decks.seed, None))
+        # duplicate pairs and the SPRT use the EV-adjusted results, the actual ones unless EV_ADJUST is on
+        self.unit_start = players[0].ev_bankroll
+        self.decision = None
+
+    def record_result(self, first_player, round_num):
+        '''
+        Feeds the first player's result after a round to the duplicate pairs and the SPRT.
+        Returns whether the SPRT has decided, which ends the game early.
+        '''
+        self.log.flush()
+        if not DUPLICATE_MODE or round_num % 2 == 0:
+            result = first_player.ev_bankroll - self.unit_start
+            self.unit_start = first_player.ev_bankroll
+            if DUPLICATE_MODE:
+                self.pair_stats.push(result)
+            if self.sprt is not None:
+                self.sprt.push(result)
+                self.decision = self.sprt.decision()
+        return self.decision is not None
+
+    def save_checkpoint(self, players, round_num):
+        '''
+        Saves what is needed to resume the game after round_num, once every CHECKPOINT_INTERVAL rounds.
+        '''
+        if (self.checkpoint_filename is None or CHECKPOINT_INTERVAL is None or
+                (round_num + 1 - self.first_round) % CHECKPOINT_INTERVAL != 0):
+            return
+        saved = {}
+        if self.observers:
+            self.emit(Checkpoint(round_num, saved))
+        state = {
+            'names': [player.name for player in players],
+            'num_rounds': self.num_rounds,
+            'first_round': self.first_round,
+            'round_num': round_num,
+            'log_compression': self.log.compression,
+            'log_offset': self.log.checkpoint(),
+            'seed': self.decks.seed,
+            'hand_counter': self.hand_counter,
+            'unit_start': self.unit_start,
+            'pair_stats': self.pair_stats,
+            'sprt_stats': None if self.sprt is None else self.sprt.stats,
+            'players': [(player.bankroll, player.ev_bankroll, player.game_clock, player.latency) for player in players],
+            'observers': saved
+        }
+        write_checkpoint(state, self.checkpoint_filename)
+
+    def resume_log(self, players):
+        '''
+        Restores the game from its checkpoint and reopens the game log where the checkpoint left it.
+        Returns False if there is no checkpoint to resume.
+        '''
+        state = None if self.checkpoint_filename is None else read_checkpoint(self.checkpoint_filename)
+        if state is None:
+            print('No checkpoint found, starting a new game')
+            return False
+        saved = (state.get('names'), state.get('num_rounds'), state.get('first_round'))
+        if saved != ([player.name for player in players], self.num_rounds, self.first_round):
+            raise ValueError('{} was saved by a different game ({} rounds from round {} between {}), '
+                             'remove it or restore that game\'s settings to resume'.format(
+                                 self.checkpoint_filename, saved[1], saved[2],
+                                 ' and '.join(saved[0] or ['unknown players'])))
+        if self.headless:
+            self.log = NullLog()
+        else:
+            self.log = GameLog(self.log_filename, state['log_compression'], offset=state['log_offset'])
+        self.decks = DeckProvider(state['seed'])
+        self.next_round = state['round_num'] + 1
+        self.hand_counter = state['hand_counter']
+        self.unit_start = state['unit_start']
+        self.pair_stats = state['pair_stats']
+        if self.sprt is not None and state['sprt_stats'] is not None:
+            self.sprt.stats = state['sprt_stats']
+        self.decision = None
+        for player, (bankroll, ev_bankroll, game_clock, latency) in zip(players, state['players']):
+            player.bankroll = bankroll
+            player.ev_bankroll = ev_bankroll
+            player.game_clock = game_clock
+            player.latency = latency
+        if self.observers:
+            self.emit(GameStart((players[0].name, players[1].name), self.decks.seed, state.get('observers', {})))
+        print('Resuming after round', state['round_num'])
+        return True
+
+    def close_log(self, players, round_num):
+        '''
+        Logs and prints the results once round_num was the last round, and closes the game log.
+        '''
+        names = [player.name for player in players]
+        first_player = players[0]
+        players = self.seating(players, round_num + 1)
         self.log.append('')
         self.log.append('Final' + STATUS(players))
+        summary = []
+        if EV_ADJUST:
+            summary.append('EV-adjusted' + EV_STATUS(players))
+        if DUPLICATE_MODE:
+            summary.append(PAIRED(names, self.pair_stats))
+        if self.decision is not None:
+            summary.append(SPRT_RESULT(first_player.name, self.sprt_bounds[self.decision],
+                                       round_num + 1 - self.first_round, self.sprt.llr()))
+        for line in summary:
+            self.log.append(line)
+            print(line)
+        if self.observers:
+            self.emit(GameEnd(tuple(player.name for player in players), tuple(player.bankroll for player in players),
+                              tuple(summary)))
+        for player in players:
+            print(PLATENCY(player.name, combine(player.latency.values()).summary()))
+        if self.telemetry_filename is not None:
+            write_reports({player.name: player.latency for player in players}, self.telemetry_filename)
+        if not self.headless:
+            print('Writing', self.log.name)
+        self.log.close()
+        if self.checkpoint_filename is not None:
+            remove_checkpoint(self.checkpoint_filename)
+
+    def play_rounds(self, players):
+        '''
+        Plays and logs the rounds in order, yielding each round number once its result is in.
+        '''
+        for round_num in range(self.next_round, self.first_round + self.num_rounds):
+            seats = self.seating(players, round_num)
+            self.log_round_start(seats, round_num)
+            self.run_round(seats, round_num)
+            yield round_num
+
+    def stop(self, players):
+        '''
+        Stops the pokerbots.
+        '''
         for player in players:
             player.stop()
-        name = GAME_LOG_FILENAME + '.txt'
-        print('Writing', name)
-        with open(name, 'w') as log_file:
-            log_file.write('\n'.join(self.log))
+
+    def run(self, players=None, resume=False):
+        '''
+        Runs one game of poker, between the players from config.py unless others are given.
+        With resume, the game continues from its last checkpoint if there is one.
+        '''
+        # a resumed game keeps what its pokerbots logged before it stopped
+        resuming = resume and self.checkpoint_filename is not None and os.path.exists(self.checkpoint_filename)
+        players = self.start(players, resuming)
+        try:
+            self.play(players, resume)
+        finally:
+            self.stop(players)
+
+
+class GameLogWriter(Observer):
+    '''
+    Writes the text game log of a headless game from its events, formatting each line only here.
+    The log matches the one a game with a text log writes, line for line, and a resumed game carries it on
+    from the last checkpoint.
+    '''
+
+    def __init__(self, log_filename=GAME_LOG_FILENAME):
+        self.log_filename = log_filename
+        self.log = None
+        self.names = None
+        self.bet_override = False
+
+    def game_start(self, event):
+        offset = None if event.resumed is None else event.resumed.get(('game_log', self.log_filename))
+        if offset is not None:
+            self.log = GameLog(self.log_filename, offset=offset)
+            return
+        self.log = GameLog(self.log_filename)
+        self.log.append('FIU Pokerbots - ' + event.names[0] + ' vs ' + event.names[1])
+        self.log.append(PSEED(event.seed))
+
+    def round_start(self, event):
+        self.names = event.names
+        self.log.flush()
+        self.log.append('')
+        self.log.append('Round #' + str(event.round_num) + ''.join(map(PVALUE, event.names, event.bankrolls)))
+
+    def deal(self, event):
+        self.log.append(PBLIND(self.names[0], SMALL_BLIND))
+        self.log.append(PBLIND(self.names[1], BIG_BLIND))
+        self.log.append(PDEALT(self.names[0], event.hands[0]))
+        self.log.append(PDEALT(self.names[1], event.hands[1]))
+        self.bet_override = False
+
+    def street(self, event):
+        self.log.append(PSTREET(event.street, event.board, self.names, event.contributions))
+        # the first raise of a street is a bet
+        self.bet_override = True
+
+    def action(self, event):
+        self.log.append(PACTION(event.name, event.action, self.bet_override))
+        if isinstance(event.action, RaiseAction):
+            self.bet_override = False
+
+    def showdown(self, event):
+        self.log.append(PSHOWS(self.names[0], event.hands[0]))
+        self.log.append(PSHOWS(self.names[1], event.hands[1]))
+
+    def delta(self, event):
+        self.log.append(PAWARDED(self.names[0], event.deltas[0]))
+        self.log.append(PAWARDED(self.names[1], event.deltas[1]))
+
+    def all_in_ev(self, event):
+        self.log.append(PALL_IN_EV(self.names[0], self.names[1], event.deltas[0]))
+
+    def bot_error(self, event):
+        self.log.append(event.message)
+
+    def game_end(self, event):
+        self.log.append('')
+        self.log.append('Final' + ''.join(map(PVALUE, event.names, event.bankrolls)))
+        for line in event.summary:
+            self.log.append(line)
+        print('Writing', self.log.name)
+        self.log.close()
+
+    def checkpoint(self, event):
+        event.saved['game_log', self.log_filename] = self.log.checkpoint()
+
+
+def match_dataset(match, dataset_directory=DATASET_DIRECTORY):
+    '''
+    Returns the dataset subdirectory of one of several games, or None if no dataset is kept.
+    '''
+    return None if dataset_directory is None else os.path.join(dataset_directory, str(match))
+
+
+def run_games(num_games=NUM_GAMES, seed=GAME_SEED, dataset_directory=DATASET_DIRECTORY):
+    '''
+    Plays back-to-back games between the players from config.py, whose pokerbots stay running throughout.
+    Each game gets its own seed, numbered game log, numbered telemetry reports and numbered dataset subdirectory.
+    '''
+    master = random.Random(seed)
+    totals = {PLAYER_1_NAME: 0, PLAYER_2_NAME: 0}
+    players = None
+    try:
+        for game_num in range(1, num_games + 1):
+            telemetry_filename = None if TELEMETRY_FILENAME is None else '{}.{}'.format(TELEMETRY_FILENAME, game_num)
+            game = Game(seed=master.getrandbits(64), log_filename='{}.{}'.format(GAME_LOG_FILENAME, game_num),
+                        telemetry_filename=telemetry_filename, checkpoint_filename=None,
+                        dataset_directory=match_dataset(game_num, dataset_directory))
+            if players is None:
+                players = game.start()
+            else:
+                for player in players:
+                    player.new_game()
+            game.play(players)
+            for player in players:
+                totals[player.name] += player.bankroll
+    finally:
+        # the pokerbots are stopped even if a game fails, so no subprocess outlives the session
+        if players is not None:
+            game.stop(players)
+    print('Total' + ''.join([PVALUE(name, total) for name, total in totals.items()]) + ', {} games'.format(num_games))
+    return totals
+
+
+def parse_args():
+    '''
+    Parses arguments that override settings in config.py.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 test_engine.py')
+    parser.add_argument('--transport', choices=sorted(LISTENERS), default=TRANSPORT,
+                        help='How the engine talks to the bots, defaults to TRANSPORT in config.py')
+    parser.add_argument('--protocol', choices=['text', 'binary'], default=PROTOCOL,
+                        help='Message format to offer the bots, defaults to PROTOCOL in config.py')
+    parser.add_argument('--games', type=int, default=NUM_GAMES,
+                        help='Games to play in one session without restarting the bots, defaults to NUM_GAMES in config.py')
+    parser.add_argument('--seed', type=int, default=GAME_SEED,
+                        help='Seed for the decks, defaults to GAME_SEED in config.py or a random seed that is logged')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the game saved in CHECKPOINT_FILENAME, restarting the bots')
+    parser.add_argument('--headless', action='store_true', default=HEADLESS,
+                        help='Build no text game log, defaults to HEADLESS in config.py')
+    parser.add_argument('--text-log', action='store_true',
+                        help='With --headless, still write the game log, formatted from the game events')
+    parser.add_argument('--dataset', type=str, default=DATASET_DIRECTORY,
+                        help='Directory to save every decision to as .npz chunks, defaults to DATASET_DIRECTORY in config.py')
+    args = parser.parse_args()
+    if args.resume and args.games > 1:
+        parser.error('--resume continues a single game, not a session of --games')
+    return args
 
 
 if __name__ == '__main__':
-    Game().run()
\ No newline at end of file
+    args = parse_args()
+    TRANSPORT = args.transport
+    PROTOCOL = args.protocol
+    HEADLESS = args.headless
+    if args.games > 1:
+        run_games(args.games, args.seed, args.dataset)
+    else:
+        game = Game(seed=args.seed, dataset_directory=args.dataset)
+        if HEADLESS and args.text_log:
+            game.add_observer(GameLogWriter())
+        game.run(resume=args.resume)
\ No newline at end of file
@@ -0,0 +1,51 @@
+'''
+Makes the engine's modules and the pokerbots' skeletons importable from the tests.
+'''
+import socket
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+ALL_IN_BOT = os.path.join(ROOT, 'all_in_bot')
+ABC_BOT = os.path.join(ROOT, 'abc_bot')
+
+
+@pytest.fixture
+def game_directory(tmp_path, monkeypatch):
+    '''
+    Runs a test in its own directory, where the games it plays write their logs.
+    '''
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class StubBot():
+    '''
+    Stands in for a pokerbot where only the skeleton Runner is tested.
+    '''
+
+    def __init__(self, multi_table):
+        self.multi_table = multi_table
+
+
+@pytest.fixture
+def connection(tmp_path):
+    '''
+    Returns an engine-side Player and a skeleton Runner talking over a connected socket pair.
+    '''
+    from test_engine import Player
+    from transports import SocketConnection
+    from abc_bot.skeleton.runner import Runner
+    engine_socket, bot_socket = socket.socketpair()
+    player = Player('A', None, str(tmp_path / 'A.txt'))
+    player.socketfile = SocketConnection(engine_socket)
+    bot_file = bot_socket.makefile('rwb')
+    runner = Runner(StubBot(True), bot_file)
+    yield player, runner
+    bot_file.close()
+    bot_socket.close()
+    player.socketfile.close()
+    player.output.close()
@@ -0,0 +1,43 @@
+'''
+Taking each chance node's luck out of a game log's results must leave an unbiased estimate with less variance.
+'''
+import eval7
+import numpy as np
+import pytest
+
+import aivat
+from equity import equity
+from test_engine import Game, InProcessPlayer
+from conftest import ALL_IN_BOT, ABC_BOT
+
+NUM_ROUNDS = 300
+SEED = 3
+POSITIONS = [('AhKh', 'QsQd', 'Jh7c2h'), ('9s8s', 'AcKd', 'Ks7s2d'), ('5c5d', 'AsJs', 'Js5h4s9c')]
+
+
+def cards(text):
+    return [eval7.Card(text[i:i + 2]) for i in range(0, len(text), 2)]
+
+
+@pytest.mark.parametrize('position', POSITIONS)
+def test_equity_is_a_martingale(position):
+    # the expected equity after the next card is the equity now, so each node's luck averages zero
+    first, second, board = position
+    hands = [cards(first), cards(second)]
+    board = cards(board)
+    dead = {str(card) for card in board + hands[0] + hands[1]}
+    live = [card for card in eval7.Deck().cards if str(card) not in dead]
+    after = [equity(board + [card], hands) for card in live]
+    assert np.mean(after) == pytest.approx(equity(board, hands), abs=1e-12)
+
+
+def test_corrected_estimate(game_directory):
+    players = [InProcessPlayer('A', ALL_IN_BOT), InProcessPlayer('B', ABC_BOT)]
+    Game(NUM_ROUNDS, SEED, checkpoint_filename=None).run(players)
+    names, raw, corrected = aivat.evaluate_log('gamelog.txt')
+    assert names == ['A', 'B']
+    assert raw.count == corrected.count == NUM_ROUNDS
+    assert raw.mean * NUM_ROUNDS == pytest.approx(players[0].bankroll)
+    # the luck removed is noise around zero, so both estimates agree within their errors
+    assert abs(raw.mean - corrected.mean) < 3 * raw.std_error()
+    assert corrected.variance() < 0.25 * raw.variance()
@@ -0,0 +1,19 @@
+'''
+The batch engine's policies must win exactly what the pokerbots they mirror win in the real engine.
+'''
+import pytest
+
+import batch_engine
+from batch_engine import AllInPolicy, ABCPolicy
+from test_engine import Game, InProcessPlayer
+from conftest import ALL_IN_BOT, ABC_BOT
+
+NUM_ROUNDS = 3000
+
+
+@pytest.mark.parametrize('seed', [1, 2])
+def test_bankrolls_match_the_engine(game_directory, seed):
+    players = [InProcessPlayer('A', ALL_IN_BOT), InProcessPlayer('B', ABC_BOT)]
+    Game(NUM_ROUNDS, seed, telemetry_filename=None, checkpoint_filename=None).run(players)
+    bankrolls, _ = batch_engine.run([AllInPolicy(), ABCPolicy()], NUM_ROUNDS, 1000, seed)
+    assert bankrolls == [player.bankroll for player in players]
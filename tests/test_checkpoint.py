@@ -0,0 +1,67 @@
+'''
+A game stopped part way and resumed from its last checkpoint must write the same log as a game played straight through.
+'''
+import hashlib
+import pytest
+
+import test_engine
+from test_engine import Game, InProcessPlayer
+from events import Observer
+from conftest import ALL_IN_BOT, ABC_BOT
+
+NUM_ROUNDS = 300
+SEED = 3
+CHECKPOINT_INTERVAL = 50
+STOP_ROUND = 160
+
+
+class Interrupter(Observer):
+    '''
+    Stops the game as if by Ctrl-C when a round starts.
+    '''
+
+    def __init__(self, round_num):
+        self.round_num = round_num
+
+    def round_start(self, event):
+        if event.round_num == self.round_num:
+            raise KeyboardInterrupt
+
+
+def players():
+    return [InProcessPlayer('A', ALL_IN_BOT), InProcessPlayer('B', ABC_BOT)]
+
+
+def new_game(sprt_bounds, headless, checkpoint_filename=test_engine.CHECKPOINT_FILENAME):
+    '''
+    Returns a game that writes its text log itself, or headless through a GameLogWriter.
+    '''
+    game = Game(NUM_ROUNDS, SEED, sprt_bounds=sprt_bounds, checkpoint_filename=checkpoint_filename)
+    if headless:
+        game.headless = True
+        game.add_observer(test_engine.GameLogWriter())
+    return game
+
+
+def log_hash(filename='gamelog.txt'):
+    with open(filename, 'rb') as log_file:
+        return hashlib.md5(log_file.read()).hexdigest()
+
+
+# with these bounds the SPRT stops the game after round 244, so the resumed game must carry on its statistics
+@pytest.mark.parametrize('sprt_bounds', [None, (-20., 20.)])
+@pytest.mark.parametrize('headless', [False, True])
+def test_resume_reproduces_the_log(game_directory, monkeypatch, sprt_bounds, headless):
+    monkeypatch.setattr(test_engine, 'CHECKPOINT_INTERVAL', CHECKPOINT_INTERVAL)
+    new_game(sprt_bounds, False, None).run(players())
+    reference = log_hash()
+    game = new_game(sprt_bounds, headless)
+    game.add_observer(Interrupter(STOP_ROUND))
+    with pytest.raises(KeyboardInterrupt):
+        game.run(players())
+    assert log_hash() != reference
+    resumed = new_game(sprt_bounds, headless)
+    resumed.run(players(), resume=True)
+    assert resumed.next_round == STOP_ROUND - STOP_ROUND % CHECKPOINT_INTERVAL + 1
+    assert log_hash() == reference
+    assert not (game_directory / test_engine.CHECKPOINT_FILENAME).exists()
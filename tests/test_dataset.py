@@ -0,0 +1,68 @@
+'''
+A game's dataset must hold every decision of that game exactly once, however it was started or resumed.
+'''
+import numpy as np
+import pytest
+
+import test_engine
+from test_engine import Game, InProcessPlayer
+from dataset import DatasetWriter, load_dataset, COLUMNS
+from events import Observer
+from conftest import ALL_IN_BOT, ABC_BOT
+
+NUM_ROUNDS = 300
+SEED = 3
+CHUNK_SIZE = 16
+CHECKPOINT_INTERVAL = 50
+STOP_ROUND = 160
+
+
+class Interrupter(Observer):
+    '''
+    Stops the game as if by Ctrl-C when a round starts.
+    '''
+
+    def __init__(self, round_num):
+        self.round_num = round_num
+
+    def round_start(self, event):
+        if event.round_num == self.round_num:
+            raise KeyboardInterrupt
+
+
+def play(directory, seed=SEED, resume=False, interrupt=None):
+    '''
+    Plays a headless game that saves its dataset to directory in small chunks, and returns the dataset.
+    '''
+    game = Game(NUM_ROUNDS, seed)
+    game.headless = True
+    game.add_observer(DatasetWriter(directory, CHUNK_SIZE))
+    if interrupt is not None:
+        game.add_observer(Interrupter(interrupt))
+    game.run([InProcessPlayer('A', ALL_IN_BOT), InProcessPlayer('B', ABC_BOT)], resume)
+    return load_dataset(directory)
+
+
+def assert_same(dataset, reference):
+    assert dataset['seed'] == reference['seed']
+    assert dataset['names'].tolist() == reference['names'].tolist()
+    for name in COLUMNS:
+        assert np.array_equal(dataset[name], reference[name]), name
+
+
+def test_new_game_replaces_the_dataset(game_directory):
+    reference = play('reference', SEED + 1)
+    play('dataset')
+    assert_same(play('dataset', SEED + 1), reference)
+
+
+def test_resume_keeps_every_round_once(game_directory, monkeypatch):
+    monkeypatch.setattr(test_engine, 'CHECKPOINT_INTERVAL', CHECKPOINT_INTERVAL)
+    reference = play('reference')
+    assert np.array_equal(np.unique(reference['round']), np.arange(1, NUM_ROUNDS + 1))
+    with pytest.raises(KeyboardInterrupt):
+        play('dataset', interrupt=STOP_ROUND)
+    interrupted = load_dataset('dataset')
+    # chunks were written after the last checkpoint, and the resumed game must drop them
+    assert interrupted['round'].max() > STOP_ROUND - STOP_ROUND % CHECKPOINT_INTERVAL
+    assert_same(play('dataset', resume=True), reference)
@@ -0,0 +1,50 @@
+'''
+The deck for round n must depend only on the seed and n, so any round or shard can be replayed.
+'''
+import numpy as np
+
+from decks import DeckProvider, CARDS_PER_ROUND
+from cards import EVAL7_CARDS
+
+SEED = 3
+BLOCK_SIZE = 16
+DECK_NUMS = list(range(1, 5 * BLOCK_SIZE))
+
+
+def test_same_seed_same_decks():
+    first = DeckProvider(SEED, BLOCK_SIZE)
+    second = DeckProvider(SEED, BLOCK_SIZE)
+    assert [first.deal(deck_num) for deck_num in DECK_NUMS] == [second.deal(deck_num) for deck_num in DECK_NUMS]
+    assert DeckProvider(SEED + 1, BLOCK_SIZE).deal(1) != first.deal(1)
+
+
+def test_replay_in_any_order():
+    in_order = [DeckProvider(SEED, BLOCK_SIZE).deal(deck_num) for deck_num in DECK_NUMS]
+    decks = DeckProvider(SEED, BLOCK_SIZE)
+    shuffled = np.random.default_rng(0).permutation(DECK_NUMS).tolist()
+    replayed = {deck_num: decks.deal(deck_num) for deck_num in shuffled}
+    assert [replayed[deck_num] for deck_num in DECK_NUMS] == in_order
+
+
+def test_shards_deal_the_whole_match():
+    whole = DeckProvider(SEED, BLOCK_SIZE)
+    for first_deck in range(1, DECK_NUMS[-1], 7):
+        shard = DeckProvider(SEED, BLOCK_SIZE)
+        for deck_num in range(first_deck, min(first_deck + 7, DECK_NUMS[-1] + 1)):
+            assert shard.deal(deck_num) == whole.deal(deck_num)
+
+
+def test_codes_match_deal():
+    decks = DeckProvider(SEED, BLOCK_SIZE)
+    codes = decks.codes(DECK_NUMS[::-1])
+    assert codes.shape == (len(DECK_NUMS), CARDS_PER_ROUND)
+    for deck_num, row in zip(DECK_NUMS[::-1], codes.tolist()):
+        assert len(set(row)) == CARDS_PER_ROUND
+        hands, board = decks.deal(deck_num)
+        assert hands[0] + hands[1] + board == [EVAL7_CARDS[code] for code in row]
+
+
+def test_unseeded_decks_replay_from_their_seed():
+    decks = DeckProvider(None, BLOCK_SIZE)
+    replay = DeckProvider(decks.seed, BLOCK_SIZE)
+    assert [decks.deal(deck_num) for deck_num in DECK_NUMS] == [replay.deal(deck_num) for deck_num in DECK_NUMS]
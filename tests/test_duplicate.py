@@ -0,0 +1,53 @@
+'''
+In DUPLICATE_MODE each pair of rounds deals one deck twice with the seats swapped,
+so each player is dealt exactly the cards their opponent was dealt.
+'''
+import test_engine
+from test_engine import Game, InProcessPlayer
+from events import Observer
+from conftest import ALL_IN_BOT, ABC_BOT
+
+NUM_ROUNDS = 100
+SEED = 3
+
+
+class DealRecorder(Observer):
+    '''
+    Records the hand each player is dealt in every round.
+    '''
+
+    def __init__(self):
+        self.dealt = {}
+        self.round_num = None
+        self.names = None
+
+    def round_start(self, event):
+        self.round_num = event.round_num
+        self.names = event.names
+
+    def deal(self, event):
+        self.dealt[self.round_num] = dict(zip(self.names, event.hands))
+
+
+def test_pairs_share_a_deck(monkeypatch):
+    monkeypatch.setattr(test_engine, 'DUPLICATE_MODE', True)
+    game = Game(NUM_ROUNDS, SEED)
+    for round_num in range(1, NUM_ROUNDS + 1, 2):
+        first, second = game.deal(round_num), game.deal(round_num + 1)
+        assert first.hands == second.hands
+        assert first.board == second.board
+    assert game.deal(1).hands != game.deal(3).hands
+
+
+def test_players_swap_cards(game_directory, monkeypatch):
+    monkeypatch.setattr(test_engine, 'DUPLICATE_MODE', True)
+    recorder = DealRecorder()
+    game = Game(NUM_ROUNDS, SEED, telemetry_filename=None, checkpoint_filename=None)
+    game.add_observer(recorder)
+    game.run([InProcessPlayer('A', ALL_IN_BOT), InProcessPlayer('B', ABC_BOT)])
+    dealt = recorder.dealt
+    assert len(dealt) == NUM_ROUNDS
+    for round_num in range(1, NUM_ROUNDS + 1, 2):
+        assert dealt[round_num]['A'] == dealt[round_num + 1]['B']
+        assert dealt[round_num]['B'] == dealt[round_num + 1]['A']
+    assert game.pair_stats.count == NUM_ROUNDS // 2
@@ -0,0 +1,116 @@
+'''
+Games with the same seed must write byte-identical logs, whatever transport, protocol or engine plays them.
+'''
+import asyncio
+import hashlib
+import os
+import shutil
+import pytest
+
+import test_engine
+import parallel_engine
+from test_engine import Game, Player, InProcessPlayer
+from async_engine import AsyncGame, AsyncPlayer
+from conftest import ALL_IN_BOT, ABC_BOT
+
+NUM_ROUNDS = 200
+SEED = 3
+
+
+def log_hash(filename='gamelog.txt'):
+    with open(filename, 'rb') as log_file:
+        return hashlib.md5(log_file.read()).hexdigest()
+
+
+def play(game, player_class=Player, paths=(ALL_IN_BOT, ABC_BOT)):
+    '''
+    Plays a game between the pokerbots at paths and returns its players.
+    '''
+    players = [player_class(name, path) for name, path in zip(['A', 'B'], paths)]
+    game.run(players)
+    return players
+
+
+def reference_hash(directory, paths):
+    '''
+    Returns the log hash of the plain blocking engine over the default TCP text protocol.
+    '''
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        play(Game(NUM_ROUNDS, SEED, telemetry_filename=None, checkpoint_filename=None), paths=paths)
+        return log_hash()
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture(scope='module')
+def reference(tmp_path_factory):
+    return reference_hash(tmp_path_factory.mktemp('reference'), (ALL_IN_BOT, ABC_BOT))
+
+
+@pytest.mark.parametrize('transport', ['tcp', 'unix', 'pipe'])
+@pytest.mark.parametrize('protocol', ['text', 'binary'])
+@pytest.mark.parametrize('pipelined', [False, True])
+def test_transports_and_protocols(reference, game_directory, monkeypatch, transport, protocol, pipelined):
+    monkeypatch.setattr(test_engine, 'TRANSPORT', transport)
+    monkeypatch.setattr(test_engine, 'PROTOCOL', protocol)
+    monkeypatch.setattr(test_engine, 'PIPELINE_ROUND_OVER', pipelined)
+    play(Game(NUM_ROUNDS, SEED, telemetry_filename=None, checkpoint_filename=None))
+    assert log_hash() == reference
+
+
+def test_in_process(reference, game_directory):
+    play(Game(NUM_ROUNDS, SEED, telemetry_filename=None, checkpoint_filename=None), InProcessPlayer)
+    assert log_hash() == reference
+
+
+def test_headless_text_log(reference, game_directory):
+    game = Game(NUM_ROUNDS, SEED, telemetry_filename=None, checkpoint_filename=None)
+    game.headless = True
+    game.add_observer(test_engine.GameLogWriter())
+    play(game)
+    assert log_hash() == reference
+
+
+def test_async(reference, game_directory):
+    players = [AsyncPlayer('A', ALL_IN_BOT), AsyncPlayer('B', ABC_BOT)]
+    asyncio.run(AsyncGame(NUM_ROUNDS, SEED, telemetry_filename=None, checkpoint_filename=None).run(players))
+    assert log_hash() == reference
+
+
+def test_async_long_output_line(reference, game_directory, tmp_path_factory):
+    # a line longer than asyncio's 64 KiB stream limit must not stop the bot's output or the game
+    chatty_bot = str(tmp_path_factory.mktemp('chatty') / 'abc_bot')
+    shutil.copytree(ABC_BOT, chatty_bot, ignore=shutil.ignore_patterns('__pycache__'))
+    with open(os.path.join(chatty_bot, 'player.py'), 'r+') as player_file:
+        source = player_file.read()
+        player_file.seek(0)
+        player_file.write("print('x' * 100000)\n" + source)
+    players = [AsyncPlayer('A', ALL_IN_BOT), AsyncPlayer('B', chatty_bot)]
+    asyncio.run(AsyncGame(NUM_ROUNDS, SEED, telemetry_filename=None, checkpoint_filename=None).run(players))
+    assert log_hash() == reference
+    with open('B.txt') as output_file:
+        assert 'x' * 100000 + '\n' in output_file.read()
+
+
+def test_parallel(reference, game_directory, monkeypatch):
+    monkeypatch.setattr(parallel_engine, 'PLAYER_1_PATH', ALL_IN_BOT)
+    monkeypatch.setattr(parallel_engine, 'PLAYER_2_PATH', ABC_BOT)
+    monkeypatch.setattr(parallel_engine, 'TELEMETRY_FILENAME', None)
+    parallel_engine.run(NUM_ROUNDS, num_workers=1, num_shards=3, seed=SEED)
+    assert log_hash() == reference
+
+
+def test_parallel_headless(game_directory, monkeypatch):
+    expected = play(Game(NUM_ROUNDS, SEED, telemetry_filename=None, checkpoint_filename=None), InProcessPlayer)
+    os.remove('gamelog.txt')
+    monkeypatch.setattr(test_engine, 'HEADLESS', True)
+    monkeypatch.setattr(parallel_engine, 'PLAYER_1_PATH', ALL_IN_BOT)
+    monkeypatch.setattr(parallel_engine, 'PLAYER_2_PATH', ABC_BOT)
+    monkeypatch.setattr(parallel_engine, 'TELEMETRY_FILENAME', None)
+    totals = parallel_engine.run(NUM_ROUNDS, num_workers=1, num_shards=3, seed=SEED)
+    # the shards keep no text log, so there is none to merge
+    assert not os.path.exists('gamelog.txt')
+    assert totals == {player.name: player.bankroll for player in expected}
+
@@ -0,0 +1,44 @@
+'''
+Exact preflop equity, counted in groups of boards, must equal scoring every one of the 1.7 million runouts.
+'''
+from itertools import combinations
+import eval7
+import numpy as np
+import pytest
+
+from equity import exact_preflop_equity, preflop_equity, NUM_RUNOUTS
+from hand_ranks import hand_ranks
+from cards import encode_cards
+
+# shared ranks, a pair, and hands whose flushes block or beat each other
+MATCHUPS = [('AhKh', 'QhJh'), ('AsKs', 'AhKh'), ('7c2d', '8s9s'), ('Td9d', 'TcTh')]
+
+
+def hands_of(matchup):
+    return [[eval7.Card(hand[:2]), eval7.Card(hand[2:])] for hand in matchup]
+
+
+def enumerated_equity(hands):
+    '''
+    Returns player 0's preflop equity by scoring both hands on every live board.
+    '''
+    codes = [encode_cards(hand) for hand in hands]
+    live = [code for code in range(52) if code not in codes[0] + codes[1]]
+    boards = np.array(list(combinations(live, 5)), np.int32)
+    assert len(boards) == NUM_RUNOUTS
+    scores = [hand_ranks(np.concatenate([boards, np.broadcast_to(np.array(hand, np.int32), (len(boards), 2))], axis=1))
+              for hand in codes]
+    return ((scores[0] > scores[1]).sum() + (scores[0] == scores[1]).sum() / 2) / len(boards)
+
+
+@pytest.mark.parametrize('matchup', MATCHUPS)
+def test_exact_preflop_equity(matchup):
+    hands = hands_of(matchup)
+    equity = exact_preflop_equity(hands)
+    assert equity == pytest.approx(enumerated_equity(hands), abs=1e-12)
+    assert equity + exact_preflop_equity(hands[::-1]) == pytest.approx(1.)
+
+
+def test_suit_isomorphic_matchups_share_equity():
+    for first, second in [(('AsKs', 'QhJh'), ('AdKd', 'QcJc')), (('7c2d', '8s9s'), ('7h2s', '8c9c'))]:
+        assert preflop_equity(hands_of(first)) == pytest.approx(exact_preflop_equity(hands_of(second)), abs=1e-12)
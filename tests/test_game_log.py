@@ -0,0 +1,41 @@
+'''
+A streamed game log must read back exactly as written, compressed or not, and across a resumed checkpoint.
+'''
+import pytest
+
+from test_engine import GameLog, LOG_OPENERS
+
+LINES = ['Round #{}, A (0), B (0)'.format(round_num) for round_num in range(1, 2001)]
+
+
+def read_log(log):
+    with LOG_OPENERS[log.compression](log.name, 'rt') as log_file:
+        return log_file.read()
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'lzma'])
+def test_reads_back(tmp_path, compression):
+    log = GameLog(str(tmp_path / 'gamelog'), compression, flush_interval=0.)
+    for line in LINES:
+        log.append(line)
+        log.flush()
+    log.close()
+    assert read_log(log) == '\n'.join(LINES)
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'lzma'])
+def test_resumes_at_checkpoint(tmp_path, compression):
+    filename = str(tmp_path / 'gamelog')
+    log = GameLog(filename, compression)
+    for line in LINES[:1000]:
+        log.append(line)
+    offset = log.checkpoint()
+    # lines after the checkpoint are lost with the crashed game
+    for line in ['lost'] * 100:
+        log.append(line)
+    log.close()
+    log = GameLog(filename, compression, offset=offset)
+    for line in LINES[1000:]:
+        log.append(line)
+    log.close()
+    assert read_log(log) == '\n'.join(LINES)
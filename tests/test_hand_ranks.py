@@ -0,0 +1,51 @@
+'''
+Lookups in the precomputed hand-rank table must score every hand exactly like eval7.evaluate.
+'''
+import eval7
+import numpy as np
+
+from hand_ranks import hand_rank, hand_ranks
+from cards import EVAL7_CARDS
+
+NUM_HANDS = 20000
+
+
+def evaluate(codes):
+    return eval7.evaluate([EVAL7_CARDS[code] for code in codes])
+
+
+def random_hands(rng, num_hands):
+    '''
+    Returns num_hands rows of seven distinct card codes.
+    '''
+    return np.argsort(rng.random((num_hands, 52)), axis=1)[:, :7]
+
+
+def flush_hands(rng, num_hands):
+    '''
+    Returns hands with five to seven cards of one suit, which random hands rarely have.
+    '''
+    hands = []
+    for _ in range(num_hands):
+        suit = int(rng.integers(4))
+        num_suited = int(rng.integers(5, 8))
+        suited = [4 * rank + suit for rank in rng.choice(13, num_suited, replace=False).tolist()]
+        others = [code for code in range(52) if code & 3 != suit]
+        hands.append(suited + rng.choice(others, 7 - num_suited, replace=False).tolist())
+    return np.array(hands)
+
+
+def test_random_hands():
+    hands = random_hands(np.random.default_rng(0), NUM_HANDS)
+    assert hand_ranks(hands).tolist() == [evaluate(hand) for hand in hands.tolist()]
+
+
+def test_flush_hands():
+    hands = flush_hands(np.random.default_rng(1), NUM_HANDS // 10)
+    assert hand_ranks(hands).tolist() == [evaluate(hand) for hand in hands.tolist()]
+
+
+def test_single_hands():
+    rng = np.random.default_rng(2)
+    hands = np.concatenate([random_hands(rng, 500), flush_hands(rng, 500)]).tolist()
+    assert [hand_rank(hand) for hand in hands] == [evaluate(hand) for hand in hands]
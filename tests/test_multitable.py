@@ -0,0 +1,76 @@
+'''
+A pokerbot that plays several tables at once must see the same match as one that plays them in turn:
+the multi-table engine writes the sequential engine's log, and its I<table> clauses and answers round-trip.
+'''
+import hashlib
+import pytest
+
+import test_engine
+from test_engine import Game, Player
+from multitable_engine import MultiTableGame
+from telemetry import combine
+from protocol import BINARY_FRAMES, MULTI_TABLE, encode_frame
+from abc_bot.skeleton.runner import decode_frame, split_tables
+from abc_bot.skeleton.actions import FoldAction, CheckAction, RaiseAction
+from conftest import ABC_BOT
+
+NUM_ROUNDS = 200
+SEED = 3
+NUM_TABLES = 4
+
+
+def play(game):
+    '''
+    Plays abc_bot against itself, the only pokerbot here that plays several tables at once,
+    and returns the players and the log hash.
+    '''
+    players = [Player(name, ABC_BOT) for name in ['A', 'B']]
+    game.run(players)
+    with open('gamelog.txt', 'rb') as log_file:
+        return players, hashlib.md5(log_file.read()).hexdigest()
+
+
+def test_table_clauses_round_trip():
+    message = ['T1.000', 'I0', 'P0', 'H2c,Ah', 'I3', 'K', 'R9', 'I255', 'D12']
+    assert decode_frame(encode_frame(message)[2:]) == message
+    assert split_tables(message) == [(None, ['T1.000']), (0, ['P0', 'H2c,Ah']), (3, ['K', 'R9']), (255, ['D12'])]
+
+
+@pytest.mark.parametrize('features', [0, BINARY_FRAMES])
+def test_table_answers_round_trip(connection, features):
+    player, runner = connection
+    player.features = runner.features = features | MULTI_TABLE
+    answers = [(2, FoldAction()), (0, RaiseAction(123)), (7, CheckAction())]
+    runner.send_answers(answers)
+    assert player.receive_table_actions(len(answers), None) == {2: 'F', 0: 'R123', 7: 'K'}
+
+
+@pytest.mark.parametrize('protocol', ['text', 'binary'])
+def test_same_log_as_sequential(tmp_path_factory, game_directory, monkeypatch, protocol):
+    monkeypatch.setattr(test_engine, 'PROTOCOL', protocol)
+    monkeypatch.chdir(tmp_path_factory.mktemp('sequential'))
+    _, reference = play(Game(NUM_ROUNDS, SEED, checkpoint_filename=None))
+    monkeypatch.chdir(game_directory)
+    monkeypatch.setattr(test_engine, 'NUM_TABLES', NUM_TABLES)
+    players, log_hash = play(MultiTableGame(NUM_ROUNDS, SEED, num_tables=NUM_TABLES))
+    assert all(player.features & MULTI_TABLE for player in players)
+    assert log_hash == reference
+
+
+def test_answers_are_timed_once(game_directory, monkeypatch):
+    monkeypatch.setattr(test_engine, 'NUM_TABLES', NUM_TABLES)
+    waits = {}
+    receive = MultiTableGame.receive
+
+    def record_wait(game, player, turns, start_time, results):
+        receive(game, player, turns, start_time, results)
+        waits.setdefault(player.name, []).append((len(turns), results[player][1]))
+
+    monkeypatch.setattr(MultiTableGame, 'receive', record_wait)
+    players, _ = play(MultiTableGame(NUM_ROUNDS, SEED, num_tables=NUM_TABLES))
+    for player in players:
+        assert max(num_turns for num_turns, _ in waits[player.name]) > 1
+        latency = combine(player.latency.values())
+        # one answer covers several tables, but its wait is only counted once
+        assert latency.count == sum(num_turns for num_turns, _ in waits[player.name])
+        assert latency.total == pytest.approx(sum(wait for _, wait in waits[player.name]))
@@ -0,0 +1,56 @@
+'''
+A pokerbot's log must stay within PLAYER_LOG_SIZE_LIMIT, keeping numbered backups or the tail of what it drops.
+'''
+from test_engine import PlayerLog
+
+OUTPUT = bytes(range(256)) * 2
+
+
+def read(filename):
+    with open(filename, 'rb') as log_file:
+        return log_file.read()
+
+
+def write_in_chunks(log, output, chunk_size=7):
+    for start in range(0, len(output), chunk_size):
+        log.write(output[start:start + chunk_size])
+
+
+def test_rotation(tmp_path):
+    filename = str(tmp_path / 'A.txt')
+    log = PlayerLog(filename, size_limit=100, backup_count=2, tail_size=0)
+    write_in_chunks(log, OUTPUT)
+    log.close()
+    # the oldest output was rotated past the last backup and is gone
+    assert read(filename + '.2') + read(filename + '.1') + read(filename) == OUTPUT[-212:]
+    assert len(read(filename + '.1')) == len(read(filename + '.2')) == 100
+
+
+def test_tail(tmp_path):
+    filename = str(tmp_path / 'A.txt')
+    log = PlayerLog(filename, size_limit=100, backup_count=0, tail_size=30)
+    write_in_chunks(log, OUTPUT)
+    log.write('text output\n')
+    log.close()
+    output = OUTPUT + b'text output\n'
+    dropped = len(output) - 100
+    assert read(filename) == (output[:100] + '\n... {} bytes dropped, last 30 follow ...\n'.format(dropped - 30).encode()
+                              + output[-30:])
+
+
+def test_no_tail(tmp_path):
+    filename = str(tmp_path / 'A.txt')
+    log = PlayerLog(filename, size_limit=100, backup_count=0, tail_size=0)
+    write_in_chunks(log, OUTPUT)
+    log.close()
+    assert read(filename) == OUTPUT[:100]
+
+
+def test_append_counts_toward_the_limit(tmp_path):
+    filename = str(tmp_path / 'A.txt')
+    with open(filename, 'wb') as log_file:
+        log_file.write(OUTPUT[:60])
+    log = PlayerLog(filename, size_limit=100, backup_count=0, tail_size=0, append=True)
+    log.write(OUTPUT[60:])
+    log.close()
+    assert read(filename) == OUTPUT[:100]
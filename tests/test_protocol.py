@@ -0,0 +1,110 @@
+'''
+The engine's side of the protocol in protocol.py must round-trip through the skeleton runner's side,
+as text or binary frames, after the V<mask> handshake settles which features both use.
+'''
+import socket
+import time
+import pytest
+
+import test_engine
+from cards import CARD_CODES
+from protocol import BINARY_FRAMES, UNACKED_ROUND_OVER, MULTI_TABLE, encode_frame, decode_action, decode_table_actions
+from abc_bot.skeleton.runner import Runner, decode_frame
+from abc_bot.skeleton.actions import FoldAction, CallAction, CheckAction, RaiseAction
+from conftest import StubBot
+
+MESSAGE = ['T29.875', 'P1', 'H2c,Ah', 'C', 'K', 'B9s,Td,Jh', 'R40', 'F', 'O7d,7s', 'D-40', 'N', 'Q']
+ACTIONS = [(FoldAction(), 'F'), (CallAction(), 'C'), (CheckAction(), 'K'), (RaiseAction(400), 'R400')]
+
+
+class CallingBot(StubBot):
+    '''
+    Calls every bet and counts the rounds it is told are over.
+    '''
+
+    def __init__(self):
+        super().__init__(False)
+        self.rounds_over = 0
+
+    def handle_new_round(self, game_state, round_state, active):
+        pass
+
+    def handle_round_over(self, game_state, terminal_state, active):
+        self.rounds_over += 1
+
+    def get_action(self, game_state, round_state, active):
+        return CallAction()
+
+
+def test_frames_round_trip():
+    frame = encode_frame(MESSAGE)
+    assert len(frame) == 2 + int.from_bytes(frame[:2], 'little')
+    assert decode_frame(frame[2:]) == MESSAGE
+
+
+def test_extreme_records():
+    message = ['T0.001', 'T4294967.295', 'R32767', 'D-32768', 'P0', 'B' + ','.join(CARD_CODES)]
+    assert decode_frame(encode_frame(message)[2:]) == message
+
+
+@pytest.mark.parametrize('features', [0, BINARY_FRAMES])
+def test_messages_round_trip(connection, features):
+    player, runner = connection
+    player.features = runner.features = features
+    player.send(player.encode_message(MESSAGE))
+    player.send(player.encode_message(MESSAGE[:3]))
+    packets = runner.receive()
+    assert next(packets) == MESSAGE
+    assert next(packets) == MESSAGE[:3]
+
+
+@pytest.mark.parametrize('features', [0, BINARY_FRAMES])
+def test_actions_round_trip(features):
+    runner = Runner(StubBot(False), None)
+    runner.features = features
+    for action, clause in ACTIONS:
+        record = runner.encode_action(action)
+        assert (decode_action(record) if features else record.decode()) == clause
+
+
+def test_cut_short_records():
+    assert decode_action(b'R\x01') == ''
+    assert decode_table_actions(b'I\x01C\x00\x00I\x02') == {1: 'C'}
+
+
+@pytest.mark.parametrize('protocol', ['text', 'binary'])
+@pytest.mark.parametrize('pipelined', [False, True])
+@pytest.mark.parametrize('num_tables', [1, 4])
+@pytest.mark.parametrize('multi_table', [False, True])
+def test_negotiation(connection, monkeypatch, protocol, pipelined, num_tables, multi_table):
+    player, runner = connection
+    runner.pokerbot.multi_table = multi_table
+    monkeypatch.setattr(test_engine, 'PROTOCOL', protocol)
+    monkeypatch.setattr(test_engine, 'PIPELINE_ROUND_OVER', pipelined)
+    monkeypatch.setattr(test_engine, 'NUM_TABLES', num_tables)
+    offered = player.offered_features()
+    # the runner answers first, so the engine finds the answer waiting once it sends the offer
+    runner.negotiate(offered)
+    player.negotiate()
+    if offered:
+        assert runner.socketfile.readline() == 'V{}\n'.format(offered).encode()
+    expected = ((BINARY_FRAMES if protocol == 'binary' else 0) | (UNACKED_ROUND_OVER if pipelined else 0) |
+                (MULTI_TABLE if num_tables > 1 and multi_table else 0))
+    assert player.features == runner.features == expected
+
+
+@pytest.mark.parametrize('features, answers', [(0, [b'K\n', b'C\n']), (UNACKED_ROUND_OVER, [b'C\n'])])
+def test_round_over_acknowledgements(connection, features, answers):
+    player, runner = connection
+    runner.pokerbot = CallingBot()
+    player.features = runner.features = features
+    # the opponent folds the bot's first round, and the bot has the first decision of its second
+    for message in [['T30.000', 'P1', 'H2c,Ah', 'F', 'D1'], ['T30.000', 'P0', 'H3c,3d'], ['Q']]:
+        player.send(player.encode_message(message))
+    runner.run()
+    assert runner.pokerbot.rounds_over == 1
+    received = []
+    with pytest.raises(socket.timeout):
+        while True:
+            received.append(player.socketfile.readline(time.perf_counter() + 0.1))
+    assert received == answers
@@ -0,0 +1,51 @@
+'''
+A session of back-to-back games keeps its pokerbots running between games and always stops them at the end.
+'''
+import pytest
+
+import test_engine
+from test_engine import Game, run_games
+from conftest import ALL_IN_BOT, ABC_BOT
+
+
+@pytest.fixture
+def started(game_directory, monkeypatch):
+    '''
+    Plays sessions between subprocess pokerbots and returns the players each session started.
+    '''
+    monkeypatch.setattr(test_engine, 'PLAYER_1_PATH', ALL_IN_BOT)
+    monkeypatch.setattr(test_engine, 'PLAYER_2_PATH', ABC_BOT)
+    monkeypatch.setattr(test_engine, 'RUN_IN_PROCESS', False)
+    started = []
+    start = Game.start
+
+    def record_start(game, players=None, append_logs=False):
+        started.extend(start(game, players, append_logs))
+        return started
+
+    monkeypatch.setattr(Game, 'start', record_start)
+    return started
+
+
+def test_bots_run_through_the_session(started):
+    totals = run_games(3, 3)
+    assert sorted(totals) == ['A', 'B'] and sum(totals.values()) == 0
+    assert len(started) == 2
+    assert all(player.bot_subprocess.poll() is not None for player in started)
+
+
+def test_bots_stop_when_a_game_fails(started, monkeypatch):
+    play = Game.play
+    games = []
+
+    def fail_second_game(game, players, resume=False):
+        games.append(game)
+        if len(games) == 2:
+            raise RuntimeError('game failed')
+        play(game, players, resume)
+
+    monkeypatch.setattr(Game, 'play', fail_second_game)
+    with pytest.raises(RuntimeError):
+        run_games(3, 3)
+    assert len(started) == 2
+    assert all(player.bot_subprocess.poll() is not None for player in started)
@@ -0,0 +1,69 @@
+'''
+Running statistics must agree with NumPy, and the SPRT must stop on a clear edge and name the right winner.
+'''
+import numpy as np
+import pytest
+
+from stats import RunningStats, SPRT
+from test_engine import Game, InProcessPlayer
+from conftest import ALL_IN_BOT, ABC_BOT
+
+
+def pushed(values):
+    stats = RunningStats()
+    for value in values:
+        stats.push(value)
+    return stats
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(0).normal(3., 50., 10000)
+    stats = pushed(values.tolist())
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(np.mean(values))
+    assert stats.variance() == pytest.approx(np.var(values, ddof=1))
+    assert stats.std_error() == pytest.approx(np.std(values, ddof=1) / np.sqrt(len(values)))
+
+
+def test_merged_stats_match_numpy():
+    values = np.random.default_rng(1).integers(-400, 401, 5000).astype(float)
+    merged = RunningStats()
+    for chunk in np.array_split(values, [0, 1, 10, 2500, 2500, 4999]):
+        merged.merge(pushed(chunk.tolist()))
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(np.mean(values))
+    assert merged.variance() == pytest.approx(np.var(values, ddof=1))
+
+
+@pytest.mark.parametrize('edge, decision', [(10., 1), (0., 0)])
+def test_sprt_decides_a_clear_edge(edge, decision):
+    sprt = SPRT(0., 10., min_count=100)
+    for count, value in enumerate(np.random.default_rng(2).normal(edge, 100., 100000).tolist(), 1):
+        sprt.push(value)
+        if sprt.decision() is not None:
+            break
+    assert sprt.decision() == decision
+    assert 100 <= count < 100000
+
+
+def test_sprt_waits_for_min_count():
+    sprt = SPRT(0., 10., min_count=100)
+    for value in [1000., 1001.] * 49:
+        sprt.push(value)
+    assert sprt.decision() is None
+    sprt.push(1000.)
+    sprt.push(1001.)
+    assert sprt.decision() == 1
+
+
+@pytest.mark.parametrize('paths, decision, result', [((ALL_IN_BOT, ABC_BOT), 1, '+20.0'),
+                                                     ((ABC_BOT, ALL_IN_BOT), 0, '-20.0')])
+def test_sprt_stops_a_game(game_directory, paths, decision, result):
+    num_rounds = 5000
+    game = Game(num_rounds, 3, sprt_bounds=(-20., 20.), telemetry_filename=None, checkpoint_filename=None)
+    game.run([InProcessPlayer(name, path) for name, path in zip('AB', paths)])
+    assert game.decision == decision
+    assert game.sprt.stats.count < num_rounds
+    with open('gamelog.txt') as log_file:
+        assert log_file.read().splitlines()[-1].startswith('SPRT, A ({} per round) accepted after {} rounds'.format(
+            result, game.sprt.stats.count))
@@ -0,0 +1,76 @@
+'''
+Latency histograms must report percentiles within their bucket error, and write them as JSON and Prometheus text.
+'''
+import json
+import os
+import numpy as np
+import pytest
+
+import test_engine
+from test_engine import run_games
+from telemetry import LatencyHistogram, bucket_index, bucket_limit, write_reports, QUANTILES
+from conftest import ALL_IN_BOT, ABC_BOT
+
+
+def recorded(seconds):
+    histogram = LatencyHistogram()
+    for value in seconds:
+        histogram.record(value)
+    return histogram
+
+
+def test_buckets_hold_their_values():
+    for value in list(range(1000)) + np.random.default_rng(0).integers(1000, 10 ** 9, 10000).tolist():
+        index = bucket_index(value)
+        assert bucket_limit(index - 1) < value <= bucket_limit(index)
+        assert bucket_limit(index) - value <= value / 64
+
+
+def test_percentiles_match_numpy():
+    seconds = np.random.default_rng(1).lognormal(-7., 1.5, 20000)
+    histogram = recorded(seconds.tolist())
+    assert histogram.count == len(seconds)
+    assert histogram.total == pytest.approx(seconds.sum())
+    assert histogram.max == seconds.max()
+    for quantile in QUANTILES + [1.]:
+        exact = np.quantile(seconds, quantile, method='inverted_cdf')
+        assert exact - 1e-6 <= histogram.percentile(quantile) <= exact * 1.02
+
+
+def test_merged_histograms_match_one():
+    seconds = np.random.default_rng(2).exponential(0.01, 5000).tolist()
+    merged = recorded(seconds[:1000])
+    merged.merge(recorded(seconds[1000:]))
+    assert merged.summary() == pytest.approx(recorded(seconds).summary())
+
+
+def test_reports(game_directory):
+    latencies = {'A': {('Preflop', 'call'): recorded([0.001, 0.002, 0.003]), ('River', 'fold'): recorded([0.5])},
+                 'B': {('Flop', 'raise'): recorded([0.25, 0.75])}}
+    write_reports(latencies, 'telemetry')
+    assert sorted(os.listdir()) == ['telemetry.json', 'telemetry.prom']
+    with open('telemetry.json') as json_file:
+        report = json.load(json_file)
+    assert report['A']['all']['count'] == 4
+    assert report['A']['all']['max'] == 0.5
+    assert report['A']['streets']['Preflop']['call']['p50'] == pytest.approx(0.002, rel=0.02)
+    assert report['B']['streets']['Flop']['raise']['total'] == 1.
+    with open('telemetry.prom') as prom_file:
+        lines = prom_file.read().splitlines()
+    labels = 'player="B",street="Flop",action="raise"'
+    assert 'pokerbots_decision_seconds_count{{{}}} 2'.format(labels) in lines
+    assert 'pokerbots_decision_seconds_sum{{{}}} 1.000000000'.format(labels) in lines
+    assert 'pokerbots_decision_max_seconds{{{}}} 0.750000000'.format(labels) in lines
+    samples = [line for line in lines if not line.startswith('#')]
+    assert len(samples) == 3 * (len(QUANTILES) + 3)
+    assert all(float(line.rsplit(' ', 1)[1]) >= 0 for line in samples)
+
+
+def test_each_game_of_a_session_has_its_reports(game_directory, monkeypatch):
+    monkeypatch.setattr(test_engine, 'PLAYER_1_PATH', ALL_IN_BOT)
+    monkeypatch.setattr(test_engine, 'PLAYER_2_PATH', ABC_BOT)
+    monkeypatch.setattr(test_engine, 'RUN_IN_PROCESS', True)
+    monkeypatch.setattr(test_engine, 'TELEMETRY_FILENAME', 'telemetry')
+    run_games(2, 3)
+    reports = sorted(name for name in os.listdir() if name.startswith('telemetry'))
+    assert reports == ['telemetry.1.json', 'telemetry.1.prom', 'telemetry.2.json', 'telemetry.2.prom']
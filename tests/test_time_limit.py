@@ -0,0 +1,84 @@
+'''
+A pokerbot that stalls past ACTION_TIME_LIMIT is dropped as soon as the limit passes, and the match goes on without it.
+'''
+import asyncio
+import os
+import shutil
+import time
+import pytest
+
+import test_engine
+from test_engine import Game, Player
+from multitable_engine import MultiTableGame
+from async_engine import AsyncGame, AsyncPlayer
+from conftest import ABC_BOT
+
+NUM_ROUNDS = 20
+SEED = 3
+TIME_LIMIT = 0.5
+STALL = 5.
+
+STALLING_BOT = '''
+import time
+from skeleton.actions import CheckAction, FoldAction
+from skeleton.bot import Bot
+from skeleton.runner import parse_args, run_bot
+
+
+class Player(Bot):
+    multi_table = True
+
+    def handle_new_round(self, game_state, round_state, active):
+        pass
+
+    def handle_round_over(self, game_state, terminal_state, active):
+        pass
+
+    def get_action(self, game_state, round_state, active):
+        time.sleep({})
+        return CheckAction() if CheckAction in round_state.legal_actions() else FoldAction()
+
+
+if __name__ == '__main__':
+    run_bot(Player(), parse_args())
+'''.format(STALL)
+
+
+@pytest.fixture
+def stalling_bot(tmp_path_factory):
+    '''
+    Returns the path of a pokerbot that takes STALL seconds over every action.
+    '''
+    directory = tmp_path_factory.mktemp('stalling_bot')
+    shutil.copytree(os.path.join(ABC_BOT, 'skeleton'), directory / 'skeleton')
+    shutil.copy(os.path.join(ABC_BOT, 'commands.json'), directory)
+    (directory / 'player.py').write_text(STALLING_BOT)
+    return str(directory)
+
+
+def play(game, player_class, stalling_bot):
+    '''
+    Plays the stalling pokerbot against abc_bot and returns how long the game took, starting the bots included.
+    '''
+    start_time = time.perf_counter()
+    players = [player_class('A', stalling_bot), player_class('B', ABC_BOT)]
+    if isinstance(game, AsyncGame):
+        asyncio.run(game.run(players))
+    else:
+        game.run(players)
+    return time.perf_counter() - start_time
+
+
+@pytest.mark.parametrize('game_class, player_class', [(Game, Player), (MultiTableGame, Player),
+                                                      (AsyncGame, AsyncPlayer)])
+def test_stalling_bot_is_dropped(game_directory, monkeypatch, stalling_bot, game_class, player_class):
+    monkeypatch.setattr(test_engine, 'ACTION_TIME_LIMIT', TIME_LIMIT)
+    monkeypatch.setattr(test_engine, 'NUM_TABLES', 4)
+    game = game_class(NUM_ROUNDS, SEED)
+    # the bots take a few tenths of a second to start, the stall itself would take STALL seconds per action
+    assert TIME_LIMIT <= play(game, player_class, stalling_bot) < TIME_LIMIT + 1.5
+    with open('gamelog.txt') as log_file:
+        log = log_file.read().splitlines()
+    assert 'A ran out of time' in log
+    assert log[-1].startswith('Final')
+    assert sum(line.startswith('Round #') for line in log) == NUM_ROUNDS
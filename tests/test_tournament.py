@@ -0,0 +1,69 @@
+'''
+Tournament scheduling and the Bradley-Terry ratings fitted to its results.
+'''
+import numpy as np
+
+import tournament
+from tournament import bot_names, schedule, score
+from ratings import BradleyTerry
+
+# points the row bot took from the column bot over four matches each
+RESULTS = {('a', 'b'): 3, ('a', 'c'): 4, ('b', 'c'): 3}
+
+
+def fitted(results=RESULTS, names='abc', num_matches=4):
+    ratings = BradleyTerry(names)
+    for (name, opponent), wins in results.items():
+        for match in range(num_matches):
+            ratings.add(name, opponent, 1. if match < wins else 0.)
+    return ratings
+
+
+def test_bot_names_and_schedule():
+    assert bot_names(['bots/a', 'other/a/', 'b', 'a']) == ['a', 'a-2', 'b', 'a-3']
+    assert schedule(3, 2) == [(0, 1), (0, 2), (1, 2)] * 2
+    assert [score(bankroll) for bankroll in [5, 0, -5]] == [1., 0.5, 0.]
+
+
+def test_ratings_fit_the_results():
+    ratings = fitted()
+    names = [name for name, _, _ in ratings.standings()]
+    assert names == ['a', 'b', 'c']
+    assert abs(sum(ratings.rating(name)[0] for name in 'abc')) < 1e-6
+    # the fit maximizes the penalized likelihood, so its gradient vanishes
+    probabilities = 1 / (1 + np.exp(ratings.strengths[None, :] - ratings.strengths[:, None]))
+    gradient = (ratings.scores - ratings.games * probabilities).sum(axis=1) - ratings.prior @ ratings.strengths
+    assert np.abs(gradient).max() < 1e-6
+
+
+def test_ratings_do_not_depend_on_the_order_of_results():
+    streamed = fitted()
+    batch = BradleyTerry('abc')
+    batch.scores = streamed.scores.copy()
+    batch.games = streamed.games.copy()
+    batch.fit()
+    assert np.allclose(batch.strengths, streamed.strengths)
+
+
+def test_even_results_rate_evenly():
+    ratings = fitted({('a', 'b'): 2, ('a', 'c'): 2, ('b', 'c'): 2})
+    for name in 'abc':
+        assert abs(ratings.rating(name)[0]) < 1e-6
+    # more matches narrow the intervals
+    assert ratings.rating('a')[1] < fitted({('a', 'b'): 1}, 'ab').rating('a')[1]
+
+
+def fixed_match(match, names, paths, num_rounds, seed, directory):
+    '''
+    Stands in for tournament.run_match: the bot named first in the alphabet always wins.
+    '''
+    return [10, -10] if names[0] < names[1] else [-10, 10]
+
+
+def test_tournament_rates_a_fixed_result_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(tournament, 'run_match', fixed_match)
+    standings = tournament.run(['bots/c', 'bots/a', 'bots/b'], 10, 2, 1, 3, str(tmp_path))
+    assert [name for name, _, _ in standings] == ['a', 'b', 'c']
+    ratings = fitted({('a', 'b'): 2, ('a', 'c'): 2, ('b', 'c'): 2}, num_matches=2)
+    for name, rating, interval in standings:
+        assert np.allclose((rating, interval), ratings.rating(name))
@@ -0,0 +1,123 @@
+'''
+Plays a round-robin league between many pokerbots across a process pool and rates them as results arrive.
+'''
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from itertools import combinations
+import argparse
+import tempfile
+import random
+import os
+
+from config import *
+from test_engine import Game, make_player, match_dataset
+from ratings import BradleyTerry
+
+
+def bot_names(paths):
+    '''
+    Names each bot after its directory, numbering any repeats.
+    '''
+    names = []
+    for path in paths:
+        base = name = os.path.basename(os.path.normpath(path))
+        count = 1
+        while name in names:
+            count += 1
+            name = '{}-{}'.format(base, count)
+        names.append(name)
+    return names
+
+
+def schedule(num_bots, matches_per_pairing):
+    '''
+    Returns the (first, second) bot indices of every match, each pairing played matches_per_pairing times.
+    '''
+    return [pairing for _ in range(matches_per_pairing) for pairing in combinations(range(num_bots), 2)]
+
+
+def run_match(match, names, paths, num_rounds, seed, directory):
+    '''
+    Plays one match between two pokerbots, keeping its logs in directory.
+    Returns each player's bankroll.
+    '''
+    players = [make_player(name, path, os.path.join(directory, '{}.{}.txt'.format(match, name)))
+               for name, path in zip(names, paths)]
+    game = Game(num_rounds, seed, os.path.join(directory, 'gamelog.{}'.format(match)),
+                telemetry_filename=os.path.join(directory, 'telemetry.{}'.format(match)), checkpoint_filename=None,
+                dataset_directory=match_dataset(match))
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        game.run(players)
+    return [player.bankroll for player in players]
+
+
+def score(bankroll):
+    '''
+    Scores a match for the player with this bankroll: 1 for a win, 0.5 for a draw and 0 for a loss.
+    '''
+    return 1. if bankroll > 0 else 0.5 if bankroll == 0 else 0.
+
+
+def run(paths, num_rounds=NUM_ROUNDS, matches_per_pairing=1, num_workers=NUM_WORKERS, seed=GAME_SEED,
+        log_directory=None):
+    '''
+    Plays every pairing of the pokerbots in paths, printing each result with the updated ratings.
+    Returns the final standings.
+    '''
+    names = bot_names(paths)
+    num_workers = num_workers or os.cpu_count()
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    master = random.Random(seed)
+    matches = schedule(len(paths), matches_per_pairing)
+    print('Playing', len(matches), 'matches of', num_rounds, 'rounds between', len(paths),
+          'bots on', num_workers, 'workers with seed', seed)
+    ratings = BradleyTerry(names)
+    records = {name: [0, 0, 0] for name in names}  # wins, draws, losses
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        directory = log_directory or temporary_directory
+        os.makedirs(directory, exist_ok=True)
+        with ProcessPoolExecutor(num_workers) as executor:
+            futures = {}
+            for match, (i, j) in enumerate(matches):
+                future = executor.submit(run_match, match, [names[i], names[j]], [paths[i], paths[j]],
+                                         num_rounds, master.getrandbits(64), directory)
+                futures[future] = (names[i], names[j])
+            for finished, future in enumerate(as_completed(futures), 1):
+                pairing = futures[future]
+                bankrolls = future.result()
+                ratings.add(pairing[0], pairing[1], score(bankrolls[0]))
+                for name, bankroll in zip(pairing, bankrolls):
+                    records[name][0 if bankroll > 0 else 1 if bankroll == 0 else 2] += 1
+                print('[{}/{}] {}'.format(finished, len(matches), ', '.join(
+                    ['{} ({}) {:.0f} +/- {:.0f}'.format(name, bankroll, *ratings.rating(name))
+                     for name, bankroll in zip(pairing, bankrolls)])))
+    standings = ratings.standings()
+    print()
+    print('{:>4} {:<24} {:>6} {:>7} {:>11}'.format('', 'Bot', 'Elo', '+/-', 'W-D-L'))
+    for rank, (name, rating, interval) in enumerate(standings, 1):
+        print('{:>4} {:<24} {:6.0f} {:7.0f} {:>11}'.format(rank, name, rating, interval,
+                                                         '-'.join(map(str, records[name]))))
+    return standings
+
+
+def parse_args():
+    '''
+    Parses the bots to play and arguments that override settings in config.py.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 tournament.py')
+    parser.add_argument('paths', nargs='+', help='Bot directories, at least two')
+    parser.add_argument('--rounds', type=int, default=NUM_ROUNDS, help='Rounds in each match')
+    parser.add_argument('--matches', type=int, default=1, help='Matches between each pair of bots')
+    parser.add_argument('--workers', type=int, default=NUM_WORKERS, help='Worker processes, defaults to every core')
+    parser.add_argument('--seed', type=int, default=GAME_SEED, help='Seed for the match decks')
+    parser.add_argument('--logs', type=str, default=None, help='Directory to keep every match log in')
+    args = parser.parse_args()
+    if len(args.paths) < 2:
+        parser.error('a tournament needs at least two bots')
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    run(args.paths, args.rounds, args.matches, args.workers, args.seed, args.logs)
@@ -0,0 +1,105 @@
+'''
+Measures the time per hand and message size of each transport and protocol.
+
+Each transport launches PLAYER_1's pokerbot and replays the same short round many times:
+the bot is dealt in as the big blind and acts, then the opponent folds. Every hand is
+timed from the engine writing the deal to the bot's acknowledgement of the result, or to
+sending the result when PIPELINE_ROUND_OVER lets the engine skip the acknowledgement.
+'''
+import argparse
+import tempfile
+import time
+import os
+
+from config import *
+import test_engine
+from transports import LISTENERS
+
+# the deal, after which the small blind calls and the bot acts
+DEAL_MESSAGE = ['T0.', 'P1', 'H2c,7d', 'C']
+
+
+def percentile(samples, fraction):
+    '''
+    Returns the value below which the given fraction of the sorted samples fall.
+    '''
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def bench(transport, name, path, num_rounds, directory):
+    '''
+    Returns the sorted hand times in seconds of one transport, and the bytes the engine sent.
+    '''
+    test_engine.TRANSPORT = transport
+    player = test_engine.Player(name, path, os.path.join(directory, '{}.{}.txt'.format(name, transport)))
+    player.build()
+    player.run()
+    if not player.connected():
+        return [], 0
+    samples = []
+    bytes_sent = 0
+    try:
+        for _ in range(num_rounds):
+            start = time.perf_counter()
+            message = player.encode_message(DEAL_MESSAGE)
+            clause, _ = player.exchange(message)
+            bytes_sent += len(message)
+            # the bot's action, the opponent folds if the round is still going, then the result
+            delta = -BIG_BLIND if clause == 'F' else BIG_BLIND
+            message = player.encode_message([clause, 'F', 'D' + str(delta)])
+            if player.features & test_engine.UNACKED_ROUND_OVER:
+                player.send(message)
+            else:
+                player.exchange(message)
+            samples.append(time.perf_counter() - start)
+            bytes_sent += len(message)
+    finally:
+        player.stop()
+    return sorted(samples), bytes_sent
+
+
+def run(transports, num_rounds, protocols=('text',), pipelining=(PIPELINE_ROUND_OVER,),
+        name=PLAYER_1_NAME, path=PLAYER_1_PATH):
+    '''
+    Benchmarks each transport, protocol and pipelining setting in turn and prints its time per hand in microseconds.
+    '''
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for pipelined in pipelining:
+            test_engine.PIPELINE_ROUND_OVER = pipelined
+            for protocol in protocols:
+                test_engine.PROTOCOL = protocol
+                for transport in transports:
+                    samples, bytes_sent = bench(transport, name, path, num_rounds, directory)
+                    if not samples:
+                        print(transport, 'failed to connect')
+                        continue
+                    results[transport, protocol, 'pipelined' if pipelined else 'acked'] = samples, bytes_sent
+    print('{:>8} {:>8} {:>9} {:>10} {:>10} {:>10} {:>10} {:>8}'.format(
+        '', '', '', 'mean us', 'p50 us', 'p99 us', 'max us', 'bytes'))
+    for (transport, protocol, mode), (samples, bytes_sent) in results.items():
+        print('{:>8} {:>8} {:>9} {:10.1f} {:10.1f} {:10.1f} {:10.1f} {:8.1f}'.format(
+            transport, protocol, mode, 1e6 * sum(samples) / len(samples), 1e6 * percentile(samples, 0.5),
+            1e6 * percentile(samples, 0.99), 1e6 * samples[-1], bytes_sent / len(samples)))
+    return results
+
+
+def parse_args():
+    '''
+    Parses arguments for the benchmark.
+    '''
+    parser = argparse.ArgumentParser(prog='python3 transport_bench.py')
+    parser.add_argument('--transports', nargs='+', choices=sorted(LISTENERS), default=list(LISTENERS),
+                        help='Transports to compare, defaults to all of them')
+    parser.add_argument('--protocols', nargs='+', choices=['text', 'binary'], default=[PROTOCOL],
+                        help='Message formats to compare, defaults to PROTOCOL in config.py')
+    parser.add_argument('--pipelining', nargs='+', choices=['on', 'off'],
+                        default=['on' if PIPELINE_ROUND_OVER else 'off'],
+                        help='Whether the engine skips round-over acknowledgements, defaults to PIPELINE_ROUND_OVER')
+    parser.add_argument('--rounds', type=int, default=10000, help='Rounds to replay on each transport')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    run(args.transports, args.rounds, args.protocols, [mode == 'on' for mode in args.pipelining])
@@ -0,0 +1,234 @@
+'''
+Connections between the engine and a pokerbot subprocess.
+
+Each listener is created before the bot is launched. It supplies the extra
+command-line arguments telling the bot's skeleton runner how to connect back,
+then accept() returns a Connection.
+'tcp' and 'unix' are stream sockets with Nagle's algorithm disabled, and 'pipe'
+is a pair of anonymous pipes inherited by the bot. 'unix' and 'pipe' need a POSIX system.
+'''
+import selectors
+import tempfile
+import socket
+import time
+import os
+
+from config import *
+
+CHUNK_SIZE = 65536
+
+
+class Connection():
+    '''
+    A buffered byte stream to one bot whose reads give up at a deadline.
+    Reads wait on the selector rather than blocking, so a stalled bot costs at most its own budget.
+    '''
+
+    def __init__(self, read_fileobj):
+        self.buffer = bytearray()
+        self.read_fileobj = read_fileobj
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(read_fileobj, selectors.EVENT_READ)
+
+    def fill(self, deadline):
+        '''
+        Buffers whatever arrives next, raising socket.timeout if nothing does before the deadline.
+        Returns False once the bot has closed its end.
+        '''
+        timeout = None if deadline is None else max(0., deadline - time.perf_counter())
+        if not self.selector.select(timeout):
+            raise socket.timeout
+        data = self.receive(CHUNK_SIZE)
+        self.buffer += data
+        return len(data) > 0
+
+    def read(self, size, deadline=None):
+        '''
+        Returns the next size bytes, or fewer if the bot closed its end.
+        '''
+        while len(self.buffer) < size and self.fill(deadline):
+            pass
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readline(self, deadline=None):
+        '''
+        Returns the next line including its newline, or what is left if the bot closed its end.
+        '''
+        start = 0
+        while True:
+            end = self.buffer.find(b'\n', start) + 1
+            if end > 0:
+                break
+            start = len(self.buffer)
+            if not self.fill(deadline):
+                end = len(self.buffer)
+                break
+        line = bytes(self.buffer[:end])
+        del self.buffer[:end]
+        return line
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.selector.close()
+
+
+def wait_readable(connections, deadline):
+    '''
+    Returns the connections with something to read, waiting until the deadline if none have yet.
+    '''
+    ready = [connection for connection in connections if connection.buffer]
+    if ready:
+        return ready
+    timeout = max(0., deadline - time.perf_counter())
+    with selectors.DefaultSelector() as selector:
+        for connection in connections:
+            selector.register(connection.read_fileobj, selectors.EVENT_READ, connection)
+        return [key.data for key, _ in selector.select(timeout)]
+
+
+class SocketConnection(Connection):
+    '''
+    A Connection over a connected stream socket.
+    '''
+
+    def __init__(self, sock):
+        super().__init__(sock)
+        self.sock = sock
+
+    def receive(self, size):
+        return self.sock.recv(size)
+
+    def write(self, data):
+        self.sock.sendall(data)
+
+    def close(self):
+        super().close()
+        self.sock.close()
+
+
+class PipeConnection(Connection):
+    '''
+    A Connection over a read pipe and a write pipe.
+    '''
+
+    def __init__(self, read_fd, write_fd):
+        super().__init__(read_fd)
+        self.read_fd = read_fd
+        self.writer = os.fdopen(write_fd, 'wb')
+
+    def receive(self, size):
+        return os.read(self.read_fd, size)
+
+    def write(self, data):
+        self.writer.write(data)
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        super().close()
+        try:
+            self.writer.close()
+        finally:
+            os.close(self.read_fd)
+
+
+class Listener():
+    '''
+    The base class for a way of connecting to one bot. Closes itself when used in a with block.
+    '''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TCPListener(Listener):
+    '''
+    Listens on a loopback TCP port; the bot gets the port number as its argument.
+    '''
+
+    def __init__(self):
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.bind(('', 0))
+        self.server_socket.settimeout(CONNECT_TIMEOUT)
+        self.server_socket.listen()
+        self.args = [str(self.server_socket.getsockname()[1])]
+        self.pass_fds = ()
+
+    def accept(self):
+        '''
+        Blocks until we time out or the bot connects.
+        '''
+        client_socket, _ = self.server_socket.accept()
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client_socket.settimeout(CONNECT_TIMEOUT)
+        return SocketConnection(client_socket)
+
+    def close(self):
+        self.server_socket.close()
+
+
+class UnixListener(Listener):
+    '''
+    Listens on a Unix domain socket in a fresh temporary directory.
+    '''
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix='pokerbots-')
+        self.path = os.path.join(self.directory, 'engine.sock')
+        self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server_socket.bind(self.path)
+        self.server_socket.settimeout(CONNECT_TIMEOUT)
+        self.server_socket.listen()
+        self.args = ['--unix', self.path]
+        self.pass_fds = ()
+
+    def accept(self):
+        '''
+        Blocks until we time out or the bot connects.
+        '''
+        client_socket, _ = self.server_socket.accept()
+        client_socket.settimeout(CONNECT_TIMEOUT)
+        return SocketConnection(client_socket)
+
+    def close(self):
+        self.server_socket.close()
+        os.unlink(self.path)
+        os.rmdir(self.directory)
+
+
+class PipeListener(Listener):
+    '''
+    Creates a pipe in each direction; the bot inherits its ends as file descriptors.
+    '''
+
+    def __init__(self):
+        self.bot_read, self.engine_write = os.pipe()
+        self.engine_read, self.bot_write = os.pipe()
+        self.open_fds = [self.bot_read, self.engine_write, self.engine_read, self.bot_write]
+        self.args = ['--pipe', str(self.bot_read), str(self.bot_write)]
+        self.pass_fds = (self.bot_read, self.bot_write)
+
+    def accept(self):
+        '''
+        Hands the engine's ends over once the bot has inherited its own.
+        '''
+        os.close(self.bot_read)
+        os.close(self.bot_write)
+        self.open_fds = []
+        return PipeConnection(self.engine_read, self.engine_write)
+
+    def close(self):
+        for fd in self.open_fds:
+            os.close(fd)
+        self.open_fds = []
+
+
+LISTENERS = {'tcp': TCPListener, 'unix': UnixListener, 'pipe': PipeListener}